@@ -1,9 +1,18 @@
+import os
 from .daimao_file_finder import NODE_CLASS_MAPPINGS as FINDER_NODE_MAPPINGS
 from .daimao_file_finder import NODE_DISPLAY_NAME_MAPPINGS as FINDER_DISPLAY_MAPPINGS
 from .daimao_file_deduplicator import NODE_CLASS_MAPPINGS as DEDUPLICATOR_NODE_MAPPINGS
 from .daimao_file_deduplicator import NODE_DISPLAY_NAME_MAPPINGS as DEDUPLICATOR_DISPLAY_MAPPINGS
 from .daimao_file_dedup import NODE_CLASS_MAPPINGS as DEDUP_NODE_MAPPINGS
 from .daimao_file_dedup import NODE_DISPLAY_NAME_MAPPINGS as DEDUP_DISPLAY_MAPPINGS
+from .daimao_file_verifier import NODE_CLASS_MAPPINGS as VERIFIER_NODE_MAPPINGS
+from .daimao_file_verifier import NODE_DISPLAY_NAME_MAPPINGS as VERIFIER_DISPLAY_MAPPINGS
+from .daimao_file_store import NODE_CLASS_MAPPINGS as STORE_NODE_MAPPINGS
+from .daimao_file_store import NODE_DISPLAY_NAME_MAPPINGS as STORE_DISPLAY_MAPPINGS
+from .daimao_file_index_merger import NODE_CLASS_MAPPINGS as INDEX_MERGER_NODE_MAPPINGS
+from .daimao_file_index_merger import NODE_DISPLAY_NAME_MAPPINGS as INDEX_MERGER_DISPLAY_MAPPINGS
+from .daimao_file_delta_report import NODE_CLASS_MAPPINGS as DELTA_REPORT_NODE_MAPPINGS
+from .daimao_file_delta_report import NODE_DISPLAY_NAME_MAPPINGS as DELTA_REPORT_DISPLAY_MAPPINGS
 from .daimao_file_deduplicator_with_symlink import DaiMaoFileDeduplicatorWithSymlink
 from .anime_name_helper.anime_name_helper_node import AnimeNameHelper
 from .blind_watermark_tool import NODE_CLASS_MAPPINGS as WATERMARK_NODE_MAPPINGS
@@ -14,12 +23,23 @@ from .math import NODE_CLASS_MAPPINGS as MATH_NODE_MAPPINGS
 from .math import NODE_DISPLAY_NAME_MAPPINGS as MATH_DISPLAY_MAPPINGS
 from .load import NODE_CLASS_MAPPINGS as LOAD_NODE_MAPPINGS
 from .load import NODE_DISPLAY_NAME_MAPPINGS as LOAD_DISPLAY_MAPPINGS
+from .daimao_legacy_aliases import LEGACY_ALIASES, collect_legacy_aliases
+
+# 注册哈希查询等API路由（仅在ComfyUI服务端环境中可用）
+try:
+    from . import daimao_file_routes
+except ImportError:
+    pass
 
 # 合并节点映射
 NODE_CLASS_MAPPINGS = {}
 NODE_CLASS_MAPPINGS.update(FINDER_NODE_MAPPINGS)
 NODE_CLASS_MAPPINGS.update(DEDUPLICATOR_NODE_MAPPINGS)
 NODE_CLASS_MAPPINGS.update(DEDUP_NODE_MAPPINGS)
+NODE_CLASS_MAPPINGS.update(VERIFIER_NODE_MAPPINGS)
+NODE_CLASS_MAPPINGS.update(STORE_NODE_MAPPINGS)
+NODE_CLASS_MAPPINGS.update(INDEX_MERGER_NODE_MAPPINGS)
+NODE_CLASS_MAPPINGS.update(DELTA_REPORT_NODE_MAPPINGS)
 NODE_CLASS_MAPPINGS.update(WATERMARK_NODE_MAPPINGS)
 NODE_CLASS_MAPPINGS.update(MASK_NODE_MAPPINGS)
 NODE_CLASS_MAPPINGS.update(MATH_NODE_MAPPINGS)
@@ -34,6 +54,10 @@ NODE_DISPLAY_NAME_MAPPINGS = {}
 NODE_DISPLAY_NAME_MAPPINGS.update(FINDER_DISPLAY_MAPPINGS)
 NODE_DISPLAY_NAME_MAPPINGS.update(DEDUPLICATOR_DISPLAY_MAPPINGS)
 NODE_DISPLAY_NAME_MAPPINGS.update(DEDUP_DISPLAY_MAPPINGS)
+NODE_DISPLAY_NAME_MAPPINGS.update(VERIFIER_DISPLAY_MAPPINGS)
+NODE_DISPLAY_NAME_MAPPINGS.update(STORE_DISPLAY_MAPPINGS)
+NODE_DISPLAY_NAME_MAPPINGS.update(INDEX_MERGER_DISPLAY_MAPPINGS)
+NODE_DISPLAY_NAME_MAPPINGS.update(DELTA_REPORT_DISPLAY_MAPPINGS)
 NODE_DISPLAY_NAME_MAPPINGS.update(WATERMARK_DISPLAY_MAPPINGS)
 NODE_DISPLAY_NAME_MAPPINGS.update(MASK_DISPLAY_MAPPINGS)
 NODE_DISPLAY_NAME_MAPPINGS.update(MATH_DISPLAY_MAPPINGS)
@@ -43,93 +67,23 @@ NODE_DISPLAY_NAME_MAPPINGS.update({
     "呆毛文件去重器(带符号链接)": "呆毛文件去重器(带符号链接)",
 })
 
-# 添加便于搜索的别名
-NODE_CLASS_MAPPINGS.update({
-    "DaiMaoFileDedup": NODE_CLASS_MAPPINGS["呆毛文件去重"],
-    "FileDeduplication": NODE_CLASS_MAPPINGS["呆毛文件去重"],
-    "DedupFiles": NODE_CLASS_MAPPINGS["呆毛文件去重"],
-    "文件去重": NODE_CLASS_MAPPINGS["呆毛文件去重"],
-    "文件查重": NODE_CLASS_MAPPINGS["呆毛文件查重"],
-    
-    "DaiMaoFileFinder": NODE_CLASS_MAPPINGS["呆毛文件查重"],
-    "FileDuplicatesFinder": NODE_CLASS_MAPPINGS["呆毛文件查重"],
-    "FindDuplicates": NODE_CLASS_MAPPINGS["呆毛文件查重"],
-    "查找重复文件": NODE_CLASS_MAPPINGS["呆毛文件查重"],
-    
-    "DaiMaoDeduplicator": NODE_CLASS_MAPPINGS["呆毛文件去重器"],
-    "FileDeduplicator": NODE_CLASS_MAPPINGS["呆毛文件去重器"],
-    "RemoveDuplicates": NODE_CLASS_MAPPINGS["呆毛文件去重器"],
-    "删除重复文件": NODE_CLASS_MAPPINGS["呆毛文件去重器"],
-    
-    "DaiMaoDeduplicatorWithSymlink": NODE_CLASS_MAPPINGS["呆毛文件去重器(带符号链接)"],
-    "FileDeduplicatorWithSymlink": NODE_CLASS_MAPPINGS["呆毛文件去重器(带符号链接)"],
-    "RemoveDuplicatesWithSymlink": NODE_CLASS_MAPPINGS["呆毛文件去重器(带符号链接)"],
-    "删除重复文件(带符号链接)": NODE_CLASS_MAPPINGS["呆毛文件去重器(带符号链接)"],
-    
-    # Mask节点别名
-    "BoundingBox": NODE_CLASS_MAPPINGS["BoundingBoxMask"],
-    "MinRectMask": NODE_CLASS_MAPPINGS["BoundingBoxMask"],
-    "最小矩形": NODE_CLASS_MAPPINGS["BoundingBoxMask"],
-    "Seam": NODE_CLASS_MAPPINGS["SeamMask"],
-    "接缝遮罩": NODE_CLASS_MAPPINGS["SeamMask"],
-    "Grid": NODE_CLASS_MAPPINGS["GridMask"],
-    "网格遮罩": NODE_CLASS_MAPPINGS["GridMask"],
-    
-    # 数字补零节点别名
-    "NumberPadding": NODE_CLASS_MAPPINGS["NumberPaddingNode"],
-    "PadNumber": NODE_CLASS_MAPPINGS["NumberPaddingNode"],
-    "ZeroPadding": NODE_CLASS_MAPPINGS["NumberPaddingNode"],
-    "补零": NODE_CLASS_MAPPINGS["NumberPaddingNode"],
-    
-    # 文件存在检查节点别名
-    "FileExists": NODE_CLASS_MAPPINGS["FileExistsNode"],
-    "CheckFileExists": NODE_CLASS_MAPPINGS["FileExistsNode"],
-    "IsFileExists": NODE_CLASS_MAPPINGS["FileExistsNode"],
-    "文件存在": NODE_CLASS_MAPPINGS["FileExistsNode"],
-    "检查文件": NODE_CLASS_MAPPINGS["FileExistsNode"],
-    
-    # 批量加载图片节点别名
-    "BatchLoadImages": NODE_CLASS_MAPPINGS["BatchLoadImagesNode"],
-    "LoadImagesFromDir": NODE_CLASS_MAPPINGS["BatchLoadImagesNode"],
-    "DirectoryImageLoader": NODE_CLASS_MAPPINGS["BatchLoadImagesNode"],
-    "批量加载": NODE_CLASS_MAPPINGS["BatchLoadImagesNode"],
-    "目录图片": NODE_CLASS_MAPPINGS["BatchLoadImagesNode"],
-    "加载目录": NODE_CLASS_MAPPINGS["BatchLoadImagesNode"],
-    
-    # 批量储存图片节点别名
-    "BatchSaveImages": NODE_CLASS_MAPPINGS["BatchSaveImagesNode"],
-    "SaveImagesToDir": NODE_CLASS_MAPPINGS["BatchSaveImagesNode"],
-    "ImageSaver": NODE_CLASS_MAPPINGS["BatchSaveImagesNode"],
-    "批量保存": NODE_CLASS_MAPPINGS["BatchSaveImagesNode"],
-    "保存图片": NODE_CLASS_MAPPINGS["BatchSaveImagesNode"],
-    "图片保存": NODE_CLASS_MAPPINGS["BatchSaveImagesNode"],
-})
+# 旧版本把每个别名都注册成了独立的节点键，界面每次加载都要为每个键调用一次INPUT_TYPES。
+# 现在别名写在各节点类的SEARCH_ALIASES中供搜索使用；旧工作流中的别名键由前端扩展
+# （web/js/daimao_legacy_aliases.js）在加载时改写为当前节点键，别名不再出现在 /object_info 中。
+# 通过API直接提交使用旧键的工作流时，可设置环境变量 DAIMAO_LEGACY_ALIASES=1，把别名键注册为标记DEPRECATED的子类。
+LEGACY_ALIASES.update(collect_legacy_aliases(NODE_CLASS_MAPPINGS))
+
+def _register_legacy_aliases():
+    for alias, key in LEGACY_ALIASES.items():
+        node_class = NODE_CLASS_MAPPINGS[key]
+        NODE_CLASS_MAPPINGS[alias] = type(node_class.__name__, (node_class,), {
+            "DEPRECATED": True,
+            "SEARCH_ALIASES": [],
+        })
+        NODE_DISPLAY_NAME_MAPPINGS[alias] = NODE_DISPLAY_NAME_MAPPINGS.get(key, key)
 
-# 同步更新显示名称
-for key in NODE_CLASS_MAPPINGS:
-    if key not in NODE_DISPLAY_NAME_MAPPINGS:
-        if key in ["DaiMaoFileFinder", "FileDuplicatesFinder", "FindDuplicates", "查找重复文件", "文件查重"]:
-            NODE_DISPLAY_NAME_MAPPINGS[key] = "呆毛文件查重"
-        elif key in ["DaiMaoDeduplicator", "FileDeduplicator", "RemoveDuplicates", "删除重复文件"]:
-            NODE_DISPLAY_NAME_MAPPINGS[key] = "呆毛文件去重器"
-        elif key in ["DaiMaoDeduplicatorWithSymlink", "FileDeduplicatorWithSymlink", "RemoveDuplicatesWithSymlink", "删除重复文件(带符号链接)"]:
-            NODE_DISPLAY_NAME_MAPPINGS[key] = "呆毛文件去重器(带符号链接)"
-        elif key in ["BoundingBox", "MinRectMask", "最小矩形"]:
-            NODE_DISPLAY_NAME_MAPPINGS[key] = "最小矩形包裹"
-        elif key in ["Seam", "接缝遮罩"]:
-            NODE_DISPLAY_NAME_MAPPINGS[key] = "接缝区域遮罩"
-        elif key in ["Grid", "网格遮罩"]:
-            NODE_DISPLAY_NAME_MAPPINGS[key] = "网格化遮罩"
-        elif key in ["NumberPadding", "PadNumber", "ZeroPadding", "补零"]:
-            NODE_DISPLAY_NAME_MAPPINGS[key] = "数字补零"
-        elif key in ["FileExists", "CheckFileExists", "IsFileExists", "文件存在", "检查文件"]:
-            NODE_DISPLAY_NAME_MAPPINGS[key] = "文件存在检查"
-        elif key in ["BatchLoadImages", "LoadImagesFromDir", "DirectoryImageLoader", "批量加载", "目录图片", "加载目录"]:
-            NODE_DISPLAY_NAME_MAPPINGS[key] = "批量加载图片"
-        elif key in ["BatchSaveImages", "SaveImagesToDir", "ImageSaver", "批量保存", "保存图片", "图片保存"]:
-            NODE_DISPLAY_NAME_MAPPINGS[key] = "批量储存图片"
-        else:
-            NODE_DISPLAY_NAME_MAPPINGS[key] = "呆毛文件去重"
+if os.environ.get("DAIMAO_LEGACY_ALIASES", "0") == "1":
+    _register_legacy_aliases()
 
 WEB_DIRECTORY = "./web"
 
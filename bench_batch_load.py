@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量加载图片解码吞吐基准测试
+
+对比以下几种加载方式的耗时和吞吐：
+  - 逐张转换：每张图片 np.array(image).astype(np.float32) / 255.0，再逐张创建填充后的float32副本，最后torch.cat（旧版加载方式）
+  - 批量加载节点：uint8缓冲上完成解码和填充，整批只转换一次float32（每次运行前清空解码缓存）
+  - 缓存命中：批量加载节点再次加载同一目录，图片从解码缓存复制
+
+用法（在ComfyUI使用的Python环境中运行，需要torch、numpy、Pillow）：
+    python bench_batch_load.py                       # 生成临时测试图片
+    python bench_batch_load.py --dir /path/to/images --runs 5
+    python bench_batch_load.py --count 200 --size 1024 --workers 1
+"""
+
+import os
+import sys
+
+PLUGIN_DIR = os.path.dirname(os.path.abspath(__file__))
+# 插件内的math子包会遮蔽标准库math，直接运行本脚本时先把插件目录移出搜索路径
+sys.path = [path for path in sys.path if os.path.abspath(path or os.curdir) != PLUGIN_DIR]
+
+import argparse
+import importlib
+import shutil
+import tempfile
+import time
+import types
+
+PACKAGE_NAME = "daimao_tools_bench"
+
+
+def import_loader():
+    """只导入批量加载节点和解码缓存，不执行插件的__init__，不需要ComfyUI环境"""
+    package = types.ModuleType(PACKAGE_NAME)
+    package.__path__ = [PLUGIN_DIR]
+    sys.modules[PACKAGE_NAME] = package
+    node_module = importlib.import_module(f"{PACKAGE_NAME}.load.batch_load_images_node")
+    cache_module = importlib.import_module(f"{PACKAGE_NAME}.load.image_cache")
+    return node_module.BatchLoadImagesNode, cache_module.get_image_cache()
+
+
+def generate_images(directory, count, size):
+    """生成尺寸略有差异的随机图片，JPEG和PNG各一半"""
+    import numpy as np
+    from PIL import Image
+    rng = np.random.default_rng(0)
+    for i in range(count):
+        height = size - (i % 4) * size // 16
+        width = size - (i % 3) * size // 16
+        pixels = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+        if i % 2:
+            Image.fromarray(pixels).save(os.path.join(directory, f"bench_{i}.png"), compress_level=1)
+        else:
+            Image.fromarray(pixels).save(os.path.join(directory, f"bench_{i}.jpg"), quality=90)
+
+
+def legacy_load(node, image_files):
+    """旧版加载方式：逐张转换为float32，逐张创建填充副本，最后合并"""
+    import numpy as np
+    import torch
+    from PIL import Image
+    tensors = []
+    for path in image_files:
+        image = Image.open(path).convert("RGB")
+        tensors.append(torch.from_numpy(np.array(image).astype(np.float32) / 255.0).unsqueeze(0))
+    max_height = max(t.shape[1] for t in tensors)
+    max_width = max(t.shape[2] for t in tensors)
+    padded = []
+    for tensor in tensors:
+        background = np.zeros((max_height, max_width, 3), dtype=np.float32)
+        height, width = tensor.shape[1], tensor.shape[2]
+        y, x = (max_height - height) // 2, (max_width - width) // 2
+        background[y:y + height, x:x + width, :] = tensor.squeeze(0).cpu().numpy()
+        padded.append(torch.from_numpy(background).unsqueeze(0))
+    return torch.cat(padded, dim=0)
+
+
+def best_time(func, runs):
+    best = None
+    result = None
+    for _ in range(max(1, runs)):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="呆毛工具批量加载图片解码吞吐基准测试")
+    parser.add_argument("--dir", default="", help="测试图片目录，不指定时生成临时图片")
+    parser.add_argument("--count", type=int, default=64, help="生成的图片数量")
+    parser.add_argument("--size", type=int, default=768, help="生成的图片边长")
+    parser.add_argument("--runs", type=int, default=3, help="运行次数，取最小值")
+    parser.add_argument("--workers", type=int, default=0, help="批量加载节点的线程数，0表示自动")
+    args = parser.parse_args()
+
+    BatchLoadImagesNode, image_cache = import_loader()
+    node = BatchLoadImagesNode()
+    temp_dir = None
+    directory = args.dir
+    if not directory:
+        temp_dir = tempfile.mkdtemp(prefix="daimao_bench_")
+        directory = temp_dir
+        print(f"生成 {args.count} 张 {args.size}x{args.size} 左右的测试图片: {directory}")
+        generate_images(directory, args.count, args.size)
+
+    try:
+        extensions = "jpg,jpeg,png,bmp,tiff"
+        image_files = sorted((os.path.join(directory, name) for name in os.listdir(directory)
+                              if os.path.splitext(name)[1].lower().lstrip(".") in extensions.split(",")),
+                             key=node.natural_sort_key)
+        if not image_files:
+            print(f"目录中没有图片: {directory}")
+            return 2
+
+        # 节点会打印每张图片的处理信息，计时时屏蔽输出
+        def run_node():
+            with open(os.devnull, "w") as devnull:
+                stdout = sys.stdout
+                sys.stdout = devnull
+                try:
+                    return node.load_images(directory, extensions, num_workers=args.workers)[0]
+                finally:
+                    sys.stdout = stdout
+
+        def run_node_uncached():
+            image_cache.clear()
+            return run_node()
+
+        legacy_seconds, legacy_output = best_time(lambda: legacy_load(node, image_files), args.runs)
+        node_seconds, node_output = best_time(run_node_uncached, args.runs)
+        run_node()
+        cached_seconds, _ = best_time(run_node, args.runs)
+
+        output_mb = node_output.numel() * node_output.element_size() / (1024 * 1024)
+        print(f"图片数: {len(image_files)}，输出: {tuple(node_output.shape)}，约 {output_mb:.1f} MB")
+        for label, seconds in (("逐张转换", legacy_seconds), ("批量加载节点", node_seconds), ("缓存命中", cached_seconds)):
+            print(f"  {label:<8} {seconds * 1000:9.1f} ms  {len(image_files) / seconds:8.1f} 张/秒  {output_mb / seconds:8.1f} MB/秒")
+        print(f"加速: {legacy_seconds / node_seconds:.2f}x（缓存命中 {legacy_seconds / cached_seconds:.2f}x）")
+        if tuple(legacy_output.shape) == tuple(node_output.shape):
+            print(f"最大差异: {float((legacy_output - node_output).abs().max()):.2e}")
+        return 0
+    finally:
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
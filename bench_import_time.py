@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+插件导入时间基准测试
+
+在新的Python进程中用 -X importtime 导入本插件，解析输出，统计插件各模块自身的导入耗时和最慢的模块，
+并检查torch、cv2、scipy等较重的库没有在导入时被加载（它们应当延迟到节点第一次执行时才导入）。
+
+用法（在ComfyUI使用的Python环境中运行）：
+    python bench_import_time.py --comfyui /path/to/ComfyUI
+    python bench_import_time.py --comfyui /path/to/ComfyUI --max-ms 300 --top 15
+
+检查不通过时返回非零退出码，可用于防止导入时间退化。
+"""
+
+import os
+import sys
+
+PLUGIN_DIR = os.path.dirname(os.path.abspath(__file__))
+# 插件内的math子包会遮蔽标准库math，直接运行本脚本时先把插件目录移出搜索路径
+sys.path = [path for path in sys.path if os.path.abspath(path or os.curdir) != PLUGIN_DIR]
+
+import argparse
+import subprocess
+
+PACKAGE_NAME = "daimao_tools_bench"
+
+# 导入插件时不应被加载的库
+HEAVY_MODULES = ["torch", "numpy", "PIL", "cv2", "scipy", "blind_watermark"]
+
+# 子进程中执行的导入代码：按文件位置导入插件包；屏蔽server模块，只测量节点本身，不启动Web服务
+IMPORT_CODE = """
+import sys, importlib.util
+sys.path.insert(0, {comfyui!r})
+sys.modules["server"] = None
+spec = importlib.util.spec_from_file_location({package!r}, {init!r}, submodule_search_locations=[{plugin!r}])
+module = importlib.util.module_from_spec(spec)
+sys.modules[{package!r}] = module
+spec.loader.exec_module(module)
+print("NODES", len(module.NODE_CLASS_MAPPINGS))
+print("LOADED", " ".join(sorted(name for name in {heavy!r} if name in sys.modules)))
+"""
+
+
+def parse_importtime(stderr):
+    """解析 -X importtime 的输出，返回 [(模块名, 自身耗时us, 累计耗时us), ...]"""
+    records = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            self_us = int(parts[0].strip())
+            cumulative_us = int(parts[1].strip())
+        except ValueError:
+            continue  # 表头行
+        records.append((parts[2].strip(), self_us, cumulative_us))
+    return records
+
+
+def run_benchmark(comfyui_path):
+    code = IMPORT_CODE.format(comfyui=comfyui_path, package=PACKAGE_NAME, plugin=PLUGIN_DIR,
+                              init=os.path.join(PLUGIN_DIR, "__init__.py"), heavy=HEAVY_MODULES)
+    return subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          capture_output=True, text=True, cwd=comfyui_path or os.path.dirname(PLUGIN_DIR))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="呆毛工具插件导入时间基准测试")
+    parser.add_argument("--comfyui", default="", help="ComfyUI根目录（需要其中的folder_paths）")
+    parser.add_argument("--max-ms", type=float, default=0, help="插件模块自身导入耗时上限（毫秒），0表示不检查")
+    parser.add_argument("--top", type=int, default=10, help="显示最慢的模块数量")
+    parser.add_argument("--runs", type=int, default=3, help="运行次数，取最小值")
+    args = parser.parse_args()
+
+    best_total = None
+    best_records = None
+    for _ in range(max(1, args.runs)):
+        proc = run_benchmark(args.comfyui)
+        if proc.returncode != 0:
+            print("导入插件失败：")
+            print("\n".join(line for line in proc.stderr.splitlines() if not line.startswith("import time:")))
+            return 2
+        records = parse_importtime(proc.stderr)
+        total = sum(self_us for name, self_us, _ in records if name.split(".")[0] == PACKAGE_NAME)
+        if best_total is None or total < best_total:
+            best_total = total
+            best_records = records
+            output = proc.stdout
+
+    nodes = next((line.split()[1] for line in output.splitlines() if line.startswith("NODES")), "?")
+    loaded = next((line.split()[1:] for line in output.splitlines() if line.startswith("LOADED")), [])
+    print(f"注册节点数: {nodes}")
+    print(f"插件模块自身导入耗时: {best_total / 1000:.1f} ms（{args.runs} 次中的最小值）")
+
+    print(f"\n最慢的 {args.top} 个模块（累计耗时）：")
+    for name, self_us, cumulative_us in sorted(best_records, key=lambda r: r[2], reverse=True)[:args.top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  (自身 {self_us / 1000:6.1f} ms)  {name}")
+
+    failed = False
+    if loaded:
+        print(f"\n❌ 导入插件时加载了较重的库: {', '.join(loaded)}")
+        failed = True
+    if args.max_ms and best_total / 1000 > args.max_ms:
+        print(f"\n❌ 导入耗时 {best_total / 1000:.1f} ms 超过上限 {args.max_ms} ms")
+        failed = True
+    if not failed:
+        print("\n✅ 检查通过")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
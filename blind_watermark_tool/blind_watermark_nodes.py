@@ -2,14 +2,21 @@
 import os
 import tempfile
 import uuid
-import numpy as np
-from PIL import Image, ImageFilter, ImageEnhance
-import cv2
-import torch
 import json
 import sys
 import unicodedata
 import re
+# 作为子包导入时延迟加载较重的库；测试脚本直接导入本文件时退回为普通导入
+try:
+    from ..daimao_lazy import lazy_import
+except ImportError:
+    from importlib import import_module as lazy_import
+np = lazy_import("numpy")
+Image = lazy_import("PIL.Image")
+ImageFilter = lazy_import("PIL.ImageFilter")
+ImageEnhance = lazy_import("PIL.ImageEnhance")
+cv2 = lazy_import("cv2")
+torch = lazy_import("torch")
 
 # 多进程问题的优雅解决方案
 def fix_multiprocessing_context():
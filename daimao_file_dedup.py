@@ -1,31 +1,14 @@
-from .daimao_file_finder import DaiMaoFileDuplicatesFinder
-import folder_paths
-import os
+from .daimao_file_finder import DaiMaoFileDuplicatesFinder, get_preset_dirs
 
 class DaiMaoFileDeduplication:
     """呆毛文件去重节点（向后兼容版），只提供查重功能"""
+    SEARCH_ALIASES = ["文件去重", "DaiMaoFileDedup", "FileDeduplication", "DedupFiles"]
+    
     @classmethod
     def INPUT_TYPES(cls):
-        # 获取ComfyUI的输入路径
-        input_dir = folder_paths.get_input_directory()
-        output_dir = folder_paths.get_output_directory()
-        temp_dir = folder_paths.get_temp_directory()
-        models_dir = folder_paths.get_folder_paths("checkpoints")[0] if folder_paths.get_folder_paths("checkpoints") else ""
-        
-        # 构建预设的目录列表
-        preset_dirs = []
-        for path in [input_dir, output_dir, temp_dir, models_dir]:
-            if path and os.path.exists(path) and path not in preset_dirs:
-                preset_dirs.append(path)
-                # 尝试向上一级目录
-                parent = os.path.dirname(path)
-                if parent and os.path.exists(parent) and parent not in preset_dirs:
-                    preset_dirs.append(parent)
+        # 与呆毛文件查重共用带缓存的预设目录列表
+        preset_dirs = get_preset_dirs()
         
-        # 确保列表不为空
-        if not preset_dirs:
-            preset_dirs = [""]
-            
         return {
             "required": {
                 "directory_path": ("STRING", {"default": preset_dirs[0], "multiline": False}),
@@ -1,8 +1,13 @@
 import os
 import json
+import shutil
+from .daimao_file_preverify import pre_verify_duplicate_data, directory_conflict
+from .daimao_scan_index import get_host_name
 
 class DaiMaoFileDeduplicator:
     """呆毛文件去重器节点，根据查重结果删除重复文件"""
+    SEARCH_ALIASES = ["DaiMaoDeduplicator", "FileDeduplicator", "RemoveDuplicates", "删除重复文件"]
+    
     @classmethod
     def INPUT_TYPES(cls):
         return {
@@ -11,6 +16,9 @@ class DaiMaoFileDeduplicator:
                 "keep_strategy": (["保留第一个文件", "保留最近修改的文件", "保留最大的文件", "保留路径最短的文件"], {"default": "保留第一个文件"}),
                 "dry_run": (["是", "否"], {"default": "是"}),
             },
+            "optional": {
+                "pre_verify": (["是", "否"], {"default": "是"}),
+            }
         }
 
     RETURN_TYPES = ("STRING",)
@@ -18,7 +26,50 @@ class DaiMaoFileDeduplicator:
     FUNCTION = "deduplicate_files"
     CATEGORY = "呆毛工具"
     
-    def deduplicate_files(self, duplicate_data, keep_strategy, dry_run):
+    def process_directory_groups(self, directory_groups, is_dry_run):
+        """处理重复目录组：保留每组第一个目录（与查重节点拆分文件组的规则一致），删除其余目录"""
+        result = ""
+        total_deleted = 0
+        total_freed_space = 0
+        
+        for group in directory_groups:
+            result += f"处理目录组 {group['group_id']} (Merkle: {group['hash'][:10]}...):\n"
+            dirs = [d["path"] if isinstance(d, dict) else d for d in group.get("directories", [])]
+            if len(dirs) < 2:
+                result += "  • 此组没有足够的目录信息\n\n"
+                continue
+            
+            keep_dir = dirs[0]
+            if not os.path.isdir(keep_dir):
+                result += f"  • 跳过: 保留的目录不存在: {keep_dir}\n\n"
+                continue
+            result += f"  • 保留目录: {keep_dir}\n"
+            dir_size = group.get("total_size_bytes", 0)
+            
+            for dir_path in dirs[1:]:
+                conflict = directory_conflict(keep_dir, dir_path) if os.path.isdir(dir_path) else None
+                if is_dry_run:
+                    result += f"  • 将删除目录: {dir_path} ({dir_size / (1024 * 1024):.2f} MB)\n"
+                    total_freed_space += dir_size
+                    total_deleted += 1
+                elif os.path.islink(dir_path) or not os.path.isdir(dir_path):
+                    result += f"  • 目录不存在或已是链接，跳过: {dir_path}\n"
+                elif conflict:
+                    result += f"  • 跳过: {dir_path} {conflict}\n"
+                else:
+                    try:
+                        shutil.rmtree(dir_path)
+                        result += f"  • 已删除目录: {dir_path} ({dir_size / (1024 * 1024):.2f} MB)\n"
+                        total_freed_space += dir_size
+                        total_deleted += 1
+                    except Exception as e:
+                        result += f"  • 删除目录失败: {dir_path} - 错误: {str(e)}\n"
+            
+            result += "\n"
+        
+        return result, total_deleted, total_freed_space
+    
+    def deduplicate_files(self, duplicate_data, keep_strategy, dry_run, pre_verify="是"):
         """根据查重结果和策略删除重复文件"""
         is_dry_run = dry_run == "是"
         
@@ -27,19 +78,50 @@ class DaiMaoFileDeduplicator:
         
         try:
             data = json.loads(duplicate_data)
-            if "groups" not in data or not data["groups"]:
+            if not data.get("groups") and not data.get("directory_groups"):
                 return ("没有找到重复文件组。",)
+            data.setdefault("groups", [])
         except json.JSONDecodeError:
             return ("重复文件数据格式错误，无法解析JSON。",)
         
+        # 报告可能是几小时前生成的，执行前确认文件没有变化，只对变化过的文件重新计算哈希
+        verify_report = ""
+        if pre_verify == "是":
+            data, verify_report = pre_verify_duplicate_data(data)
+        
         total_deleted = 0
         total_freed_space = 0
         result = f"文件去重{'模拟' if is_dry_run else ''}执行结果：\n\n"
+        result += verify_report
+        
+        # 先处理整个目录相同的组
+        total_deleted_dirs = 0
+        if data.get("directory_groups"):
+            dir_result, total_deleted_dirs, dir_freed_space = self.process_directory_groups(data["directory_groups"], is_dry_run)
+            result += dir_result
+            total_freed_space += dir_freed_space
         
         for group in data["groups"]:
             result += f"处理组 {group['group_id']} (SHA256: {group['hash'][:10]}...):\n"
             files = group.get("files", [])
             
+            # 相似图片组内容并不相同，永远不会自动处理
+            if group.get("near_duplicate"):
+                result += "  • 跳过: 此组为相似图片，内容并不完全相同，请人工挑选\n\n"
+                continue
+            
+            # 快速抽样得到的组只是"可能重复"，未经完整校验前拒绝处理
+            if not group.get("verified", True):
+                result += "  • 跳过: 此组来自快速抽样，尚未验证，请先使用\"呆毛文件查重验证\"节点确认\n\n"
+                continue
+            
+            # 合并索引得到的组可能包含其他主机上的文件，只处理本机文件
+            local_host = get_host_name()
+            remote_files = [f for f in files if isinstance(f, dict) and f.get("host", local_host) != local_host]
+            if remote_files:
+                files = [f for f in files if f not in remote_files]
+                result += f"  • 忽略其他主机上的 {len(remote_files)} 个文件\n"
+            
             if not files:
                 result += "  • 此组没有文件信息\n\n"
                 continue
@@ -129,6 +211,8 @@ class DaiMaoFileDeduplicator:
             result += "\n"
         
         # 总结
+        if total_deleted_dirs:
+            result += f"{'将' if is_dry_run else '已'}删除 {total_deleted_dirs} 个重复目录。\n"
         if is_dry_run:
             result += f"模拟删除完成，将删除 {len(data['groups'])} 组中的 {total_deleted} 个文件，"
             result += f"预计释放空间: {total_freed_space / (1024 * 1024):.2f} MB ({total_freed_space / (1024 * 1024 * 1024):.2f} GB)\n"
@@ -3,18 +3,26 @@ import json
 import platform
 import shutil
 from pathlib import Path
+from .daimao_file_preverify import pre_verify_duplicate_data, directory_conflict
+from .daimao_scan_index import get_host_name
 
 class DaiMaoFileDeduplicatorWithSymlink:
     """呆毛文件去重器节点（带符号链接），根据查重结果删除重复文件并创建符号链接"""
+    SEARCH_ALIASES = ["DaiMaoDeduplicatorWithSymlink", "FileDeduplicatorWithSymlink", "RemoveDuplicatesWithSymlink", "删除重复文件(带符号链接)"]
+    
     @classmethod
     def INPUT_TYPES(cls):
         return {
             "required": {
                 "duplicate_data": ("STRING", {"default": "", "multiline": True, "input_optional": True}),
                 "keep_strategy": (["保留第一个文件", "保留最近修改的文件", "保留最大的文件", "保留路径最短的文件"], {"default": "保留第一个文件"}),
-                "link_type": (["软链接", "硬链接"], {"default": "软链接"}),
+                "link_type": (["软链接", "硬链接", "自动"], {"default": "软链接"}),
                 "dry_run": (["是", "否"], {"default": "是"}),
             },
+            "optional": {
+                "pre_verify": (["是", "否"], {"default": "是"}),
+                "relative_symlink": (["否", "是"], {"default": "否"}),
+            }
         }
 
     RETURN_TYPES = ("STRING",)
@@ -22,23 +30,32 @@ class DaiMaoFileDeduplicatorWithSymlink:
     FUNCTION = "deduplicate_files_with_symlink"
     CATEGORY = "呆毛工具"
     
-    def check_windows_permission(self):
-        """检查Windows系统下的权限"""
-        if platform.system() == "Windows":
-            try:
-                # 尝试创建一个测试符号链接
-                test_target = os.path.abspath(__file__)
-                test_link = test_target + ".test"
-                try:
-                    os.symlink(test_target, test_link)
-                    os.remove(test_link)
-                except OSError as e:
-                    if e.winerror == 1314:  # 需要管理员权限
-                        return False, "需要管理员权限才能创建符号链接。请以管理员身份运行ComfyUI。"
-                    raise
-            except Exception as e:
-                return False, f"权限检查失败: {str(e)}"
-        return True, None
+    def __init__(self):
+        # Windows下第一次因缺少权限创建软链接失败后记录下来，之后的软链接直接跳过，不再逐个尝试
+        self.symlink_permission_error = None
+    
+    def resolve_link_type(self, keep_path, link_path, link_type):
+        """自动模式下按设备号选择链接方式：与保留文件在同一文件系统用硬链接，跨文件系统用软链接"""
+        if link_type != "自动":
+            return link_type
+        try:
+            keep_dev = os.stat(keep_path).st_dev
+            link_dev = os.stat(os.path.dirname(os.path.abspath(link_path))).st_dev
+        except OSError:
+            return "软链接"
+        return "硬链接" if keep_dev == link_dev else "软链接"
+    
+    def link_with_fallback(self, keep_path, link_path, link_type, relative=False):
+        """按选定方式创建链接；自动模式下硬链接失败（如FAT32、链接数上限）时改用软链接
+        
+        返回 (是否成功, 信息, 实际使用的链接方式)。
+        """
+        actual_type = self.resolve_link_type(keep_path, link_path, link_type)
+        success, message = self.create_link(keep_path, link_path, actual_type, relative)
+        if not success and link_type == "自动" and actual_type == "硬链接":
+            actual_type = "软链接"
+            success, message = self.create_link(keep_path, link_path, actual_type, relative)
+        return success, message, actual_type
     
     def is_file_linked(self, file_path, target_path=None):
         """检查文件是否已经是链接"""
@@ -51,8 +68,16 @@ class DaiMaoFileDeduplicatorWithSymlink:
         except Exception:
             return False, None
     
-    def create_link(self, target_path, link_path, link_type):
-        """创建链接（软链接或硬链接），考虑不同操作系统的差异"""
+    def create_link(self, target_path, link_path, link_type, relative=False):
+        """创建链接（软链接或硬链接），考虑不同操作系统的差异；relative为True时软链接使用相对路径"""
+        if link_type == "软链接" and self.symlink_permission_error:
+            return False, self.symlink_permission_error
+        
+        # 相对软链接的内容：从链接所在目录到目标的相对路径，整体移动目录树后链接仍然有效
+        symlink_target = target_path
+        if relative:
+            symlink_target = os.path.relpath(os.path.abspath(target_path), os.path.dirname(os.path.abspath(link_path)))
+        
         try:
             # 确保目标路径存在
             if not os.path.exists(target_path):
@@ -100,14 +125,14 @@ class DaiMaoFileDeduplicatorWithSymlink:
                 try:
                     if link_type == "软链接":
                         # 尝试创建符号链接
-                        os.symlink(target_path, link_path)
+                        os.symlink(symlink_target, link_path)
                         
                         # 验证符号链接是否创建成功
                         if not os.path.islink(link_path):
                             return False, f"符号链接创建失败: {link_path}"
                         
                         # 验证符号链接是否指向正确的目标
-                        if os.path.realpath(link_path) != target_path:
+                        if os.path.realpath(link_path) != os.path.realpath(target_path):
                             return False, f"符号链接指向错误的目标: {link_path} -> {os.path.realpath(link_path)}"
                     else:
                         # 创建硬链接
@@ -118,13 +143,16 @@ class DaiMaoFileDeduplicatorWithSymlink:
                             return False, f"硬链接创建失败: {link_path}"
                     
                 except OSError as e:
-                    if e.winerror == 1314:  # 需要管理员权限
+                    if getattr(e, "winerror", None) == 1314:  # 需要管理员权限
+                        if link_type == "软链接":
+                            self.symlink_permission_error = "需要管理员权限才能创建符号链接。请以管理员身份运行ComfyUI，或改用硬链接。"
+                            return False, self.symlink_permission_error
                         return False, f"创建链接需要管理员权限: {link_path}"
                     return False, f"创建链接失败: {str(e)}"
             else:
                 # Linux/Unix系统
                 if link_type == "软链接":
-                    os.symlink(target_path, link_path)
+                    os.symlink(symlink_target, link_path)
                 else:
                     os.link(target_path, link_path)
             
@@ -132,38 +160,150 @@ class DaiMaoFileDeduplicatorWithSymlink:
         except Exception as e:
             return False, f"创建{link_type}失败: {str(e)}"
     
-    def deduplicate_files_with_symlink(self, duplicate_data, keep_strategy, link_type, dry_run):
+    def link_directory(self, keep_dir, dir_path, link_type, relative=False):
+        """把重复目录替换为链接：软链接直接链接整个目录；目录不能硬链接，硬链接时逐个文件替换"""
+        if link_type == "软链接":
+            if self.symlink_permission_error:
+                return False, self.symlink_permission_error, 0
+            temp_path = dir_path.rstrip("/\\") + ".temp"
+            target = os.path.abspath(keep_dir)
+            if relative:
+                target = os.path.relpath(target, os.path.dirname(os.path.abspath(dir_path.rstrip("/\\"))))
+            os.rename(dir_path, temp_path)
+            try:
+                os.symlink(target, dir_path, target_is_directory=True)
+            except OSError as e:
+                os.rename(temp_path, dir_path)
+                if getattr(e, "winerror", None) == 1314:  # 需要管理员权限
+                    self.symlink_permission_error = "需要管理员权限才能创建符号链接。请以管理员身份运行ComfyUI，或改用硬链接。"
+                    return False, self.symlink_permission_error, 0
+                return False, f"创建目录软链接失败: {dir_path} - 错误: {str(e)}", 0
+            shutil.rmtree(temp_path)
+            return True, f"成功创建目录软链接: {dir_path} -> {keep_dir}", 1
+        
+        linked = 0
+        for root, _, files in os.walk(dir_path):
+            for name in files:
+                file_path = os.path.join(root, name)
+                target_path = os.path.join(keep_dir, os.path.relpath(file_path, dir_path))
+                if self.is_file_linked(file_path, target_path)[0]:
+                    continue
+                temp_path = file_path + ".temp"
+                success, message = self.create_link(target_path, temp_path, link_type)
+                if not success:
+                    return False, message, linked
+                os.replace(temp_path, file_path)
+                linked += 1
+        return True, f"成功为目录中的 {linked} 个文件创建{link_type}: {dir_path} -> {keep_dir}", linked
+    
+    def process_directory_groups(self, directory_groups, link_type, is_dry_run, relative=False):
+        """处理重复目录组：保留每组第一个目录（与查重节点拆分文件组的规则一致），其余目录替换为链接"""
+        result = ""
+        total_dirs = 0
+        total_links = 0
+        total_freed_space = 0
+        
+        for group in directory_groups:
+            result += f"处理目录组 {group['group_id']} (Merkle: {group['hash'][:10]}...):\n"
+            dirs = [d["path"] if isinstance(d, dict) else d for d in group.get("directories", [])]
+            if len(dirs) < 2:
+                result += "  • 此组没有足够的目录信息\n\n"
+                continue
+            
+            keep_dir = dirs[0]
+            if not os.path.isdir(keep_dir):
+                result += f"  • 跳过: 保留的目录不存在: {keep_dir}\n\n"
+                continue
+            result += f"  • 保留目录: {keep_dir}\n"
+            dir_size = group.get("total_size_bytes", 0)
+            
+            for dir_path in dirs[1:]:
+                dir_link_type = self.resolve_link_type(keep_dir, dir_path.rstrip("/\\"), link_type)
+                conflict = directory_conflict(keep_dir, dir_path) if os.path.isdir(dir_path) else None
+                if os.path.islink(dir_path) or not os.path.isdir(dir_path):
+                    result += f"  • 跳过: {dir_path} 不存在或已经是链接\n"
+                elif conflict:
+                    result += f"  • 跳过: {dir_path} {conflict}\n"
+                elif is_dry_run:
+                    result += f"  • 将把目录替换为{dir_link_type}: {dir_path} -> {keep_dir} ({dir_size / (1024 * 1024):.2f} MB)\n"
+                    total_freed_space += dir_size
+                    total_dirs += 1
+                else:
+                    try:
+                        success, message, links = self.link_directory(keep_dir, dir_path, dir_link_type, relative)
+                    except Exception as e:
+                        success, message, links = False, f"处理目录失败: {dir_path} - 错误: {str(e)}", 0
+                    total_links += links
+                    result += f"  • {message}\n"
+                    if success:
+                        total_freed_space += dir_size
+                        total_dirs += 1
+            
+            result += "\n"
+        
+        return result, total_dirs, total_links, total_freed_space
+    
+    def deduplicate_files_with_symlink(self, duplicate_data, keep_strategy, link_type, dry_run, relative_symlink="否", pre_verify="是"):
         """根据查重结果和策略删除重复文件并创建链接"""
         is_dry_run = dry_run == "是"
+        relative = relative_symlink == "是"
         
         if duplicate_data == "{}" or not duplicate_data:
             return ("没有重复文件数据，请先使用呆毛文件查重节点查找重复文件。",)
         
         try:
             data = json.loads(duplicate_data)
-            if "groups" not in data or not data["groups"]:
+            if not data.get("groups") and not data.get("directory_groups"):
                 return ("没有找到重复文件组。",)
+            data.setdefault("groups", [])
         except json.JSONDecodeError:
             return ("重复文件数据格式错误，无法解析JSON。",)
         
-        # 检查Windows权限
-        if not is_dry_run:
-            success, error = self.check_windows_permission()
-            if not success:
-                return (error,)
+        # 报告可能是几小时前生成的，执行前确认文件没有变化，只对变化过的文件重新计算哈希
+        verify_report = ""
+        if pre_verify == "是":
+            data, verify_report = pre_verify_duplicate_data(data)
         
         total_deleted = 0
         total_freed_space = 0
         total_links = 0
+        # 各链接方式实际创建（或将创建）的数量
+        link_counts = {"软链接": 0, "硬链接": 0}
         result = f"文件去重{'模拟' if is_dry_run else ''}执行结果：\n\n"
+        result += verify_report
         
         # 用于跟踪已处理过的文件路径
         processed_paths = set()
         
+        # 先处理整个目录相同的组
+        total_dirs = 0
+        if data.get("directory_groups"):
+            dir_result, total_dirs, dir_links, dir_freed_space = self.process_directory_groups(data["directory_groups"], link_type, is_dry_run, relative)
+            result += dir_result
+            total_links += dir_links
+            total_freed_space += dir_freed_space
+        
         for group in data["groups"]:
             result += f"处理组 {group['group_id']} (SHA256: {group['hash'][:10]}...):\n"
             files = group.get("files", [])
             
+            # 相似图片组内容并不相同，永远不会自动处理
+            if group.get("near_duplicate"):
+                result += "  • 跳过: 此组为相似图片，内容并不完全相同，请人工挑选\n\n"
+                continue
+            
+            # 快速抽样得到的组只是"可能重复"，未经完整校验前拒绝处理
+            if not group.get("verified", True):
+                result += "  • 跳过: 此组来自快速抽样，尚未验证，请先使用\"呆毛文件查重验证\"节点确认\n\n"
+                continue
+            
+            # 合并索引得到的组可能包含其他主机上的文件，只处理本机文件
+            local_host = get_host_name()
+            remote_files = [f for f in files if isinstance(f, dict) and f.get("host", local_host) != local_host]
+            if remote_files:
+                files = [f for f in files if f not in remote_files]
+                result += f"  • 忽略其他主机上的 {len(remote_files)} 个文件\n"
+            
             if not files:
                 result += "  • 此组没有文件信息\n\n"
                 continue
@@ -213,6 +353,9 @@ class DaiMaoFileDeduplicatorWithSymlink:
             else:
                 result += f"  • 保留: {keep_file}\n"
             
+            # 自动模式下本组每个文件选用的链接方式
+            group_choices = {"软链接": 0, "硬链接": 0}
+            
             # 删除或模拟删除文件，并创建链接
             for file_info in files_to_delete:
                 file_path = file_info["path"] if isinstance(file_info, dict) else file_info
@@ -232,14 +375,16 @@ class DaiMaoFileDeduplicatorWithSymlink:
                 file_size_bytes = file_info.get("size_bytes", 0) if isinstance(file_info, dict) else 0
                 
                 if is_dry_run:
+                    file_link_type = self.resolve_link_type(keep_file, file_path, link_type)
                     result += f"  • 将删除: {file_path}"
                     if file_size:
                         result += f" ({file_size:.2f} MB)"
                     result += "\n"
-                    result += f"  • 将创建{link_type}: {file_path} -> {keep_file}\n"
+                    result += f"  • 将创建{file_link_type}: {file_path} -> {keep_file}\n"
                     total_freed_space += file_size_bytes
                     total_deleted += 1
                     total_links += 1
+                    group_choices[file_link_type] += 1
                 else:
                     try:
                         if os.path.exists(file_path):
@@ -256,10 +401,11 @@ class DaiMaoFileDeduplicatorWithSymlink:
                             temp_path = file_path + ".temp"
                             
                             # 先创建链接到临时路径
-                            success, message = self.create_link(keep_file, temp_path, link_type)
+                            success, message, file_link_type = self.link_with_fallback(keep_file, temp_path, link_type, relative)
                             if success:
-                                result += f"  • 已创建{link_type}: {message}\n"
+                                result += f"  • 已创建{file_link_type}: {message}\n"
                                 total_links += 1
+                                group_choices[file_link_type] += 1
                                 
                                 # 删除原文件
                                 try:
@@ -273,7 +419,7 @@ class DaiMaoFileDeduplicatorWithSymlink:
                                     
                                     # 重命名临时文件为原文件名
                                     os.rename(temp_path, file_path)
-                                    result += f"  • 已重命名{link_type}: {temp_path} -> {file_path}\n"
+                                    result += f"  • 已重命名{file_link_type}: {temp_path} -> {file_path}\n"
                                     
                                     # 将处理过的路径添加到集合中
                                     processed_paths.add(file_path)
@@ -286,23 +432,30 @@ class DaiMaoFileDeduplicatorWithSymlink:
                                         except:
                                             pass
                             else:
-                                result += f"  • 创建{link_type}失败: {message}\n"
+                                result += f"  • 创建{file_link_type}失败: {message}\n"
                         else:
                             result += f"  • 文件不存在，无法处理: {file_path}\n"
                     except Exception as e:
                         result += f"  • 处理失败: {file_path} - 错误: {str(e)}\n"
             
+            if link_type == "自动" and any(group_choices.values()):
+                result += f"  • 自动选择: 硬链接 {group_choices['硬链接']} 个（同一文件系统），软链接 {group_choices['软链接']} 个（跨文件系统）\n"
+            for name, count in group_choices.items():
+                link_counts[name] += count
             result += "\n"
         
         # 总结
+        link_summary = link_type if link_type != "自动" else f"链接（硬链接 {link_counts['硬链接']} 个，软链接 {link_counts['软链接']} 个）"
+        if total_dirs:
+            result += f"{'将' if is_dry_run else '已'}把 {total_dirs} 个重复目录替换为{'链接' if link_type == '自动' else link_type}。\n"
         if is_dry_run:
             result += f"模拟处理完成，将处理 {len(data['groups'])} 组中的 {total_deleted} 个文件，"
             result += f"预计释放空间: {total_freed_space / (1024 * 1024):.2f} MB ({total_freed_space / (1024 * 1024 * 1024):.2f} GB)\n"
-            result += f"将创建 {total_links} 个{link_type}\n"
+            result += f"将创建 {total_links} 个{link_summary}\n"
             result += "注意：这只是模拟结果，没有实际执行。要执行实际处理，请将'dry_run'设置为'否'。"
         else:
             result += f"处理完成，共处理 {len(data['groups'])} 组中的 {total_deleted} 个文件，"
             result += f"释放空间: {total_freed_space / (1024 * 1024):.2f} MB ({total_freed_space / (1024 * 1024 * 1024):.2f} GB)\n"
-            result += f"创建了 {total_links} 个{link_type}"
+            result += f"创建了 {total_links} 个{link_summary}"
         
         return (result,) 
\ No newline at end of file
@@ -0,0 +1,160 @@
+import os
+import re
+import json
+import time
+
+# 每个报告名称保存一份上次的查重结果快照（插件目录下，不随仓库提交）
+DEFAULT_REPORTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scan_reports")
+
+
+class DaiMaoDuplicatesDeltaReport:
+    """呆毛查重变化报告节点，与同名的上一次查重结果比较，只输出新增、已解决和变大的重复组"""
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "duplicate_data": ("STRING", {"default": "", "multiline": True, "input_optional": True}),
+                "report_name": ("STRING", {"default": "default", "multiline": False}),
+                "save_snapshot": (["是", "否"], {"default": "是"}),
+            },
+        }
+
+    RETURN_TYPES = ("STRING", "STRING")
+    RETURN_NAMES = ("变化信息", "变化JSON数据")
+    FUNCTION = "build_delta_report"
+    CATEGORY = "呆毛工具"
+
+    def __init__(self, reports_dir=DEFAULT_REPORTS_DIR):
+        self.reports_dir = reports_dir
+
+    def snapshot_path(self, report_name):
+        safe_name = re.sub(r"[^\w\-]", "_", report_name.strip()) or "default"
+        return os.path.join(self.reports_dir, f"{safe_name}.json")
+
+    def build_snapshot(self, data):
+        """把查重JSON压缩为 {组键: {"files": [...], "wasted_space_bytes": ...}}，组键包含哈希类型"""
+        groups = {}
+        for group in data.get("groups", []):
+            files = []
+            for f in group.get("files", []):
+                path = f["path"] if isinstance(f, dict) else f
+                host = f.get("host") if isinstance(f, dict) else None
+                files.append(f"[{host}] {path}" if host else path)
+            key = f"{group.get('hash_type', 'sha256')}:{group.get('hash', '')}"
+            groups[key] = {"files": sorted(files), "wasted_space_bytes": group.get("wasted_space_bytes", 0)}
+        for group in data.get("directory_groups", []):
+            key = f"{group.get('hash_type', 'merkle_sha256')}:{group.get('hash', '')}"
+            groups[key] = {"files": sorted(d["path"] for d in group.get("directories", [])),
+                           "wasted_space_bytes": group.get("wasted_space_bytes", 0)}
+        return {"created_at": time.time(), "groups": groups}
+
+    def load_snapshot(self, path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+            if isinstance(snapshot, dict) and isinstance(snapshot.get("groups"), dict):
+                return snapshot
+        except (OSError, json.JSONDecodeError):
+            pass
+        return None
+
+    def save_snapshot(self, path, snapshot):
+        """原子地写入快照"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = path + ".temp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+    def compare(self, previous, current):
+        """按组键比较两次快照，组内文件增加的记为变大的组"""
+        new_groups, resolved_groups, grown_groups = [], [], []
+        for key, group in current.items():
+            old_group = previous.get(key)
+            if old_group is None:
+                new_groups.append({"key": key, "file_count": len(group["files"]),
+                                   "wasted_space_bytes": group["wasted_space_bytes"], "files": group["files"]})
+                continue
+            added = sorted(set(group["files"]) - set(old_group["files"]))
+            if added:
+                grown_groups.append({"key": key, "previous_count": len(old_group["files"]),
+                                     "file_count": len(group["files"]),
+                                     "wasted_space_bytes": group["wasted_space_bytes"], "added_files": added})
+        for key, old_group in previous.items():
+            if key not in current:
+                resolved_groups.append({"key": key, "file_count": len(old_group["files"]),
+                                        "wasted_space_bytes": old_group["wasted_space_bytes"]})
+        return new_groups, resolved_groups, grown_groups
+
+    def build_delta_report(self, duplicate_data, report_name, save_snapshot):
+        """只比较查重JSON，不重新读取任何文件"""
+        try:
+            data = json.loads(duplicate_data) if duplicate_data else {}
+        except json.JSONDecodeError:
+            return ("重复文件数据格式错误，无法解析JSON。", "{}")
+        if not isinstance(data, dict):
+            return ("重复文件数据格式错误，无法解析JSON。", "{}")
+        # 查重成功时即使没有重复也带有groups和summary；查重失败或被取消时输出"{}"，
+        # 不能当作一次没有重复的扫描，否则会把上次的所有重复都报告为已解决并覆盖快照
+        if "groups" not in data and "summary" not in data:
+            return ("没有有效的查重结果（查重可能失败或被取消），未进行比较，也未保存快照。", "{}")
+
+        path = self.snapshot_path(report_name)
+        current = self.build_snapshot(data)
+        previous = self.load_snapshot(path)
+        if save_snapshot == "是":
+            self.save_snapshot(path, current)
+
+        if previous is None:
+            summary = {"report_name": report_name, "first_report": True, "total_groups": len(current["groups"])}
+            return (f"报告 '{report_name}' 没有上一次的快照，已记录本次的 {len(current['groups'])} 组重复作为基准。",
+                    json.dumps({"summary": summary}))
+
+        new_groups, resolved_groups, grown_groups = self.compare(previous["groups"], current["groups"])
+        previous_wasted = sum(g["wasted_space_bytes"] for g in previous["groups"].values())
+        current_wasted = sum(g["wasted_space_bytes"] for g in current["groups"].values())
+        since = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(previous.get("created_at", 0)))
+
+        result = f"报告 '{report_name}' 与 {since} 的结果相比：\n"
+        result += f"新增 {len(new_groups)} 组，已解决 {len(resolved_groups)} 组，变大 {len(grown_groups)} 组，"
+        result += f"浪费空间变化 {(current_wasted - previous_wasted) / (1024 * 1024):+.2f} MB\n"
+        if previous["groups"] and not current["groups"]:
+            result += "全部已解决：本次没有找到任何重复。\n"
+        for group in new_groups:
+            result += f"\n新增 {group['key'][:30]}...: {group['file_count']} 个文件\n"
+            for file_path in group["files"]:
+                result += f"  • {file_path}\n"
+        for group in grown_groups:
+            result += f"\n变大 {group['key'][:30]}...: {group['previous_count']} → {group['file_count']} 个文件\n"
+            for file_path in group["added_files"]:
+                result += f"  + {file_path}\n"
+        for group in resolved_groups:
+            result += f"\n已解决 {group['key'][:30]}...: 原有 {group['file_count']} 个文件\n"
+
+        json_data = {
+            "new_groups": new_groups,
+            "resolved_groups": resolved_groups,
+            "grown_groups": grown_groups,
+            "summary": {
+                "report_name": report_name,
+                "first_report": False,
+                "previous_created_at": previous.get("created_at"),
+                "new_groups": len(new_groups),
+                "resolved_groups": len(resolved_groups),
+                "grown_groups": len(grown_groups),
+                "total_groups": len(current["groups"]),
+                "wasted_space_delta_bytes": current_wasted - previous_wasted,
+            }
+        }
+        return (result, json.dumps(json_data))
+
+
+# 节点映射
+NODE_CLASS_MAPPINGS = {
+    "呆毛查重变化报告": DaiMaoDuplicatesDeltaReport
+}
+
+# 显示名称映射
+NODE_DISPLAY_NAME_MAPPINGS = {
+    "呆毛查重变化报告": "呆毛查重变化报告"
+}
@@ -1,20 +1,39 @@
 import os
 import hashlib
-import glob
 import time
 import json
+import fnmatch
+import threading
+from datetime import datetime
 from collections import defaultdict
 import folder_paths
+from .daimao_hash_index import get_hash_index, AUTOV2_LENGTH
+from .daimao_scan_jobs import get_scan_job_manager
+from .daimao_scan_index import export_scan_index, in_shard, get_host_name
 
-class DaiMaoFileDuplicatesFinder:
-    """呆毛文件查重节点，查找重复文件并输出信息"""
-    @classmethod
-    def INPUT_TYPES(cls):
+class ScanCancelledError(Exception):
+    """后台扫描任务被取消"""
+
+
+# 预设目录列表的缓存时间（秒）：界面加载时每个节点都会调用INPUT_TYPES，不必每次都重新探测文件系统
+PRESET_DIRS_TTL = 30.0
+_PRESET_DIRS_CACHE = {"dirs": None, "expires": 0.0}
+_PRESET_DIRS_LOCK = threading.Lock()
+
+
+def get_preset_dirs():
+    """获取ComfyUI的输入、输出、临时、模型目录及其上一级目录，结果在PRESET_DIRS_TTL内复用"""
+    with _PRESET_DIRS_LOCK:
+        now = time.monotonic()
+        if _PRESET_DIRS_CACHE["dirs"] is not None and now < _PRESET_DIRS_CACHE["expires"]:
+            return list(_PRESET_DIRS_CACHE["dirs"])
+        
         # 获取ComfyUI的输入路径
         input_dir = folder_paths.get_input_directory()
         output_dir = folder_paths.get_output_directory()
         temp_dir = folder_paths.get_temp_directory()
-        models_dir = folder_paths.get_folder_paths("checkpoints")[0] if folder_paths.get_folder_paths("checkpoints") else ""
+        checkpoint_dirs = folder_paths.get_folder_paths("checkpoints")
+        models_dir = checkpoint_dirs[0] if checkpoint_dirs else ""
         
         # 构建预设的目录列表
         preset_dirs = []
@@ -30,6 +49,93 @@ class DaiMaoFileDuplicatesFinder:
         if not preset_dirs:
             preset_dirs = [""]
         
+        _PRESET_DIRS_CACHE["dirs"] = preset_dirs
+        _PRESET_DIRS_CACHE["expires"] = now + PRESET_DIRS_TTL
+        return list(preset_dirs)
+
+
+# 默认不进入的目录
+DEFAULT_EXCLUDE_DIRS = ".git,__pycache__,temp"
+
+
+def split_patterns(text):
+    """把逗号或换行分隔的通配符列表拆分为列表"""
+    return [item.strip() for item in text.replace("\n", ",").split(",") if item.strip()] if text else []
+
+
+def parse_time(text):
+    """解析 "2024-01-31" 或 "2024-01-31 12:00[:00]" 格式的本地时间，返回时间戳；为空时返回None"""
+    text = (text or "").strip()
+    if not text:
+        return None
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(text, fmt).timestamp()
+        except ValueError:
+            continue
+    raise ValueError(f"无法识别的时间格式 '{text}'，请使用 YYYY-MM-DD 或 YYYY-MM-DD HH:MM")
+
+
+class DaiMaoScanFilter:
+    """遍历目录时使用的过滤条件，不满足条件的目录不会进入，不满足条件的文件不会被列出"""
+
+    def __init__(self, include_patterns="", exclude_patterns="", exclude_dirs=DEFAULT_EXCLUDE_DIRS,
+                 min_size_mb=0.0, max_size_mb=0.0, modified_after="", modified_before=""):
+        self.include_patterns = split_patterns(include_patterns)
+        self.exclude_patterns = split_patterns(exclude_patterns)
+        self.exclude_dirs = split_patterns(exclude_dirs)
+        self.min_size = int(min_size_mb * 1024 * 1024) if min_size_mb else 0
+        self.max_size = int(max_size_mb * 1024 * 1024) if max_size_mb else 0
+        self.modified_after = parse_time(modified_after)
+        self.modified_before = parse_time(modified_before)
+
+    def describe(self):
+        """过滤条件的简短说明，用于日志"""
+        parts = []
+        if self.include_patterns:
+            parts.append(f"包含 {self.include_patterns}")
+        if self.exclude_patterns:
+            parts.append(f"排除 {self.exclude_patterns}")
+        if self.exclude_dirs:
+            parts.append(f"跳过目录 {self.exclude_dirs}")
+        if self.min_size or self.max_size:
+            parts.append(f"大小 {self.min_size / (1024 * 1024):.1f}~{self.max_size / (1024 * 1024) if self.max_size else '∞'} MB")
+        if self.modified_after is not None or self.modified_before is not None:
+            parts.append("按修改时间过滤")
+        return "，".join(parts)
+
+    @staticmethod
+    def _match(name, relpath, patterns):
+        # 含路径分隔符的模式匹配相对路径，否则只匹配文件名
+        return any(fnmatch.fnmatch(relpath if "/" in pattern else name, pattern) for pattern in patterns)
+
+    def accept_dir(self, name):
+        return not any(fnmatch.fnmatch(name, pattern) for pattern in self.exclude_dirs)
+
+    def accept_name(self, name, relpath):
+        if self.include_patterns and not self._match(name, relpath, self.include_patterns):
+            return False
+        return not self._match(name, relpath, self.exclude_patterns)
+
+    def accept_stat(self, stat):
+        if stat.st_size < self.min_size or (self.max_size and stat.st_size > self.max_size):
+            return False
+        if self.modified_after is not None and stat.st_mtime < self.modified_after:
+            return False
+        if self.modified_before is not None and stat.st_mtime >= self.modified_before:
+            return False
+        return True
+
+
+class DaiMaoFileDuplicatesFinder:
+    """呆毛文件查重节点，查找重复文件并输出信息"""
+    # 节点搜索时可用的别名（旧版工作流中的同名节点键也由此注册）
+    SEARCH_ALIASES = ["文件查重", "DaiMaoFileFinder", "FileDuplicatesFinder", "FindDuplicates", "查找重复文件"]
+    
+    @classmethod
+    def INPUT_TYPES(cls):
+        preset_dirs = get_preset_dirs()
+        
         return {
             "required": {
                 "directory_path": ("STRING", {"default": preset_dirs[0], "multiline": False}),
@@ -37,71 +143,262 @@ class DaiMaoFileDuplicatesFinder:
                 "dedup_type": (["模型文件", "大文件", "全部文件"], {"default": "模型文件"}),
                 "size_threshold_mb": ("FLOAT", {"default": 100.0, "min": 0.1, "max": 10000.0, "step": 0.1}),
                 "use_preset_dir": (["是", "否"], {"default": "否"}),
+            },
+            "optional": {
+                "scan_mode": (["完整校验", "快速抽样", "相似图片"], {"default": "完整校验"}),
+                "sample_blocks": ("INT", {"default": 8, "min": 1, "max": 64, "step": 1}),
+                "use_hash_cache": (["是", "否"], {"default": "是"}),
+                "sidecar_mode": (["读取", "读取并写入", "不使用"], {"default": "读取"}),
+                "job_id": ("STRING", {"default": "", "multiline": False}),
+                "export_index_path": ("STRING", {"default": "", "multiline": False}),
+                "shard_index": ("INT", {"default": 0, "min": 0, "max": 1023, "step": 1}),
+                "shard_count": ("INT", {"default": 1, "min": 1, "max": 1024, "step": 1}),
+                "detect_duplicate_dirs": (["否", "是"], {"default": "否"}),
+                "image_hash": (["pHash", "dHash"], {"default": "pHash"}),
+                "hamming_threshold": ("INT", {"default": 6, "min": 0, "max": 32, "step": 1}),
+                "include_patterns": ("STRING", {"default": "", "multiline": False}),
+                "exclude_patterns": ("STRING", {"default": "", "multiline": False}),
+                "exclude_dirs": ("STRING", {"default": DEFAULT_EXCLUDE_DIRS, "multiline": False}),
+                "min_size_mb": ("FLOAT", {"default": 0.0, "min": 0.0, "max": 1000000.0, "step": 0.1}),
+                "max_size_mb": ("FLOAT", {"default": 0.0, "min": 0.0, "max": 1000000.0, "step": 0.1}),
+                "modified_after": ("STRING", {"default": "", "multiline": False}),
+                "modified_before": ("STRING", {"default": "", "multiline": False}),
             }
         }
 
+    SAMPLE_BLOCK_SIZE = 64 * 1024  # 快速抽样模式下每个采样块的大小
+    SIDECAR_EXTENSION = ".sha256"  # 校验文件扩展名，与常见模型下载器一致
+    DIGEST_ALGORITHMS = ("sha256", "blake2b")  # 一次读取同时计算的哈希算法
+    READ_CHUNK_SIZE = 1024 * 1024  # 计算哈希时每次读取的字节数
+
     RETURN_TYPES = ("STRING", "STRING")
     RETURN_NAMES = ("重复文件信息", "重复文件JSON数据")
     FUNCTION = "find_duplicate_files"
     CATEGORY = "呆毛工具"
     
+    # 后台任务使用：进度回调 (已处理数, 总数) 和取消标志
+    progress_callback = None
+    cancel_event = None
+    
     @classmethod
-    def IS_CHANGED(cls, browse_directory, **kwargs):
-        """检测浏览按钮状态变化，用于触发文件夹选择器"""
+    def IS_CHANGED(cls, browse_directory=None, job_id="", **kwargs):
+        """检测浏览按钮状态变化，用于触发文件夹选择器；关联后台任务时随任务状态变化"""
+        if job_id and job_id.strip():
+            job = get_scan_job_manager().get(job_id.strip())
+            return job.status if job else "missing"
         if browse_directory:
             return float("NaN")  # 返回非数字值，确保在点击按钮时Always更新
         return 0
 
-    def get_model_files(self, directory):
-        """获取目录下的模型文件"""
-        model_extensions = [".ckpt", ".safetensors", ".pt", ".pth", ".bin"]
-        model_files = []
-        
-        for ext in model_extensions:
-            pattern = os.path.join(directory, f"**/*{ext}")
-            model_files.extend(glob.glob(pattern, recursive=True))
-            
-        return model_files
+    MODEL_EXTENSIONS = (".ckpt", ".safetensors", ".pt", ".pth", ".bin")
     
-    def get_large_files(self, directory, threshold_mb):
-        """获取目录下大于指定阈值的文件"""
-        threshold_bytes = threshold_mb * 1024 * 1024
-        large_files = []
+    def walk_files(self, directory, scan_filter=None, extensions=None, min_bytes=0):
+        """用os.scandir遍历目录，在遍历过程中应用过滤条件
         
-        for root, _, files in os.walk(directory):
-            for file in files:
-                file_path = os.path.join(root, file)
+        被排除的目录不会进入；扩展名和文件名模式在stat之前判断，只有通过的文件才读取大小和修改时间。
+        目录链接不会进入（与os.walk一致），文件链接按其指向的文件处理。
+        """
+        scan_filter = scan_filter or DaiMaoScanFilter()
+        files = []
+        stack = [directory]
+        while stack:
+            current = stack.pop()
+            try:
+                entries = list(os.scandir(current))
+            except OSError:
+                continue
+            subdirs = []
+            for entry in entries:
                 try:
-                    if os.path.getsize(file_path) > threshold_bytes:
-                        large_files.append(file_path)
-                except (OSError, FileNotFoundError):
+                    if entry.is_dir(follow_symlinks=False):
+                        if scan_filter.accept_dir(entry.name):
+                            subdirs.append(entry.path)
+                        continue
+                    if not entry.is_file():
+                        continue
+                    if extensions and not entry.name.lower().endswith(extensions):
+                        continue
+                    relpath = os.path.relpath(entry.path, directory).replace(os.sep, "/")
+                    if not scan_filter.accept_name(entry.name, relpath):
+                        continue
+                    stat = entry.stat()
+                    if stat.st_size < min_bytes or not scan_filter.accept_stat(stat):
+                        continue
+                    files.append(entry.path)
+                except OSError:
                     continue
-                    
-        return large_files
+            # 逆序入栈，保持按目录顺序深度优先输出
+            stack.extend(reversed(subdirs))
+        return files
+    
+    def get_model_files(self, directory, scan_filter=None):
+        """获取目录下的模型文件"""
+        return self.walk_files(directory, scan_filter, extensions=self.MODEL_EXTENSIONS)
     
-    def get_all_files(self, directory):
+    def get_large_files(self, directory, threshold_mb, scan_filter=None):
+        """获取目录下大于指定阈值的文件"""
+        return self.walk_files(directory, scan_filter, min_bytes=int(threshold_mb * 1024 * 1024) + 1)
+    
+    def get_all_files(self, directory, scan_filter=None):
         """获取目录下的所有文件"""
-        all_files = []
+        return self.walk_files(directory, scan_filter)
+    
+    def __init__(self):
+        # 本次运行中得到的每个文件的全部哈希 {路径: {"sha256": ..., "autov2": ..., "blake2b": ...}} 及大小
+        self.file_digests = {}
+        self.file_sizes = {}
+    
+    def calculate_digests(self, file_path, algorithms=None):
+        """只读取一遍文件，同时计算多种哈希
+        
+        civitai的AutoV2短哈希就是SHA256的前10位，直接由SHA256得出，不需要额外计算。
+        """
+        algorithms = algorithms or self.DIGEST_ALGORITHMS
+        hashers = {name: hashlib.new(name) for name in algorithms}
+        
+        try:
+            with open(file_path, "rb") as f:
+                for byte_block in iter(lambda: f.read(self.READ_CHUNK_SIZE), b""):
+                    for hasher in hashers.values():
+                        hasher.update(byte_block)
+        except (OSError, FileNotFoundError):
+            return None
         
-        for root, _, files in os.walk(directory):
-            for file in files:
-                all_files.append(os.path.join(root, file))
-                
-        return all_files
+        digests = {name: hasher.hexdigest() for name, hasher in hashers.items()}
+        if "sha256" in digests:
+            digests["autov2"] = digests["sha256"][:AUTOV2_LENGTH]
+        return digests
     
     def calculate_sha256(self, file_path):
         """计算文件的SHA256哈希值"""
-        sha256_hash = hashlib.sha256()
+        digests = self.calculate_digests(file_path, ("sha256",))
+        return digests["sha256"] if digests else None
+    
+    def parse_sidecar(self, file_path):
+        """解析 <文件>.sha256 校验文件，返回 (SHA256, 附加记录字典)，文件不存在或没有有效哈希时返回None"""
+        sidecar_path = file_path + self.SIDECAR_EXTENSION
+        try:
+            with open(sidecar_path, "r", encoding="utf-8") as f:
+                lines = [line.strip() for line in f.read(4096).splitlines() if line.strip()]
+        except (OSError, UnicodeDecodeError):
+            return None
+        
+        file_hash = None
+        metadata = {}
+        for line in lines:
+            if line.startswith("#"):
+                for item in line[1:].split():
+                    key, _, value = item.partition("=")
+                    metadata[key] = value
+            elif file_hash is None:
+                token = line.split()[0].lower()
+                if len(token) == 64 and all(c in "0123456789abcdef" for c in token):
+                    file_hash = token
+        
+        if file_hash is None:
+            return None
+        return file_hash, metadata
+    
+    def read_sidecar(self, file_path, stat):
+        """读取 <文件>.sha256 校验文件，记录的大小和修改时间与文件一致时返回其中的SHA256
+        
+        校验文件格式与sha256sum兼容："<哈希> *<文件名>"，本工具写入时另起一行记录 "# size=... mtime_ns=..."。
+        其他工具写入的校验文件没有这行记录，无法确认与当前文件对应，不直接使用，文件照常计算哈希。
+        """
+        parsed = self.parse_sidecar(file_path)
+        if parsed is None:
+            return None
+        file_hash, metadata = parsed
+        if metadata.get("size") != str(stat.st_size) or metadata.get("mtime_ns") != str(stat.st_mtime_ns):
+            return None
+        return file_hash
+    
+    def check_foreign_sidecar(self, file_path, file_hash):
+        """计算出哈希后与其他工具写入的校验文件对照，不一致时提示（文件可能已损坏或校验文件已过时）"""
+        parsed = self.parse_sidecar(file_path)
+        if parsed is not None and parsed[0] != file_hash:
+            print(f"警告：{file_path} 的哈希 {file_hash[:10]}... 与校验文件记录的 {parsed[0][:10]}... 不一致")
+    
+    def write_sidecar(self, file_path, stat, file_hash):
+        """写入 <文件>.sha256 校验文件，附带大小和修改时间，供其他机器和工具复用"""
+        sidecar_path = file_path + self.SIDECAR_EXTENSION
+        try:
+            with open(sidecar_path, "w", encoding="utf-8") as f:
+                f.write(f"{file_hash} *{os.path.basename(file_path)}\n")
+                f.write(f"# size={stat.st_size} mtime_ns={stat.st_mtime_ns}\n")
+        except OSError as e:
+            print(f"写入校验文件失败 {sidecar_path}: {e}")
+    
+    def get_file_digests(self, file_path, hash_index=None, sidecar_mode="不使用"):
+        """获取文件的全部哈希，依次尝试哈希索引、校验文件，都无效时才读取文件计算
         
+        来自校验文件的结果只有SHA256（及由它得出的AutoV2），不会为补齐其他哈希而重新读取文件。
+        """
         try:
+            stat = os.stat(file_path)
+        except (OSError, FileNotFoundError):
+            return None
+        
+        digests = None
+        if hash_index is not None:
+            digests = hash_index.get_digests(file_path, stat.st_size, stat.st_mtime_ns)
+        
+        has_sidecar = False
+        if sidecar_mode != "不使用":
+            sidecar_hash = self.read_sidecar(file_path, stat)
+            has_sidecar = sidecar_hash is not None and (digests is None or sidecar_hash == digests["sha256"])
+            if digests is None and sidecar_hash is not None:
+                digests = {"sha256": sidecar_hash}
+        
+        if digests is None:
+            digests = self.calculate_digests(file_path)
+            if digests is None:
+                return None
+            if sidecar_mode != "不使用":
+                self.check_foreign_sidecar(file_path, digests["sha256"])
+        
+        digests["autov2"] = digests["sha256"][:AUTOV2_LENGTH]
+        if hash_index is not None:
+            hash_index.put(file_path, stat.st_size, stat.st_mtime_ns, digests["sha256"], digests)
+        if sidecar_mode == "读取并写入" and not has_sidecar:
+            self.write_sidecar(file_path, stat, digests["sha256"])
+        self.file_digests[file_path] = digests
+        self.file_sizes[file_path] = stat.st_size
+        return digests
+    
+    def get_file_sha256(self, file_path, hash_index=None, sidecar_mode="不使用"):
+        """获取文件SHA256，优先使用哈希索引和校验文件"""
+        digests = self.get_file_digests(file_path, hash_index, sidecar_mode)
+        return digests["sha256"] if digests else None
+    
+    def calculate_sample_fingerprint(self, file_path, sample_blocks=8):
+        """计算文件的抽样指纹：文件大小 + 固定偏移处的N个数据块，结果仅表示"可能重复"。"""
+        block_size = self.SAMPLE_BLOCK_SIZE
+        sample_hash = hashlib.sha256()
+        
+        try:
+            file_size = os.path.getsize(file_path)
+            sample_hash.update(str(file_size).encode("ascii"))
+            
             with open(file_path, "rb") as f:
-                for byte_block in iter(lambda: f.read(4096), b""):
-                    sha256_hash.update(byte_block)
-            return sha256_hash.hexdigest()
+                if file_size <= block_size * sample_blocks:
+                    # 小文件直接读取全部内容
+                    sample_hash.update(f.read())
+                else:
+                    # 在文件头到文件尾之间均匀选取采样偏移（包含首尾两块）
+                    last_offset = file_size - block_size
+                    if sample_blocks == 1:
+                        offsets = [0]
+                    else:
+                        offsets = [last_offset * i // (sample_blocks - 1) for i in range(sample_blocks)]
+                    for offset in offsets:
+                        f.seek(offset)
+                        sample_hash.update(f.read(block_size))
+            return sample_hash.hexdigest()
         except (OSError, FileNotFoundError):
             return None
     
-    def find_duplicates(self, file_list):
+    def find_duplicates(self, file_list, scan_mode="完整校验", sample_blocks=8, hash_index=None, sidecar_mode="不使用"):
         """找出重复文件，并显示进度"""
         hash_dict = defaultdict(list)
         total_files = len(file_list)
@@ -110,14 +407,27 @@ class DaiMaoFileDuplicatesFinder:
         last_update = start_time
         update_interval = 1.0  # 每秒更新一次进度
         
-        print(f"开始分析 {total_files} 个文件...")
+        quick_mode = scan_mode == "快速抽样"
+        
+        print(f"开始分析 {total_files} 个文件...{'（快速抽样模式）' if quick_mode else ''}")
         
         for file_path in file_list:
-            file_hash = self.calculate_sha256(file_path)
+            if self.cancel_event is not None and self.cancel_event.is_set():
+                print(f"扫描已取消，已处理 {processed}/{total_files} 个文件")
+                if hash_index is not None:
+                    hash_index.save()
+                raise ScanCancelledError()
+            
+            if quick_mode:
+                file_hash = self.calculate_sample_fingerprint(file_path, sample_blocks)
+            else:
+                file_hash = self.get_file_sha256(file_path, hash_index, sidecar_mode)
             if file_hash:
                 hash_dict[file_hash].append(file_path)
             
             processed += 1
+            if self.progress_callback is not None:
+                self.progress_callback(processed, total_files)
             current_time = time.time()
             if current_time - last_update >= update_interval:
                 elapsed = current_time - start_time
@@ -126,76 +436,347 @@ class DaiMaoFileDuplicatesFinder:
                 print(f"进度: {processed}/{total_files} ({percent:.1f}%) - {files_per_second:.1f} 文件/秒")
                 last_update = current_time
         
+        if hash_index is not None:
+            hash_index.save()
+        
         # 过滤掉没有重复的文件
         duplicates = {hash_val: paths for hash_val, paths in hash_dict.items() if len(paths) > 1}
         
         print(f"分析完成，耗时 {time.time() - start_time:.1f} 秒，找到 {len(duplicates)} 组重复文件。")
         return duplicates
     
-    def format_duplicate_result(self, duplicates):
-        """将重复文件信息格式化为易读的字符串"""
-        if not duplicates:
-            return "没有找到重复文件。", json.dumps({})
+    def find_near_duplicates(self, file_list, image_hash="pHash", hamming_threshold=6):
+        """相似图片查重：计算感知哈希，用BK树找出汉明距离在阈值内的图片簇"""
+        from .daimao_image_hash import is_image_file, compute_image_hashes, cluster_near_duplicates, hamming_distance
+        
+        image_files = [f for f in file_list if is_image_file(f)]
+        print(f"开始计算 {len(image_files)} 张图片的 {image_hash}（汉明距离阈值 {hamming_threshold}）...")
+        start_time = time.time()
+        
+        last_update = start_time
+        
+        def on_progress(processed, total):
+            nonlocal last_update
+            if self.cancel_event is not None and self.cancel_event.is_set():
+                print(f"扫描已取消，已处理 {processed}/{total} 张图片")
+                raise ScanCancelledError()
+            if self.progress_callback is not None:
+                self.progress_callback(processed, total)
+            # 每张图片都会回调，控制台每秒最多打印一次
+            current_time = time.time()
+            if current_time - last_update >= 1.0 or processed == total:
+                last_update = current_time
+                print(f"进度: {processed}/{total} ({processed / total * 100:.1f}%)")
+        
+        hashes = compute_image_hashes(image_files, image_hash, on_progress)
+        clusters = cluster_near_duplicates(hashes, hamming_threshold)
+        
+        near_duplicates = []
+        for root_hash, paths in clusters:
+            max_distance = max(hamming_distance(root_hash, hashes[path]) for path in paths)
+            near_duplicates.append({
+                "hash": f"{root_hash:016x}",
+                "files": [(path, f"{hashes[path]:016x}") for path in paths],
+                "max_distance": max_distance,
+            })
+        near_duplicates.sort(key=lambda group: len(group["files"]), reverse=True)
+        
+        print(f"分析完成，耗时 {time.time() - start_time:.1f} 秒，找到 {len(near_duplicates)} 组相似图片。")
+        return near_duplicates
+    
+    def format_near_duplicate_result(self, near_duplicates, image_hash="pHash"):
+        """格式化相似图片结果，这些组内容并不完全相同，标记为未验证且不会被去重器处理"""
+        # 没有相似图片也输出完整的JSON（空的groups和summary），"{}"只表示查重失败
+        result = "找到以下相似图片组：\n\n" if near_duplicates else "没有找到相似图片。"
+        json_data = {"groups": []}
+        total_files = 0
+        total_size = 0
+        for idx, group in enumerate(near_duplicates, 1):
+            result += f"组 {idx} ({image_hash}: {group['hash']}): {len(group['files'])} 张图片，组内最大汉明距离 {group['max_distance']}\n"
+            group_data = {
+                "group_id": idx,
+                "hash": group["hash"],
+                "hash_type": image_hash.lower(),
+                "verified": False,
+                "near_duplicate": True,
+                "max_distance": group["max_distance"],
+                "file_count": len(group["files"]),
+                "files": []
+            }
+            for path, file_hash in group["files"]:
+                try:
+                    size_bytes = os.path.getsize(path)
+                except OSError:
+                    size_bytes = 0
+                total_size += size_bytes
+                result += f"  • {path} ({size_bytes / (1024 * 1024):.2f} MB, {file_hash})\n"
+                group_data["files"].append({
+                    "path": path,
+                    "size_bytes": size_bytes,
+                    "size_mb": size_bytes / (1024 * 1024),
+                    "perceptual_hash": file_hash
+                })
+            total_files += len(group["files"])
+            json_data["groups"].append(group_data)
+            result += "\n"
+        
+        if near_duplicates:
+            result += f"总计找到 {len(near_duplicates)} 组相似图片，共 {total_files} 张，占用 {total_size / (1024 * 1024):.2f} MB。\n"
+            result += "注意：相似图片内容并不完全相同，去重器不会自动处理这些组，请人工挑选后删除。"
+        
+        json_data["summary"] = {
+            "verified": False,
+            "near_duplicate": True,
+            "total_groups": len(near_duplicates),
+            "total_duplicate_files": total_files,
+            "total_size_bytes": total_size
+        }
+        return result, json.dumps(json_data)
+    
+    def compute_directory_hashes(self, directory):
+        """根据文件哈希自底向上计算每个子目录的Merkle哈希
+        
+        只有目录下（含子目录）的每个文件都已算出哈希时，目录哈希才有意义；
+        有文件未参与本次查重（如被类型过滤掉）、含有目录链接或无法读取时，该目录及其上级目录都不计算。
+        返回 {目录: (哈希, 文件数, 总字节数)}。
+        """
+        directory_hashes = {}
+        incomplete = set()
+        
+        for root, dirs, files in os.walk(directory, topdown=False):
+            lines = []
+            file_count = 0
+            total_size = 0
+            complete = True
+            
+            for name in files:
+                file_path = os.path.join(root, name)
+                digests = self.file_digests.get(file_path)
+                if digests is None:
+                    complete = False
+                    break
+                lines.append(f"F {name} {digests['sha256']}")
+                file_count += 1
+                total_size += self.file_sizes[file_path]
+            
+            if complete:
+                for name in dirs:
+                    sub_dir = os.path.join(root, name)
+                    if sub_dir in incomplete or sub_dir not in directory_hashes:
+                        complete = False
+                        break
+                    sub_hash, sub_count, sub_size = directory_hashes[sub_dir]
+                    lines.append(f"D {name} {sub_hash}")
+                    file_count += sub_count
+                    total_size += sub_size
+            
+            if not complete:
+                incomplete.add(root)
+                continue
+            
+            lines.sort()
+            dir_hash = hashlib.sha256("\n".join(lines).encode("utf-8")).hexdigest()
+            directory_hashes[root] = (dir_hash, file_count, total_size)
+        
+        return directory_hashes
+    
+    def find_duplicate_directories(self, directory, duplicates):
+        """找出内容完全相同的目录，只报告最上层的一组，并从文件组中去掉会随目录一起处理的文件
+        
+        返回 (目录组列表, 剩余的文件组)。
+        """
+        directory_hashes = self.compute_directory_hashes(directory)
+        
+        dirs_by_hash = defaultdict(list)
+        for dir_path, (dir_hash, file_count, _) in directory_hashes.items():
+            # 扫描根目录本身和空目录不参与比较
+            if dir_path != directory and file_count > 0:
+                dirs_by_hash[dir_hash].append(dir_path)
+        
+        duplicate_dirs = {dir_hash: sorted(paths) for dir_hash, paths in dirs_by_hash.items() if len(paths) > 1}
+        in_groups = {path for paths in duplicate_dirs.values() for path in paths}
+        
+        # 上级目录也各自重复时，只保留上级目录的组
+        candidates = []
+        for dir_hash, paths in duplicate_dirs.items():
+            if all(os.path.dirname(path) in in_groups for path in paths):
+                continue
+            candidates.append((dir_hash, paths))
+        
+        def inside(path, dirs):
+            parent = os.path.dirname(path)
+            while parent not in dirs:
+                next_parent = os.path.dirname(parent)
+                if next_parent == parent:
+                    return False
+                parent = next_parent
+            return True
+        
+        # 从上层到下层处理：位于上层组中会被替换的目录之下的目录已经随上层目录一起处理，从下层组中去掉，
+        # 否则上层目录被替换为链接后，下层组会经由链接操作保留的目录本身。
+        # 每轮处理没有任何目录位于其他待处理组目录之下的组
+        directory_groups = []
+        redundant_dirs = set()
+        pending = candidates
+        while pending:
+            pending_dirs = {path for _, paths in pending for path in paths}
+            ready = [item for item in pending if not any(inside(path, pending_dirs) for path in item[1])] or pending
+            ready_hashes = {dir_hash for dir_hash, _ in ready}
+            pending = [item for item in pending if item[0] not in ready_hashes]
+            for dir_hash, paths in ready:
+                paths = [path for path in paths if not inside(path, redundant_dirs)]
+                if len(paths) < 2:
+                    continue
+                _, file_count, total_size = directory_hashes[paths[0]]
+                directory_groups.append({
+                    "hash": dir_hash,
+                    "directories": paths,
+                    "file_count": file_count,
+                    "total_size_bytes": total_size,
+                })
+                redundant_dirs.update(paths[1:])
+        directory_groups.sort(key=lambda g: g["total_size_bytes"] * (len(g["directories"]) - 1), reverse=True)
+        
+        # 每个目录组保留第一个目录，其余目录下的文件会随目录一起处理，不再单独列入文件组
+        remaining = {}
+        for hash_val, paths in duplicates.items():
+            kept_paths = [path for path in paths if not inside(path, redundant_dirs)]
+            if len(kept_paths) > 1:
+                remaining[hash_val] = kept_paths
+        print(f"找到 {len(directory_groups)} 组重复目录，文件组由 {len(duplicates)} 组减少为 {len(remaining)} 组。")
+        return directory_groups, remaining
+    
+    def describe_file(self, entry, local_host):
+        """组内单个文件的JSON记录：本机文件重新stat，其他主机的文件保留记录的信息"""
+        if isinstance(entry, dict):
+            if entry.get("host", local_host) != local_host:
+                size_bytes = entry.get("size_bytes", 0)
+                return dict(entry, size_bytes=size_bytes, size_mb=size_bytes / (1024 * 1024))
+            file_path = entry["path"]
+        else:
+            file_path = entry
+        stat = os.stat(file_path)
+        # 记录修改时间和inode，去重器执行前据此判断文件是否在报告生成后变化过
+        file_info = {
+            "path": file_path,
+            "size_bytes": stat.st_size,
+            "size_mb": stat.st_size / (1024 * 1024),
+            "mtime_ns": stat.st_mtime_ns,
+            "inode": stat.st_ino,
+            "device": stat.st_dev
+        }
+        if isinstance(entry, dict) and "host" in entry:
+            file_info["host"] = entry["host"]
+        return file_info
+    
+    def format_duplicate_result(self, duplicates, verified=True, directory_groups=None):
+        """将重复文件信息格式化为易读的字符串
         
-        result = "找到以下重复文件组：\n\n"
+        verified为False时表示结果来自快速抽样，只是"可能重复"，需经过验证节点确认后才能去重。
+        """
+        hash_label = "SHA256" if verified else "抽样指纹"
+        result = ""
         total_wasted_space = 0
         json_data = {"groups": []}
         
+        if directory_groups:
+            result += "找到以下重复目录组：\n\n"
+            json_data["directory_groups"] = []
+            for idx, group in enumerate(directory_groups, 1):
+                wasted_space = group["total_size_bytes"] * (len(group["directories"]) - 1)
+                total_wasted_space += wasted_space
+                result += f"目录组 {idx} (Merkle: {group['hash'][:10]}...): {len(group['directories'])} 个目录，"
+                result += f"每个 {group['file_count']} 个文件，浪费空间: {wasted_space / (1024 * 1024):.2f} MB\n"
+                for dir_path in group["directories"]:
+                    result += f"  • {dir_path}{os.sep}\n"
+                result += "\n"
+                json_data["directory_groups"].append({
+                    "group_id": idx,
+                    "hash": group["hash"],
+                    "hash_type": "merkle_sha256",
+                    "verified": True,
+                    "directory_count": len(group["directories"]),
+                    "file_count": group["file_count"],
+                    "total_size_bytes": group["total_size_bytes"],
+                    "wasted_space_bytes": wasted_space,
+                    "wasted_space_mb": wasted_space / (1024 * 1024),
+                    "directories": [{"path": dir_path} for dir_path in group["directories"]],
+                })
+        
+        if duplicates:
+            result += "找到以下重复文件组：\n\n" if verified else "找到以下可能重复的文件组（快速抽样，未验证）：\n\n"
+        
+        local_host = get_host_name()
         for idx, (hash_val, paths) in enumerate(duplicates.items(), 1):
-            # 以第一个文件作为参考，计算重复文件占用的额外空间
+            # 条目可以是路径，也可以是带host的文件信息（来自合并索引）；其他主机上的文件无法stat，沿用记录的大小
+            first_path = paths[0]["path"] if paths and isinstance(paths[0], dict) else (paths[0] if paths else None)
             if paths:
                 try:
-                    file_size = os.path.getsize(paths[0])
+                    files = [self.describe_file(entry, local_host) for entry in paths]
+                    file_size = files[0]["size_bytes"]
                     wasted_space = file_size * (len(paths) - 1)
                     total_wasted_space += wasted_space
                     
-                    result += f"组 {idx} (SHA256: {hash_val[:10]}...): {len(paths)} 个文件，浪费空间: {wasted_space / (1024 * 1024):.2f} MB\n"
+                    result += f"组 {idx} ({hash_label}: {hash_val[:10]}...): {len(paths)} 个文件，浪费空间: {wasted_space / (1024 * 1024):.2f} MB\n"
                     
                     group_data = {
                         "group_id": idx,
                         "hash": hash_val,
+                        "hash_type": "sha256" if verified else "sample",
+                        "verified": verified,
                         "file_count": len(paths),
                         "wasted_space_bytes": wasted_space,
                         "wasted_space_mb": wasted_space / (1024 * 1024),
-                        "files": []
+                        "files": files
                     }
                     
-                    for path in paths:
-                        size_mb = os.path.getsize(path) / (1024 * 1024)
-                        result += f"  • {path} ({size_mb:.2f} MB)\n"
-                        group_data["files"].append({
-                            "path": path,
-                            "size_bytes": os.path.getsize(path),
-                            "size_mb": size_mb
-                        })
+                    for file_info in files:
+                        host_prefix = f"[{file_info['host']}] " if "host" in file_info else ""
+                        result += f"  • {host_prefix}{file_info['path']} ({file_info['size_mb']:.2f} MB)\n"
                     
+                    if verified and first_path in self.file_digests:
+                        group_data["digests"] = self.file_digests[first_path]
                     json_data["groups"].append(group_data)
                     result += "\n"
-                except (OSError, FileNotFoundError):
-                    result += f"组 {idx} (SHA256: {hash_val[:10]}...): 无法获取文件大小\n"
+                except OSError:
+                    result += f"组 {idx} ({hash_label}: {hash_val[:10]}...): 无法获取文件大小\n"
                     
                     group_data = {
                         "group_id": idx,
                         "hash": hash_val,
+                        "hash_type": "sha256" if verified else "sample",
+                        "verified": verified,
                         "file_count": len(paths),
                         "error": "无法获取文件大小",
-                        "files": [{"path": path} for path in paths]
+                        "files": [dict(entry) if isinstance(entry, dict) else {"path": entry} for entry in paths]
                     }
                     
+                    if verified and first_path in self.file_digests:
+                        group_data["digests"] = self.file_digests[first_path]
                     json_data["groups"].append(group_data)
                     
-                    for path in paths:
-                        result += f"  • {path}\n"
+                    for entry in group_data["files"]:
+                        result += f"  • {entry['path']}\n"
                     result += "\n"
         
         total_groups = len(duplicates)
         total_files = sum(len(paths) for paths in duplicates.values())
         
-        result += f"总计找到 {total_groups} 组重复文件，共 {total_files} 个文件。\n"
-        result += f"浪费的存储空间：{total_wasted_space / (1024 * 1024):.2f} MB ({total_wasted_space / (1024 * 1024 * 1024):.2f} GB)"
+        # 没有重复也输出完整的JSON（空的groups和summary），"{}"只表示查重失败，变化报告据此区分
+        if not duplicates and not directory_groups:
+            result = "没有找到重复文件。"
+        else:
+            if directory_groups:
+                result += f"总计找到 {len(directory_groups)} 组重复目录。\n"
+            result += f"总计找到 {total_groups} 组重复文件，共 {total_files} 个文件。\n"
+            result += f"浪费的存储空间：{total_wasted_space / (1024 * 1024):.2f} MB ({total_wasted_space / (1024 * 1024 * 1024):.2f} GB)"
+            if not verified:
+                result += "\n注意：快速抽样结果尚未验证，请先使用\"呆毛文件查重验证\"节点确认后再去重。"
         
         json_data["summary"] = {
+            "verified": verified,
             "total_groups": total_groups,
+            "total_directory_groups": len(directory_groups or []),
             "total_duplicate_files": total_files,
             "total_wasted_space_bytes": total_wasted_space,
             "total_wasted_space_mb": total_wasted_space / (1024 * 1024),
@@ -204,8 +785,30 @@ class DaiMaoFileDuplicatesFinder:
         
         return result, json.dumps(json_data)
     
-    def find_duplicate_files(self, directory_path, preset_dir, dedup_type, size_threshold_mb, use_preset_dir):
+    def get_job_result(self, job_id):
+        """读取后台查重任务的结果"""
+        job = get_scan_job_manager().get(job_id)
+        if job is None:
+            return (f"错误：后台任务 '{job_id}' 不存在（可能已过期或ComfyUI已重启）。", "{}")
+        if job.status == "done":
+            return (job.result_text, job.result_json)
+        if job.status == "error":
+            return (f"后台任务 '{job_id}' 失败: {job.error}", "{}")
+        if job.status == "cancelled":
+            return (f"后台任务 '{job_id}' 已取消。", "{}")
+        return (f"后台任务 '{job_id}' 尚未完成，当前进度 {job.processed}/{job.total}。", "{}")
+    
+    def find_duplicate_files(self, directory_path, preset_dir, dedup_type, size_threshold_mb, use_preset_dir,
+                             scan_mode="完整校验", sample_blocks=8, use_hash_cache="是", sidecar_mode="读取", job_id="",
+                             export_index_path="", shard_index=0, shard_count=1, detect_duplicate_dirs="否",
+                             image_hash="pHash", hamming_threshold=6, include_patterns="", exclude_patterns="",
+                             exclude_dirs=DEFAULT_EXCLUDE_DIRS, min_size_mb=0.0, max_size_mb=0.0,
+                             modified_after="", modified_before=""):
         """执行文件查重操作"""
+        # 关联后台任务时直接返回任务结果，不在提示词队列中扫描
+        if job_id and job_id.strip():
+            return self.get_job_result(job_id.strip())
+        
         # 处理目录选择
         if use_preset_dir == "是":
             directory_path = preset_dir
@@ -216,29 +819,78 @@ class DaiMaoFileDuplicatesFinder:
         if not os.path.exists(directory_path) or not os.path.isdir(directory_path):
             return (f"错误：目录 '{directory_path}' 不存在或不是一个有效的目录。", "{}")
         
+        # 遍历时应用的过滤条件，校验文件本身不参与查重
+        try:
+            scan_filter = DaiMaoScanFilter(include_patterns, exclude_patterns, exclude_dirs,
+                                           min_size_mb, max_size_mb, modified_after, modified_before)
+        except ValueError as e:
+            return (f"错误：{e}", "{}")
+        if sidecar_mode != "不使用":
+            scan_filter.exclude_patterns.append(f"*{self.SIDECAR_EXTENSION}")
+        if scan_filter.describe():
+            print(f"过滤条件：{scan_filter.describe()}")
+        
         # 根据选择的类型获取文件列表
         file_list = []
         if dedup_type == "模型文件":
             print(f"正在扫描模型文件...")
-            file_list = self.get_model_files(directory_path)
+            file_list = self.get_model_files(directory_path, scan_filter)
         elif dedup_type == "大文件":
             print(f"正在扫描大于 {size_threshold_mb} MB 的文件...")
-            file_list = self.get_large_files(directory_path, size_threshold_mb)
+            file_list = self.get_large_files(directory_path, size_threshold_mb, scan_filter)
         else:  # 全部文件
             print(f"正在扫描所有文件...")
-            file_list = self.get_all_files(directory_path)
+            file_list = self.get_all_files(directory_path, scan_filter)
+        
+        # 分片扫描：只处理分配到本分片的文件
+        if shard_count > 1:
+            if not 0 <= shard_index < shard_count:
+                return (f"错误：分片序号 {shard_index} 超出范围（分片数 {shard_count}）。", "{}")
+            file_list = [f for f in file_list if in_shard(f, directory_path, shard_index, shard_count)]
+            print(f"分片 {shard_index + 1}/{shard_count}")
         
         print(f"找到 {len(file_list)} 个文件符合条件")
         
         # 如果没有找到文件
         if not file_list:
-            return (f"在目录 '{directory_path}' 中没有找到符合条件的文件。", "{}")
+            if export_index_path and export_index_path.strip():
+                export_scan_index(export_index_path.strip(), [], directory_path, shard_index, shard_count)
+            if scan_mode == "相似图片":
+                empty_json = self.format_near_duplicate_result([], image_hash)[1]
+            else:
+                empty_json = self.format_duplicate_result({}, verified=scan_mode != "快速抽样")[1]
+            return (f"在目录 '{directory_path}' 中没有找到符合条件的文件。", empty_json)
+        
+        # 相似图片模式：按感知哈希聚类，不计算文件哈希
+        if scan_mode == "相似图片":
+            near_duplicates = self.find_near_duplicates(file_list, image_hash, hamming_threshold)
+            return self.format_near_duplicate_result(near_duplicates, image_hash)
         
         # 查找重复文件
-        duplicates = self.find_duplicates(file_list)
+        hash_index = get_hash_index() if use_hash_cache == "是" else None
+        duplicates = self.find_duplicates(file_list, scan_mode, sample_blocks, hash_index, sidecar_mode)
+        
+        # 导出扫描索引，供其他机器或分片合并
+        if export_index_path and export_index_path.strip():
+            if scan_mode == "快速抽样":
+                print("快速抽样模式没有完整哈希，不导出扫描索引")
+            else:
+                records = ((self.file_sizes[path], self.file_digests[path]["sha256"], os.path.abspath(path))
+                           for path in file_list if path in self.file_digests)
+                count = export_scan_index(export_index_path.strip(), records, directory_path, shard_index, shard_count)
+                print(f"已导出扫描索引: {export_index_path.strip()} ({count} 个文件)")
+        
+        # 目录级查重：相同目录合并为一组报告
+        directory_groups = None
+        if detect_duplicate_dirs == "是":
+            if scan_mode == "快速抽样" or shard_count > 1:
+                print("目录级查重需要完整扫描整棵目录树，快速抽样和分片模式下跳过")
+            else:
+                directory_groups, duplicates = self.find_duplicate_directories(directory_path, duplicates)
         
         # 格式化结果
-        result, json_data = self.format_duplicate_result(duplicates)
+        result, json_data = self.format_duplicate_result(duplicates, verified=scan_mode != "快速抽样",
+                                                         directory_groups=directory_groups)
         
         return (result, json_data)
 
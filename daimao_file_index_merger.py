@@ -0,0 +1,142 @@
+import os
+import json
+from collections import defaultdict
+from .daimao_scan_index import read_scan_index, get_host_name
+
+class DaiMaoScanIndexMerger:
+    """呆毛查重索引合并节点，合并多台机器或多个分片导出的扫描索引，不重新读取任何文件即可找出重复"""
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "index_paths": ("STRING", {"default": "", "multiline": True}),
+                "only_cross_host": (["否", "是"], {"default": "否"}),
+            },
+        }
+
+    RETURN_TYPES = ("STRING", "STRING")
+    RETURN_NAMES = ("重复文件信息", "重复文件JSON数据")
+    FUNCTION = "merge_indexes"
+    CATEGORY = "呆毛工具"
+
+    def collect_index_files(self, index_paths):
+        """每行一个索引文件或目录，目录下的全部 .jsonl 文件都会被读取"""
+        index_files = []
+        for line in index_paths.splitlines():
+            path = line.strip()
+            if not path:
+                continue
+            if os.path.isdir(path):
+                for name in sorted(os.listdir(path)):
+                    if name.endswith(".jsonl"):
+                        index_files.append(os.path.join(path, name))
+            else:
+                index_files.append(path)
+        return index_files
+
+    def merge_indexes(self, index_paths, only_cross_host):
+        """合并索引并按 (大小, SHA256) 分组"""
+        index_files = self.collect_index_files(index_paths)
+        if not index_files:
+            return ("错误：没有提供扫描索引文件。", "{}")
+
+        groups = defaultdict(dict)
+        errors = []
+        total_records = 0
+        for index_file in index_files:
+            try:
+                header, records = read_scan_index(index_file)
+            except (OSError, ValueError) as e:
+                errors.append(f"{index_file}: {e}")
+                continue
+            host = header.get("host", "")
+            for size, sha256, path in records:
+                # 同一主机上的同一路径只记录一次（分片有重叠时也不会重复计数）
+                groups[(size, sha256)][(host, path)] = size
+                total_records += 1
+            print(f"读取扫描索引: {index_file} (主机 {host}，{len(records)} 个文件)")
+
+        duplicates = []
+        for (size, sha256), members in groups.items():
+            if len(members) < 2:
+                continue
+            hosts = sorted({host for host, _ in members})
+            if only_cross_host == "是" and len(hosts) < 2:
+                continue
+            duplicates.append((size, sha256, hosts, sorted(members)))
+        duplicates.sort(key=lambda item: item[0] * (len(item[3]) - 1), reverse=True)
+
+        return self.format_merged_result(duplicates, len(index_files), total_records, errors)
+
+    def format_merged_result(self, duplicates, index_count, total_records, errors):
+        """格式化合并结果，JSON结构与呆毛文件查重一致，每个文件额外带有host字段"""
+        result = f"合并 {index_count} 个扫描索引，共 {total_records} 条文件记录。\n"
+        for error in errors:
+            result += f"读取失败: {error}\n"
+        if not duplicates:
+            # 没有重复也输出完整的JSON，"{}"只表示失败
+            summary = {"verified": True, "total_groups": 0, "cross_host_groups": 0, "total_duplicate_files": 0,
+                       "total_wasted_space_bytes": 0, "total_wasted_space_mb": 0.0, "total_wasted_space_gb": 0.0}
+            return result + "没有找到重复文件。", json.dumps({"groups": [], "summary": summary})
+
+        local_host = get_host_name()
+        json_data = {"groups": []}
+        total_wasted_space = 0
+        cross_host_groups = 0
+        result += "\n找到以下重复文件组：\n\n"
+        for idx, (size, sha256, hosts, members) in enumerate(duplicates, 1):
+            wasted_space = size * (len(members) - 1)
+            total_wasted_space += wasted_space
+            cross_host = len(hosts) > 1
+            cross_host_groups += cross_host
+            result += f"组 {idx} (SHA256: {sha256[:10]}...): {len(members)} 个文件，"
+            result += f"{'跨 ' + str(len(hosts)) + ' 台主机' if cross_host else '主机 ' + hosts[0]}，浪费空间: {wasted_space / (1024 * 1024):.2f} MB\n"
+            group_data = {
+                "group_id": idx,
+                "hash": sha256,
+                "hash_type": "sha256",
+                "verified": True,
+                "cross_host": cross_host,
+                "hosts": hosts,
+                "file_count": len(members),
+                "wasted_space_bytes": wasted_space,
+                "wasted_space_mb": wasted_space / (1024 * 1024),
+                "files": [],
+            }
+            for host, path in members:
+                result += f"  • [{host}] {path} ({size / (1024 * 1024):.2f} MB)\n"
+                group_data["files"].append({
+                    "host": host,
+                    "path": path,
+                    "size_bytes": size,
+                    "size_mb": size / (1024 * 1024),
+                })
+            json_data["groups"].append(group_data)
+            result += "\n"
+
+        total_files = sum(len(members) for _, _, _, members in duplicates)
+        result += f"总计找到 {len(duplicates)} 组重复文件（其中跨主机 {cross_host_groups} 组），共 {total_files} 个文件。\n"
+        result += f"浪费的存储空间：{total_wasted_space / (1024 * 1024):.2f} MB ({total_wasted_space / (1024 * 1024 * 1024):.2f} GB)\n"
+        result += f"注意：去重器只会处理本机（{local_host}）上的文件。"
+
+        json_data["summary"] = {
+            "verified": True,
+            "total_groups": len(duplicates),
+            "cross_host_groups": cross_host_groups,
+            "total_duplicate_files": total_files,
+            "total_wasted_space_bytes": total_wasted_space,
+            "total_wasted_space_mb": total_wasted_space / (1024 * 1024),
+            "total_wasted_space_gb": total_wasted_space / (1024 * 1024 * 1024)
+        }
+        return result, json.dumps(json_data)
+
+
+# 节点映射
+NODE_CLASS_MAPPINGS = {
+    "呆毛查重索引合并": DaiMaoScanIndexMerger
+}
+
+# 显示名称映射
+NODE_DISPLAY_NAME_MAPPINGS = {
+    "呆毛查重索引合并": "呆毛查重索引合并"
+}
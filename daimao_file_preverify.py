@@ -0,0 +1,164 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from .daimao_file_finder import DaiMaoFileDuplicatesFinder
+from .daimao_hash_index import get_hash_index
+from .daimao_scan_index import get_host_name
+
+# 同时校验的组数，校验主要是stat和少量重新计算哈希，以IO为主
+PRE_VERIFY_WORKERS = min(8, (os.cpu_count() or 1) + 4)
+
+
+def stat_unchanged(file_info, stat):
+    """大小、修改时间和inode都与报告中记录的一致；旧版报告没有记录时视为已变化"""
+    if "mtime_ns" not in file_info:
+        return False
+    return (file_info.get("size_bytes") == stat.st_size
+            and file_info["mtime_ns"] == stat.st_mtime_ns
+            and file_info.get("inode", stat.st_ino) == stat.st_ino)
+
+
+def directory_conflict(keep_dir, dir_path):
+    """重复目录不能安全处理时返回原因，否则返回None
+
+    两个目录共同上级之下的某级目录是链接时（例如上层目录组已经把它替换为链接），改名或删除会经由链接作用到保留的目录；
+    共同上级之上的链接（例如整个模型目录是链接）对两者相同，不影响处理。目录与保留目录实际是同一位置或互相包含时同样不能处理。
+    """
+    dir_path = os.path.abspath(dir_path.rstrip("/\\") or dir_path)
+    common = os.path.commonpath([dir_path, os.path.abspath(keep_dir)])
+    parent = os.path.dirname(dir_path)
+    while len(parent) > len(common):
+        if os.path.islink(parent):
+            return f"上级目录是链接: {parent}"
+        parent = os.path.dirname(parent)
+    real_dir = os.path.realpath(dir_path)
+    real_keep = os.path.realpath(keep_dir)
+    if real_dir == real_keep:
+        return f"与保留目录实际是同一目录: {real_keep}"
+    if real_dir.startswith(real_keep.rstrip(os.sep) + os.sep) or real_keep.startswith(real_dir.rstrip(os.sep) + os.sep):
+        return f"与保留目录 {real_keep} 互相包含"
+    return None
+
+
+def verify_file_group(group, hash_index):
+    """校验一个文件组：未变化的文件直接通过，变化过的重新计算SHA256，与组哈希不一致或已不存在的文件被移除
+
+    返回 (保留的文件列表, 说明列表, 重新计算哈希的文件数)。
+    """
+    finder = DaiMaoFileDuplicatesFinder()
+    local_host = get_host_name()
+    kept_files = []
+    messages = []
+    rehashed = 0
+    for file_info in group.get("files", []):
+        if not isinstance(file_info, dict):
+            file_info = {"path": file_info}
+        # 其他主机上的文件无法校验，原样保留，由去重器忽略
+        if file_info.get("host", local_host) != local_host:
+            kept_files.append(file_info)
+            continue
+        path = file_info["path"]
+        try:
+            stat = os.stat(path)
+        except OSError:
+            messages.append(f"文件已不存在: {path}")
+            continue
+        if stat_unchanged(file_info, stat):
+            kept_files.append(file_info)
+            continue
+        rehashed += 1
+        if finder.get_file_sha256(path, hash_index) != group.get("hash"):
+            messages.append(f"内容已变化: {path}")
+            continue
+        kept_files.append(dict(file_info, size_bytes=stat.st_size, size_mb=stat.st_size / (1024 * 1024),
+                               mtime_ns=stat.st_mtime_ns, inode=stat.st_ino, device=stat.st_dev))
+    return kept_files, messages, rehashed
+
+
+def verify_directory_group(group, hash_index):
+    """校验一个目录组：重新计算每个目录的Merkle哈希，哈希索引使未变化的文件不需要重新读取
+
+    已经是链接的目录原样保留（去重器会跳过）。返回值与verify_file_group相同。
+    """
+    finder = DaiMaoFileDuplicatesFinder()
+    kept_dirs = []
+    messages = []
+    rehashed = 0
+    for dir_info in group.get("directories", []):
+        if not isinstance(dir_info, dict):
+            dir_info = {"path": dir_info}
+        dir_path = dir_info["path"].rstrip("/\\") or dir_info["path"]
+        if os.path.islink(dir_path):
+            kept_dirs.append(dir_info)
+            continue
+        if not os.path.isdir(dir_path):
+            messages.append(f"目录已不存在: {dir_path}")
+            continue
+        for root, _, files in os.walk(dir_path):
+            for name in files:
+                file_path = os.path.join(root, name)
+                try:
+                    stat = os.stat(file_path)
+                except OSError:
+                    continue
+                if hash_index.get_digests(file_path, stat.st_size, stat.st_mtime_ns) is None:
+                    rehashed += 1
+                finder.get_file_digests(file_path, hash_index)
+        dir_hash = finder.compute_directory_hashes(dir_path).get(dir_path)
+        if dir_hash is None or dir_hash[0] != group.get("hash"):
+            messages.append(f"目录内容已变化: {dir_path}")
+            continue
+        kept_dirs.append(dir_info)
+    return kept_dirs, messages, rehashed
+
+
+def pre_verify_duplicate_data(data, max_workers=PRE_VERIFY_WORKERS):
+    """执行去重前校验查重结果是否仍然有效，多个组并行校验
+
+    只校验经过完整SHA256校验的文件组和目录组（其他组去重器本来就会跳过）；
+    移除已变化或已不存在的文件，剩余不足两个的组整组跳过。返回 (校验后的数据, 校验说明)。
+    """
+    hash_index = get_hash_index()
+    file_groups = [g for g in data.get("groups", [])
+                   if g.get("verified", True) and not g.get("near_duplicate") and g.get("hash_type", "sha256") == "sha256"]
+    directory_groups = data.get("directory_groups", [])
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="daimao_verify") as executor:
+        file_results = list(executor.map(lambda g: verify_file_group(g, hash_index), file_groups))
+        directory_results = list(executor.map(lambda g: verify_directory_group(g, hash_index), directory_groups))
+    hash_index.save()
+
+    report = ""
+    skipped_groups = 0
+    total_rehashed = 0
+    file_group_results = {id(g): r for g, r in zip(file_groups, file_results)}
+    verified_groups = []
+    for group in data.get("groups", []):
+        if id(group) not in file_group_results:
+            verified_groups.append(group)
+            continue
+        kept_files, messages, rehashed = file_group_results[id(group)]
+        total_rehashed += rehashed
+        for message in messages:
+            report += f"  • 组 {group.get('group_id', '?')}: {message}\n"
+        if len(kept_files) < 2:
+            report += f"  • 跳过组 {group.get('group_id', '?')}: 报告生成后文件已变化，剩余重复文件不足两个\n"
+            skipped_groups += 1
+            continue
+        verified_groups.append(dict(group, files=kept_files, file_count=len(kept_files)))
+
+    verified_directory_groups = []
+    for group, (kept_dirs, messages, rehashed) in zip(directory_groups, directory_results):
+        total_rehashed += rehashed
+        for message in messages:
+            report += f"  • 目录组 {group.get('group_id', '?')}: {message}\n"
+        if len(kept_dirs) < 2:
+            report += f"  • 跳过目录组 {group.get('group_id', '?')}: 报告生成后目录已变化，剩余重复目录不足两个\n"
+            skipped_groups += 1
+            continue
+        verified_directory_groups.append(dict(group, directories=kept_dirs, directory_count=len(kept_dirs)))
+
+    summary = f"执行前校验：检查 {len(file_groups) + len(directory_groups)} 组，重新计算 {total_rehashed} 个变化文件的哈希，跳过 {skipped_groups} 组\n"
+    verified_data = dict(data, groups=verified_groups)
+    if directory_groups:
+        verified_data["directory_groups"] = verified_directory_groups
+    return verified_data, summary + report + "\n"
@@ -0,0 +1,111 @@
+import json
+import asyncio
+from aiohttp import web
+from server import PromptServer
+from .daimao_hash_index import get_hash_index, is_lookup_hash
+from .daimao_legacy_aliases import LEGACY_ALIASES
+from .daimao_scan_jobs import get_scan_job_manager, check_scan_job_directory, SCAN_JOB_WRITE_SIDECAR_MODES
+
+# 单次批量查询允许的最大哈希数量
+MAX_BULK_LOOKUP = 10000
+
+@PromptServer.instance.routes.get('/daimao_tools/hash_lookup')
+async def hash_lookup_api(request):
+    """按SHA256或civitai AutoV2短哈希查询本地是否已有该文件，例如 ?sha256=... 或 ?autov2=..."""
+    hash_value = request.rel_url.query.get("sha256", "") or request.rel_url.query.get("autov2", "")
+    if not hash_value.strip():
+        return web.json_response({"error": "缺少参数 sha256 或 autov2"}, status=400)
+    if not is_lookup_hash(hash_value):
+        return web.json_response({"error": "哈希必须是10位AutoV2短哈希或64位SHA256"}, status=400)
+    # 首次查询会从磁盘加载索引，查询时还要stat每个记录的文件，放到线程池中执行，不阻塞事件循环
+    def lookup():
+        hash_index = get_hash_index()
+        files = hash_index.lookup(hash_value)
+        # 查询时删除了已不存在文件的记录，写回索引
+        hash_index.save()
+        return files
+
+    files = await asyncio.get_running_loop().run_in_executor(None, lookup)
+    return web.json_response({"query": hash_value, "found": bool(files), "files": files})
+
+@PromptServer.instance.routes.post('/daimao_tools/hash_lookup')
+async def hash_lookup_bulk_api(request):
+    """批量查询，请求体为 {"hashes": ["<sha256或AutoV2>", ...]}"""
+    try:
+        body = await request.json()
+    except Exception:
+        return web.json_response({"error": "请求体不是有效的JSON"}, status=400)
+    hashes = body.get("hashes") if isinstance(body, dict) else None
+    if not isinstance(hashes, list) or not all(isinstance(h, str) for h in hashes):
+        return web.json_response({"error": "hashes 必须是字符串列表"}, status=400)
+    if len(hashes) > MAX_BULK_LOOKUP:
+        return web.json_response({"error": f"单次最多查询 {MAX_BULK_LOOKUP} 个哈希"}, status=400)
+    invalid = [h for h in hashes if not is_lookup_hash(h)]
+    if invalid:
+        return web.json_response({"error": "哈希必须是10位AutoV2短哈希或64位SHA256", "invalid": invalid[:100]}, status=400)
+    def lookup_all():
+        hash_index = get_hash_index()
+        results = {}
+        for hash_value in hashes:
+            files = hash_index.lookup(hash_value)
+            results[hash_value] = {"found": bool(files), "files": files}
+        hash_index.save()
+        return results
+
+    results = await asyncio.get_running_loop().run_in_executor(None, lookup_all)
+    return web.json_response({"results": results})
+
+@PromptServer.instance.routes.post('/daimao_tools/scan_jobs')
+async def scan_job_start_api(request):
+    """启动后台查重任务，请求体为查重参数，如 {"directory_path": "...", "dedup_type": "模型文件"}"""
+    try:
+        body = await request.json()
+    except Exception:
+        return web.json_response({"error": "请求体不是有效的JSON"}, status=400)
+    if not isinstance(body, dict) or not str(body.get("directory_path", "")).strip():
+        return web.json_response({"error": "缺少参数 directory_path"}, status=400)
+    # 接口没有身份验证，不允许远程请求在任意目录中写入校验文件
+    if body.get("sidecar_mode") in SCAN_JOB_WRITE_SIDECAR_MODES:
+        return web.json_response({"error": "接口不支持写入校验文件，请在工作流中使用查重节点"}, status=400)
+    # 同样不允许扫描ComfyUI目录之外的任意路径
+    real_path, error = await asyncio.get_running_loop().run_in_executor(None, check_scan_job_directory, body["directory_path"])
+    if error:
+        return web.json_response({"error": error}, status=403)
+    job = get_scan_job_manager().start(dict(body, directory_path=real_path))
+    return web.json_response(job.to_dict())
+
+@PromptServer.instance.routes.get('/daimao_tools/scan_jobs')
+async def scan_job_list_api(request):
+    """列出所有后台查重任务"""
+    return web.json_response({"jobs": get_scan_job_manager().list()})
+
+@PromptServer.instance.routes.get('/daimao_tools/scan_jobs/{job_id}')
+async def scan_job_status_api(request):
+    """查询任务状态和进度"""
+    job = get_scan_job_manager().get(request.match_info["job_id"])
+    if job is None:
+        return web.json_response({"error": "任务不存在"}, status=404)
+    return web.json_response(job.to_dict())
+
+@PromptServer.instance.routes.post('/daimao_tools/scan_jobs/{job_id}/cancel')
+async def scan_job_cancel_api(request):
+    """取消任务"""
+    job = get_scan_job_manager().cancel(request.match_info["job_id"])
+    if job is None:
+        return web.json_response({"error": "任务不存在"}, status=404)
+    return web.json_response(job.to_dict())
+
+@PromptServer.instance.routes.get('/daimao_tools/scan_jobs/{job_id}/result')
+async def scan_job_result_api(request):
+    """获取已完成任务的查重结果"""
+    job = get_scan_job_manager().get(request.match_info["job_id"])
+    if job is None:
+        return web.json_response({"error": "任务不存在"}, status=404)
+    if job.status != "done":
+        return web.json_response(dict(job.to_dict(), error=job.error or "任务尚未完成"), status=409)
+    return web.json_response({"job_id": job.job_id, "text": job.result_text, "data": json.loads(job.result_json)})
+
+@PromptServer.instance.routes.get('/daimao_tools/legacy_aliases')
+async def legacy_aliases_api(request):
+    """旧版节点键到当前节点键的映射，前端加载旧工作流时改写节点类型"""
+    return web.json_response(LEGACY_ALIASES)
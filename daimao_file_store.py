@@ -0,0 +1,339 @@
+import os
+import json
+import shutil
+from .daimao_file_deduplicator_with_symlink import DaiMaoFileDeduplicatorWithSymlink
+from .daimao_file_finder import DaiMaoFileDuplicatesFinder
+from .daimao_file_preverify import pre_verify_duplicate_data, stat_unchanged
+from .daimao_hash_index import get_hash_index
+from .daimao_scan_index import get_host_name
+
+class DaiMaoContentStore:
+    """呆毛内容寻址存储节点，把每个唯一文件移入以哈希命名的存储目录，原路径全部替换为指向它的链接"""
+    MANIFEST_NAME = "store_manifest.json"
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "duplicate_data": ("STRING", {"default": "", "multiline": True, "input_optional": True}),
+                "store_directory": ("STRING", {"default": "", "multiline": False}),
+                "action": (["入库", "垃圾回收"], {"default": "入库"}),
+                "link_type": (["软链接", "硬链接"], {"default": "软链接"}),
+                "dry_run": (["是", "否"], {"default": "是"}),
+            },
+            "optional": {
+                "pre_verify": (["是", "否"], {"default": "是"}),
+            }
+        }
+
+    RETURN_TYPES = ("STRING",)
+    RETURN_NAMES = ("处理结果",)
+    FUNCTION = "run_store"
+    CATEGORY = "呆毛工具"
+
+    def __init__(self):
+        self.linker = DaiMaoFileDeduplicatorWithSymlink()
+        self.finder = DaiMaoFileDuplicatesFinder()
+
+    def load_manifest(self, store_directory):
+        """读取存储清单：{"blobs": {哈希: {"blob": 相对路径, "refs": [链接路径]}}}"""
+        manifest_path = os.path.join(store_directory, self.MANIFEST_NAME)
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            if isinstance(manifest, dict) and isinstance(manifest.get("blobs"), dict):
+                return manifest
+        except (OSError, json.JSONDecodeError):
+            pass
+        return {"blobs": {}}
+
+    def save_manifest(self, store_directory, manifest):
+        """原子地写回存储清单"""
+        manifest_path = os.path.join(store_directory, self.MANIFEST_NAME)
+        temp_path = manifest_path + ".temp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, manifest_path)
+
+    def blob_relpath(self, digest, file_path):
+        """存储内的相对路径：按哈希前两位分目录，并保留扩展名以便按类型扫描"""
+        ext = os.path.splitext(file_path)[1].lower()
+        return os.path.join(digest[:2], digest + ext)
+
+    def points_to_blob(self, path, blob_path):
+        """判断路径是否已经是指向存储文件的软链接或硬链接"""
+        try:
+            if os.path.islink(path):
+                return os.path.realpath(path) == os.path.realpath(blob_path)
+            return os.path.exists(path) and os.path.samefile(path, blob_path)
+        except OSError:
+            return False
+
+    def replace_with_link(self, blob_path, file_path, link_type):
+        """先在临时路径创建链接，再替换原文件，失败时保留原文件"""
+        temp_path = file_path + ".temp"
+        success, message = self.linker.create_link(blob_path, temp_path, link_type)
+        if not success:
+            return False, message
+        try:
+            os.replace(temp_path, file_path)
+        except Exception as e:
+            if os.path.lexists(temp_path):
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+            return False, f"替换失败: {file_path} - 错误: {str(e)}"
+        return True, message
+
+    def restore_source(self, blob_path, source_path):
+        """把刚移入存储的文件移回原处，返回是否成功"""
+        try:
+            if os.path.lexists(source_path):
+                os.remove(source_path)
+            shutil.move(blob_path, source_path)
+            return True
+        except Exception as e:
+            print(f"恢复原文件失败: {blob_path} -> {source_path} - 错误: {str(e)}")
+            return False
+
+    def store_source(self, digest, source_path, blob_path, link_type):
+        """
+        把源文件移入存储，校验哈希后在原处创建链接
+
+        校验失败或链接创建失败时把文件移回原处，存储中不会留下没有任何引用的文件。
+
+        Returns:
+            tuple: (是否成功, 说明)
+        """
+        try:
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            shutil.move(source_path, blob_path)
+        except Exception as e:
+            return False, f"移入存储失败: {source_path} - 错误: {str(e)}"
+
+        # 查重结果可能已经过时，移入后按存储中的实际内容重新计算一次
+        actual_hash = self.finder.calculate_sha256(blob_path)
+        if actual_hash != digest:
+            restored = self.restore_source(blob_path, source_path)
+            return False, (f"哈希不一致，已放弃此组: {source_path} 实际为 {(actual_hash or '无法读取')[:10]}..."
+                           f"{'' if restored else f'，文件仍在 {blob_path}'}")
+
+        success, message = self.linker.create_link(blob_path, source_path, link_type)
+        if not success:
+            restored = self.restore_source(blob_path, source_path)
+            return False, f"{message}，{'已把文件移回原处' if restored else f'文件仍在 {blob_path}'}"
+        return True, message
+
+    def content_matches(self, file_info, digest, hash_index):
+        """替换为链接前确认文件内容仍是该哈希：大小、修改时间和inode与报告记录一致时直接通过，否则重新计算SHA256"""
+        try:
+            stat = os.stat(file_info["path"])
+        except OSError:
+            return False
+        if stat_unchanged(file_info, stat):
+            return True
+        return self.finder.get_file_sha256(file_info["path"], hash_index) == digest
+
+    def ingest(self, data, store_directory, link_type, is_dry_run):
+        """把查重结果中的每组文件移入存储，并把所有原路径替换为链接"""
+        manifest = self.load_manifest(store_directory)
+        blobs = manifest["blobs"]
+        hash_index = get_hash_index()
+        total_linked = 0
+        total_stored = 0
+        total_freed_space = 0
+        result = f"内容寻址存储{'模拟' if is_dry_run else ''}入库结果：\n\n"
+        if data.get("directory_groups"):
+            result += f"注意：{len(data['directory_groups'])} 组重复目录不会入库，请使用去重器处理。\n\n"
+
+        for group in data["groups"]:
+            digest = group.get("hash", "")
+            result += f"处理组 {group.get('group_id', '?')} (SHA256: {digest[:10]}...):\n"
+
+            # 只有完整SHA256才能作为存储地址
+            if not group.get("verified", True) or group.get("hash_type", "sha256") != "sha256":
+                result += "  • 跳过: 此组不是经过完整校验的SHA256结果\n\n"
+                continue
+
+            # 合并索引得到的组可能包含其他主机上的文件，只处理本机文件
+            local_host = get_host_name()
+            file_infos = {}
+            for f in group.get("files", []):
+                file_info = f if isinstance(f, dict) else {"path": f}
+                if file_info.get("host", local_host) == local_host:
+                    file_infos[file_info["path"]] = file_info
+            paths = list(file_infos)
+            entry = blobs.get(digest)
+            blob_path = os.path.join(store_directory, entry["blob"]) if entry else None
+
+            # 存储中已有该内容，组内所有文件都只需替换为链接
+            if blob_path and os.path.isfile(blob_path):
+                sources = []
+            else:
+                sources = [p for p in paths if os.path.isfile(p) and not os.path.islink(p)]
+                if not sources:
+                    result += "  • 跳过: 组内没有可入库的实体文件\n\n"
+                    continue
+                entry = {"blob": self.blob_relpath(digest, sources[0]), "refs": []}
+                blob_path = os.path.join(store_directory, entry["blob"])
+                if is_dry_run:
+                    result += f"  • 将移入存储: {sources[0]} -> {blob_path}\n"
+                    result += f"  • 将创建{link_type}: {sources[0]} -> {blob_path}\n"
+                    total_linked += 1
+                else:
+                    success, message = self.store_source(digest, sources[0], blob_path, link_type)
+                    if not success:
+                        result += f"  • {message}\n\n"
+                        continue
+                    result += f"  • 已移入存储: {sources[0]} -> {blob_path}\n"
+                    result += f"  • 已创建{link_type}: {sources[0]} -> {blob_path}\n"
+                    # 源文件已经是指向存储的链接，再登记到清单，清单中不会出现没有引用的条目
+                    entry["refs"].append(sources[0])
+                    blobs[digest] = entry
+                    total_linked += 1
+                total_stored += 1
+
+            for file_path in paths:
+                if os.path.abspath(file_path) == os.path.abspath(blob_path):
+                    continue
+                if self.points_to_blob(file_path, blob_path):
+                    if not is_dry_run and file_path not in entry["refs"]:
+                        entry["refs"].append(file_path)
+                    continue
+
+                if sources and file_path == sources[0]:
+                    continue
+                try:
+                    file_size = os.path.getsize(file_path)
+                except OSError:
+                    file_size = 0
+
+                if is_dry_run:
+                    result += f"  • 将创建{link_type}: {file_path} -> {blob_path}\n"
+                    total_freed_space += file_size
+                    total_linked += 1
+                    continue
+
+                # 存储不能只依赖可选的执行前校验：每个将被替换的文件都要确认内容与存储文件相同
+                if not self.content_matches(file_infos[file_path], digest, hash_index):
+                    result += f"  • 跳过: {file_path} 的内容与SHA256 {digest[:10]}... 不一致或文件已不存在，保留原文件\n"
+                    continue
+
+                success, message = self.replace_with_link(blob_path, file_path, link_type)
+                if success:
+                    result += f"  • 已创建{link_type}: {file_path} -> {blob_path}\n"
+                    entry["refs"].append(file_path)
+                    total_freed_space += file_size
+                    total_linked += 1
+                else:
+                    result += f"  • 创建{link_type}失败: {message}\n"
+
+            result += "\n"
+
+        if not is_dry_run:
+            self.save_manifest(store_directory, manifest)
+            hash_index.save()
+
+        result += f"{'模拟' if is_dry_run else ''}入库完成，新存储 {total_stored} 个文件，{'将' if is_dry_run else '已'}创建 {total_linked} 个{link_type}，"
+        result += f"释放空间: {total_freed_space / (1024 * 1024):.2f} MB ({total_freed_space / (1024 * 1024 * 1024):.2f} GB)"
+        if is_dry_run:
+            result += "\n注意：这只是模拟结果，没有实际执行。要执行实际处理，请将'dry_run'设置为'否'。"
+        return result
+
+    def collect_garbage(self, store_directory, is_dry_run):
+        """删除已经没有任何链接指向的存储文件"""
+        manifest = self.load_manifest(store_directory)
+        blobs = manifest["blobs"]
+        total_removed = 0
+        total_freed_space = 0
+        result = f"内容寻址存储{'模拟' if is_dry_run else ''}垃圾回收结果：\n\n"
+
+        for digest in list(blobs):
+            entry = blobs[digest]
+            blob_path = os.path.join(store_directory, entry["blob"])
+            if not os.path.isfile(blob_path):
+                result += f"  • 清单记录的存储文件已不存在: {blob_path}\n"
+                if not is_dry_run:
+                    del blobs[digest]
+                continue
+
+            live_refs = [p for p in entry.get("refs", []) if self.points_to_blob(p, blob_path)]
+            if live_refs:
+                entry["refs"] = live_refs
+                continue
+
+            # 清单之外还有硬链接指向存储文件（例如清单写入前中断、或被移动过的硬链接），不能删除
+            try:
+                link_count = os.stat(blob_path).st_nlink
+            except OSError:
+                link_count = 1
+            if link_count > 1:
+                result += f"  • 保留: {blob_path} 仍有 {link_count - 1} 个清单未记录的硬链接\n"
+                continue
+
+            blob_size = os.path.getsize(blob_path)
+            if is_dry_run:
+                result += f"  • 将删除无引用的存储文件: {blob_path} ({blob_size / (1024 * 1024):.2f} MB)\n"
+            else:
+                try:
+                    os.remove(blob_path)
+                except Exception as e:
+                    result += f"  • 删除失败: {blob_path} - 错误: {str(e)}\n"
+                    continue
+                del blobs[digest]
+                result += f"  • 已删除无引用的存储文件: {blob_path} ({blob_size / (1024 * 1024):.2f} MB)\n"
+            total_removed += 1
+            total_freed_space += blob_size
+
+        if not is_dry_run:
+            self.save_manifest(store_directory, manifest)
+
+        result += f"\n垃圾回收完成，{'将' if is_dry_run else '已'}删除 {total_removed} 个存储文件，"
+        result += f"释放空间: {total_freed_space / (1024 * 1024):.2f} MB ({total_freed_space / (1024 * 1024 * 1024):.2f} GB)"
+        return result
+
+    def run_store(self, duplicate_data, store_directory, action, link_type, dry_run, pre_verify="是"):
+        """执行入库或垃圾回收"""
+        is_dry_run = dry_run == "是"
+        store_directory = store_directory.strip()
+
+        if not store_directory:
+            return ("错误：存储目录路径为空。",)
+
+        if action == "垃圾回收":
+            if not os.path.isdir(store_directory):
+                return (f"错误：存储目录 '{store_directory}' 不存在。",)
+            return (self.collect_garbage(store_directory, is_dry_run),)
+
+        if duplicate_data == "{}" or not duplicate_data:
+            return ("没有重复文件数据，请先使用呆毛文件查重节点查找重复文件。",)
+
+        try:
+            data = json.loads(duplicate_data)
+            if not data.get("groups") and not data.get("directory_groups"):
+                return ("没有找到重复文件组。",)
+            data.setdefault("groups", [])
+        except json.JSONDecodeError:
+            return ("重复文件数据格式错误，无法解析JSON。",)
+
+        # 报告可能是几小时前生成的，入库前确认文件没有变化，只对变化过的文件重新计算哈希
+        verify_report = ""
+        if pre_verify == "是":
+            data, verify_report = pre_verify_duplicate_data(data)
+
+        if not is_dry_run:
+            os.makedirs(store_directory, exist_ok=True)
+
+        return (verify_report + self.ingest(data, store_directory, link_type, is_dry_run),)
+
+
+# 节点映射
+NODE_CLASS_MAPPINGS = {
+    "呆毛内容寻址存储": DaiMaoContentStore
+}
+
+# 显示名称映射
+NODE_DISPLAY_NAME_MAPPINGS = {
+    "呆毛内容寻址存储": "呆毛内容寻址存储"
+}
@@ -0,0 +1,104 @@
+import json
+from collections import defaultdict
+from .daimao_file_finder import DaiMaoFileDuplicatesFinder
+from .daimao_hash_index import get_hash_index
+from .daimao_scan_index import get_host_name
+
+class DaiMaoFileDuplicatesVerifier:
+    """呆毛文件查重验证节点，对快速抽样得到的"可能重复"组计算完整SHA256进行确认"""
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "duplicate_data": ("STRING", {"default": "", "multiline": True, "input_optional": True}),
+            },
+        }
+
+    RETURN_TYPES = ("STRING", "STRING")
+    RETURN_NAMES = ("重复文件信息", "重复文件JSON数据")
+    FUNCTION = "verify_duplicates"
+    CATEGORY = "呆毛工具"
+
+    def __init__(self):
+        self.finder = DaiMaoFileDuplicatesFinder()
+
+    def verify_duplicates(self, duplicate_data):
+        """只对未验证的组计算完整哈希，已验证的组原样保留"""
+        if duplicate_data == "{}" or not duplicate_data:
+            return ("没有重复文件数据，请先使用呆毛文件查重节点查找重复文件。", "{}")
+
+        try:
+            data = json.loads(duplicate_data)
+            if not data.get("groups") and not data.get("directory_groups"):
+                # 查重成功但没有重复，照样输出完整的空结果，供变化报告记录
+                return ("没有找到重复文件组。", self.finder.format_duplicate_result({})[1])
+            data.setdefault("groups", [])
+        except json.JSONDecodeError:
+            return ("重复文件数据格式错误，无法解析JSON。", "{}")
+
+        # 已验证组保留原始文件信息（包括合并索引记录的host），未验证组只能对本机文件计算哈希
+        local_host = get_host_name()
+        verified_duplicates = {}
+        unverified_paths = []
+        skipped_remote = 0
+        for group in data["groups"]:
+            files = group.get("files", [])
+            if group.get("verified", True):
+                verified_duplicates[group["hash"]] = list(files)
+                first_path = files[0]["path"] if files and isinstance(files[0], dict) else (files[0] if files else None)
+                if first_path and group.get("digests"):
+                    self.finder.file_digests[first_path] = group["digests"]
+            else:
+                for f in files:
+                    if isinstance(f, dict) and f.get("host", local_host) != local_host:
+                        skipped_remote += 1
+                    else:
+                        unverified_paths.append(f["path"] if isinstance(f, dict) else f)
+
+        if skipped_remote:
+            print(f"跳过 {skipped_remote} 个其他主机上的文件，请在对应主机上验证。")
+        print(f"开始验证 {len(unverified_paths)} 个未验证文件...")
+
+        # 对未验证组中的文件计算完整SHA256，按真实哈希重新分组
+        hash_index = get_hash_index()
+        confirmed = defaultdict(list)
+        for file_path in unverified_paths:
+            file_hash = self.finder.get_file_sha256(file_path, hash_index)
+            if file_hash:
+                confirmed[file_hash].append(file_path)
+        hash_index.save()
+
+        rejected = 0
+        for hash_val, paths in confirmed.items():
+            if len(paths) > 1:
+                entries = verified_duplicates.setdefault(hash_val, [])
+                known_paths = {e["path"] if isinstance(e, dict) else e for e in entries}
+                entries.extend(p for p in paths if p not in known_paths)
+            else:
+                rejected += 1
+
+        print(f"验证完成，{rejected} 个文件经完整校验后并不重复。")
+
+        # 重复目录组已经由Merkle哈希确认，原样保留，文本中照常列出
+        directory_groups = data.get("directory_groups") or []
+        result, json_data = self.finder.format_duplicate_result(verified_duplicates, directory_groups=[
+            {"hash": g["hash"], "directories": [d["path"] for d in g["directories"]],
+             "file_count": g["file_count"], "total_size_bytes": g["total_size_bytes"]} for g in directory_groups])
+        if directory_groups:
+            json_data = json.loads(json_data)
+            json_data["directory_groups"] = directory_groups
+            json_data = json.dumps(json_data)
+        if skipped_remote:
+            result += f"\n注意：跳过了 {skipped_remote} 个其他主机上未验证的文件。"
+        return (result, json_data)
+
+
+# 节点映射
+NODE_CLASS_MAPPINGS = {
+    "呆毛文件查重验证": DaiMaoFileDuplicatesVerifier
+}
+
+# 显示名称映射
+NODE_DISPLAY_NAME_MAPPINGS = {
+    "呆毛文件查重验证": "呆毛文件查重验证"
+}
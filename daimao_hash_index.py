@@ -0,0 +1,167 @@
+import os
+import json
+import threading
+
+# 默认的索引文件位置（插件目录下，不随仓库提交）
+DEFAULT_INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "hash_index.json")
+
+# civitai AutoV2 短哈希即SHA256的前10位
+AUTOV2_LENGTH = 10
+
+
+class DaiMaoHashIndex:
+    """呆毛哈希索引，持久化记录文件路径、大小、修改时间和SHA256
+
+    查重节点用它跳过未变化文件的重复计算，HTTP接口用它按哈希O(1)查询本地是否已有某个文件。
+    """
+
+    def __init__(self, index_path=DEFAULT_INDEX_PATH):
+        self.index_path = index_path
+        self.entries = {}
+        self.by_sha256 = {}
+        self.by_autov2 = {}
+        self.lock = threading.RLock()
+        self.dirty = False
+        self.load()
+
+    def load(self):
+        """从磁盘读取索引，文件不存在或损坏时从空索引开始"""
+        with self.lock:
+            self.entries = {}
+            self.by_sha256 = {}
+            self.by_autov2 = {}
+            try:
+                with open(self.index_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                for path, entry in data.get("entries", {}).items():
+                    self._add(path, entry)
+            except (OSError, json.JSONDecodeError, AttributeError):
+                pass
+            self.dirty = False
+
+    def save(self):
+        """原子地写回索引，只在有改动时写入"""
+        with self.lock:
+            if not self.dirty:
+                return
+            temp_path = self.index_path + ".temp"
+            try:
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    json.dump({"version": 1, "entries": self.entries}, f, ensure_ascii=False)
+                os.replace(temp_path, self.index_path)
+                self.dirty = False
+            except OSError as e:
+                print(f"保存哈希索引失败: {e}")
+
+    def _add(self, path, entry):
+        sha256 = entry["sha256"]
+        self.entries[path] = entry
+        self.by_sha256.setdefault(sha256, set()).add(path)
+        self.by_autov2.setdefault(sha256[:AUTOV2_LENGTH], set()).add(sha256)
+
+    def _remove(self, path):
+        entry = self.entries.pop(path, None)
+        if not entry:
+            return
+        sha256 = entry["sha256"]
+        paths = self.by_sha256.get(sha256)
+        if paths is not None:
+            paths.discard(path)
+            if not paths:
+                del self.by_sha256[sha256]
+                digests = self.by_autov2.get(sha256[:AUTOV2_LENGTH])
+                if digests is not None:
+                    digests.discard(sha256)
+                    if not digests:
+                        del self.by_autov2[sha256[:AUTOV2_LENGTH]]
+
+    def get_digests(self, path, size, mtime_ns):
+        """大小和修改时间都与记录一致时返回缓存的全部哈希 {"sha256": ..., "blake2b": ...}，否则返回None"""
+        with self.lock:
+            entry = self.entries.get(os.path.abspath(path))
+            if entry and entry["size"] == size and entry["mtime_ns"] == mtime_ns:
+                return {key: value for key, value in entry.items() if key not in ("size", "mtime_ns")}
+            return None
+
+    def get(self, path, size, mtime_ns):
+        """大小和修改时间都与记录一致时返回缓存的SHA256，否则返回None"""
+        digests = self.get_digests(path, size, mtime_ns)
+        return digests["sha256"] if digests else None
+
+    def put(self, path, size, mtime_ns, sha256, digests=None):
+        """记录文件的哈希，digests中的其他哈希（如blake2b）一并保存，AutoV2由SHA256得出不重复保存"""
+        path = os.path.abspath(path)
+        entry = {"size": size, "mtime_ns": mtime_ns, "sha256": sha256}
+        for name, value in (digests or {}).items():
+            if name not in ("sha256", "autov2"):
+                entry[name] = value
+        with self.lock:
+            old_entry = self.entries.get(path)
+            if old_entry == entry:
+                return
+            # 同一内容已记录的其他哈希继续保留
+            if old_entry and old_entry["sha256"] == sha256 and old_entry["size"] == size:
+                entry = dict(old_entry, **entry)
+            self._remove(path)
+            self._add(path, entry)
+            self.dirty = True
+
+    def _live_files(self, sha256):
+        """返回记录中仍然存在且未被修改的文件，已删除或移走的文件同时从索引中删除（由调用方保存）"""
+        files = []
+        for path in sorted(self.by_sha256.get(sha256, ())):
+            entry = self.entries[path]
+            try:
+                stat = os.stat(path)
+            except (FileNotFoundError, NotADirectoryError):
+                self._remove(path)
+                self.dirty = True
+                continue
+            except OSError:
+                # 权限不足等其他错误不代表文件已不存在，保留记录
+                continue
+            if stat.st_size == entry["size"] and stat.st_mtime_ns == entry["mtime_ns"]:
+                files.append({"path": path, "size_bytes": entry["size"]})
+        return files
+
+    def find_by_sha256(self, sha256):
+        """按完整SHA256查询本地文件"""
+        with self.lock:
+            return self._live_files(sha256.lower())
+
+    def find_by_autov2(self, autov2):
+        """按civitai AutoV2短哈希（SHA256前10位）查询本地文件，长度不是10位时不做截断，直接返回空列表"""
+        autov2 = autov2.lower()
+        if len(autov2) != AUTOV2_LENGTH:
+            return []
+        with self.lock:
+            files = []
+            for sha256 in sorted(self.by_autov2.get(autov2, ())):
+                for file_info in self._live_files(sha256):
+                    files.append(dict(file_info, sha256=sha256))
+            return files
+
+    def lookup(self, hash_value):
+        """根据长度自动判断是完整SHA256还是AutoV2短哈希，其他长度的查询返回空列表（接口先用is_lookup_hash拒绝）"""
+        hash_value = hash_value.strip().lower()
+        if len(hash_value) == 64:
+            return [dict(f, sha256=hash_value) for f in self.find_by_sha256(hash_value)]
+        return self.find_by_autov2(hash_value)
+
+
+def is_lookup_hash(hash_value):
+    """是否为可查询的哈希：10位AutoV2短哈希或64位完整SHA256，均为十六进制"""
+    hash_value = hash_value.strip().lower()
+    return len(hash_value) in (AUTOV2_LENGTH, 64) and all(c in "0123456789abcdef" for c in hash_value)
+
+
+_HASH_INDEX = None
+_HASH_INDEX_LOCK = threading.Lock()
+
+def get_hash_index():
+    """获取进程内共享的哈希索引，首次使用时才从磁盘加载"""
+    global _HASH_INDEX
+    with _HASH_INDEX_LOCK:
+        if _HASH_INDEX is None:
+            _HASH_INDEX = DaiMaoHashIndex()
+        return _HASH_INDEX
@@ -0,0 +1,176 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+# 参与相似图片查重的图片格式
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp", ".bmp", ".tiff", ".tif", ".gif"}
+
+# 感知哈希为 8x8 = 64 位；pHash 先缩放到 32x32 再做DCT取低频 8x8
+HASH_SIZE = 8
+PHASH_IMAGE_SIZE = 32
+# 每批计算哈希的图片数量，限制一次占用的内存
+HASH_BATCH_SIZE = 4096
+
+
+def is_image_file(file_path):
+    return os.path.splitext(file_path)[1].lower() in IMAGE_EXTENSIONS
+
+
+def _dct_matrix(n):
+    """n点DCT-II正交矩阵，对整批图片用矩阵乘法做二维DCT"""
+    k = np.arange(n)[:, None]
+    x = np.arange(n)[None, :]
+    matrix = np.cos(np.pi * (2 * x + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    matrix[0] /= np.sqrt(2.0)
+    return matrix.astype(np.float32)
+
+
+_DCT_MATRIX = _dct_matrix(PHASH_IMAGE_SIZE)
+
+
+def _pack_bits(bits):
+    """把 (N, 64) 的布尔数组打包为N个Python整数"""
+    packed = np.packbits(bits.reshape(len(bits), -1), axis=1)
+    return [int(value) for value in packed.view(">u8").ravel()]
+
+
+def load_gray(file_path, algorithm):
+    """读取图片并缩放为计算哈希所需的灰度小图，无法读取时返回None"""
+    size = (HASH_SIZE + 1, HASH_SIZE) if algorithm == "dHash" else (PHASH_IMAGE_SIZE, PHASH_IMAGE_SIZE)
+    try:
+        with Image.open(file_path) as img:
+            # JPEG可在解码时直接缩小，大图也只解码一小部分像素
+            img.draft("L", (size[0] * 4, size[1] * 4))
+            img = img.convert("L").resize(size, Image.BILINEAR)
+            return np.asarray(img, dtype=np.float32)
+    except Exception as e:
+        print(f"读取图片失败 {file_path}: {e}")
+        return None
+
+
+def dhash_batch(pixels):
+    """pixels为 (N, 8, 9)，每行相邻像素比较亮度"""
+    return _pack_bits(pixels[:, :, 1:] > pixels[:, :, :-1])
+
+
+def phash_batch(pixels):
+    """pixels为 (N, 32, 32)，整批做二维DCT，取左上 8x8 低频系数与其中位数比较"""
+    coefficients = _DCT_MATRIX @ pixels @ _DCT_MATRIX.T
+    low = coefficients[:, :HASH_SIZE, :HASH_SIZE].reshape(len(pixels), -1)
+    median = np.median(low[:, 1:], axis=1, keepdims=True)
+    return _pack_bits(low > median)
+
+
+def resolve_num_workers(num_workers, file_count):
+    """0表示自动：按CPU核数决定，但不超过文件数（与批量加载图片节点相同）"""
+    if num_workers <= 0:
+        num_workers = min(32, (os.cpu_count() or 1) + 4)
+    return max(1, min(num_workers, file_count))
+
+
+def compute_image_hashes(file_list, algorithm="pHash", progress=None, num_workers=0):
+    """分批计算图片的感知哈希，返回 {路径: 64位整数}
+
+    用线程池解码图片（PIL解码时会释放GIL），每张图片处理完都会调用progress(已处理数, 总数)，
+    回调抛出异常（如取消扫描）时不再解码尚未开始的图片。
+    """
+    hash_batch = dhash_batch if algorithm == "dHash" else phash_batch
+    hashes = {}
+    total = len(file_list)
+    if total == 0:
+        return hashes
+    executor = ThreadPoolExecutor(max_workers=resolve_num_workers(num_workers, total), thread_name_prefix="daimao_hash")
+    try:
+        processed = 0
+        for start in range(0, total, HASH_BATCH_SIZE):
+            batch = file_list[start:start + HASH_BATCH_SIZE]
+            paths = []
+            pixels = []
+            for file_path, gray in zip(batch, executor.map(lambda path: load_gray(path, algorithm), batch)):
+                if gray is not None:
+                    paths.append(file_path)
+                    pixels.append(gray)
+                processed += 1
+                if progress is not None:
+                    progress(processed, total)
+            if pixels:
+                hashes.update(zip(paths, hash_batch(np.stack(pixels))))
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+    return hashes
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count("1")
+
+
+class BKTree:
+    """按汉明距离组织的BK树，查询阈值内的近邻时只访问满足三角不等式的子树"""
+
+    def __init__(self):
+        self.root = None
+
+    def add(self, value):
+        if self.root is None:
+            self.root = (value, {})
+            return
+        node = self.root
+        while True:
+            distance = hamming_distance(value, node[0])
+            if distance == 0:
+                return
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = (value, {})
+                return
+            node = child
+
+    def search(self, value, threshold):
+        """返回与value距离不超过threshold的所有值"""
+        if self.root is None:
+            return []
+        results = []
+        stack = [self.root]
+        while stack:
+            node_value, children = stack.pop()
+            distance = hamming_distance(value, node_value)
+            if distance <= threshold:
+                results.append(node_value)
+            for child_distance, child in children.items():
+                if distance - threshold <= child_distance <= distance + threshold:
+                    stack.append(child)
+        return results
+
+
+def cluster_near_duplicates(hashes, threshold):
+    """把汉明距离不超过threshold的图片聚成组（传递闭包），返回 [(代表哈希, [路径, ...]), ...]
+
+    哈希完全相同的图片先合并，只对不同的哈希值建BK树并查询一次，不做两两比较。
+    """
+    by_hash = {}
+    for file_path, value in hashes.items():
+        by_hash.setdefault(value, []).append(file_path)
+
+    parent = {value: value for value in by_hash}
+
+    def find(value):
+        while parent[value] != value:
+            parent[value] = parent[parent[value]]
+            value = parent[value]
+        return value
+
+    tree = BKTree()
+    for value in by_hash:
+        # 只需与已插入的哈希比较，每对近邻恰好被发现一次
+        for neighbor in tree.search(value, threshold):
+            root_a, root_b = find(value), find(neighbor)
+            if root_a != root_b:
+                parent[root_b] = root_a
+        tree.add(value)
+
+    clusters = {}
+    for value, paths in by_hash.items():
+        clusters.setdefault(find(value), []).extend(paths)
+    return [(root, sorted(paths)) for root, paths in clusters.items() if len(paths) > 1]
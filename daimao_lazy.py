@@ -0,0 +1,51 @@
+import sys
+import importlib
+import threading
+
+
+class LazyModule:
+    """模块代理，第一次访问属性时才真正导入模块
+
+    节点文件在导入时只创建代理，torch、cv2、scipy等较重的库要到节点第一次执行时才加载，
+    缩短ComfyUI启动时加载本插件的时间。
+    """
+
+    def __init__(self, name):
+        self.__dict__["_lazy_name"] = name
+        self.__dict__["_lazy_module"] = None
+        self.__dict__["_lazy_lock"] = threading.Lock()
+
+    def _load(self):
+        module = self.__dict__["_lazy_module"]
+        if module is None:
+            with self.__dict__["_lazy_lock"]:
+                module = self.__dict__["_lazy_module"]
+                if module is None:
+                    module = importlib.import_module(self.__dict__["_lazy_name"])
+                    self.__dict__["_lazy_module"] = module
+        return module
+
+    def __getattr__(self, attr):
+        value = getattr(self._load(), attr)
+        # 缓存到代理自身，之后的访问不再经过__getattr__
+        self.__dict__[attr] = value
+        return value
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+        self.__dict__[attr] = value
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "已加载" if self.__dict__["_lazy_module"] is not None else "未加载"
+        return f"<LazyModule '{self.__dict__['_lazy_name']}' ({state})>"
+
+
+def lazy_import(name):
+    """返回模块本身（已导入时）或延迟导入的代理，用法与 import 相同：np = lazy_import("numpy")"""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return LazyModule(name)
@@ -0,0 +1,13 @@
+# 旧版节点键到当前节点键的映射 {别名: 节点键}，由插件__init__在合并节点映射后填充。
+# 前端扩展加载工作流时据此把旧键改写为当前键，旧键不必再注册为节点，/object_info 中不会出现重复定义。
+LEGACY_ALIASES = {}
+
+
+def collect_legacy_aliases(node_class_mappings):
+    """从各节点类的SEARCH_ALIASES收集别名，已经是节点键的别名不收集"""
+    aliases = {}
+    for key, node_class in node_class_mappings.items():
+        for alias in getattr(node_class, "SEARCH_ALIASES", []):
+            if alias not in node_class_mappings and alias not in aliases:
+                aliases[alias] = key
+    return aliases
@@ -0,0 +1,60 @@
+import os
+import json
+import time
+import socket
+import zlib
+
+# 扫描索引文件格式：第一行为头信息，之后每行一个文件 [大小, SHA256, 路径]
+SCAN_INDEX_FORMAT = "daimao_scan_index"
+SCAN_INDEX_VERSION = 1
+
+
+def get_host_name():
+    """当前主机名，用于区分不同机器导出的索引"""
+    return socket.gethostname()
+
+
+def in_shard(file_path, root, shard_index, shard_count):
+    """按相对路径的CRC32把文件稳定地分配到分片，同一棵目录树可拆给多个进程分别扫描"""
+    if shard_count <= 1:
+        return True
+    relpath = os.path.relpath(file_path, root).replace(os.sep, "/")
+    return zlib.crc32(relpath.encode("utf-8")) % shard_count == shard_index
+
+
+def export_scan_index(index_path, records, root, shard_index=0, shard_count=1, host=None):
+    """导出扫描索引，records为 (大小, SHA256, 路径) 的可迭代对象，返回写入的文件数"""
+    header = {
+        "format": SCAN_INDEX_FORMAT,
+        "version": SCAN_INDEX_VERSION,
+        "host": host or get_host_name(),
+        "root": os.path.abspath(root),
+        "shard": [shard_index, shard_count],
+        "created_at": time.time(),
+    }
+    index_dir = os.path.dirname(os.path.abspath(index_path))
+    os.makedirs(index_dir, exist_ok=True)
+    count = 0
+    temp_path = index_path + ".temp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(header, ensure_ascii=False) + "\n")
+        for size, sha256, path in records:
+            f.write(json.dumps([size, sha256, path], ensure_ascii=False) + "\n")
+            count += 1
+    os.replace(temp_path, index_path)
+    return count
+
+
+def read_scan_index(index_path):
+    """读取扫描索引，返回 (头信息, [(大小, SHA256, 路径), ...])，格式不符时抛出ValueError"""
+    with open(index_path, "r", encoding="utf-8") as f:
+        header = json.loads(f.readline() or "{}")
+        if header.get("format") != SCAN_INDEX_FORMAT:
+            raise ValueError(f"不是呆毛扫描索引文件: {index_path}")
+        records = []
+        for line in f:
+            line = line.strip()
+            if line:
+                size, sha256, path = json.loads(line)
+                records.append((size, sha256, path))
+    return header, records
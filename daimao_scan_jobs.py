@@ -0,0 +1,194 @@
+import os
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# 后台同时运行的扫描任务数量，以及保留的已结束任务数量
+MAX_RUNNING_JOBS = 1
+MAX_FINISHED_JOBS = 20
+
+# 允许通过接口传入的查重参数及默认值
+# export_index_path会在任意路径写入文件，不开放给接口；需要导出扫描索引时请在工作流中使用查重节点
+SCAN_JOB_DEFAULTS = {
+    "directory_path": "",
+    "dedup_type": "模型文件",
+    "size_threshold_mb": 100.0,
+    "scan_mode": "完整校验",
+    "sample_blocks": 8,
+    "use_hash_cache": "是",
+    "sidecar_mode": "读取",
+    "image_hash": "pHash",
+    "hamming_threshold": 6,
+    "include_patterns": "",
+    "exclude_patterns": "",
+    "exclude_dirs": ".git,__pycache__,temp",
+    "min_size_mb": 0.0,
+    "max_size_mb": 0.0,
+    "modified_after": "",
+    "modified_before": "",
+    "shard_index": 0,
+    "shard_count": 1,
+    "detect_duplicate_dirs": "否",
+}
+
+# 接口不允许的sidecar_mode：写入模式会在扫描目录中为每个文件创建校验文件
+SCAN_JOB_WRITE_SIDECAR_MODES = ("读取并写入",)
+
+# 接口只允许扫描ComfyUI的预设目录（输入、输出、临时、模型目录及其上一级）之内的目录，
+# 其他目录可以用此环境变量追加，多个目录用系统路径分隔符（Linux为":"，Windows为";"）分隔
+SCAN_JOB_ROOTS_ENV = "DAIMAO_SCAN_JOB_ROOTS"
+
+
+def get_scan_job_roots():
+    """接口允许扫描的根目录（已解析链接的真实路径）"""
+    from .daimao_file_finder import get_preset_dirs
+
+    roots = [path for path in get_preset_dirs() if path]
+    roots += [path.strip() for path in os.environ.get(SCAN_JOB_ROOTS_ENV, "").split(os.pathsep) if path.strip()]
+    return [os.path.realpath(path) for path in roots]
+
+
+def check_scan_job_directory(directory_path):
+    """
+    检查接口传入的扫描目录是否在允许的根目录之内（解析链接和".."后比较）
+
+    Returns:
+        tuple: (真实路径, 错误信息)，允许时错误信息为None
+    """
+    real_path = os.path.realpath(str(directory_path).strip())
+    for root in get_scan_job_roots():
+        try:
+            if os.path.commonpath([real_path, root]) == root:
+                return real_path, None
+        except ValueError:
+            # Windows上不同驱动器的路径无法比较
+            continue
+    return real_path, f"目录 '{directory_path}' 不在允许扫描的目录之内，可以用环境变量 {SCAN_JOB_ROOTS_ENV} 添加"
+
+
+class DaiMaoScanJob:
+    """一次后台查重扫描任务"""
+
+    def __init__(self, params):
+        self.job_id = uuid.uuid4().hex
+        self.params = params
+        self.status = "pending"  # pending / running / done / cancelled / error
+        self.processed = 0
+        self.total = 0
+        self.result_text = None
+        self.result_json = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+
+    def to_dict(self):
+        """任务状态摘要（不含结果内容）"""
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "params": self.params,
+            "processed": self.processed,
+            "total": self.total,
+            "percent": (self.processed / self.total * 100) if self.total else 0.0,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class DaiMaoScanJobManager:
+    """在后台线程池中运行查重扫描，避免阻塞ComfyUI的提示词队列"""
+
+    def __init__(self, max_workers=MAX_RUNNING_JOBS):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="daimao_scan")
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    def start(self, params):
+        """创建并提交任务，未知参数会被忽略"""
+        job_params = dict(SCAN_JOB_DEFAULTS)
+        for key in SCAN_JOB_DEFAULTS:
+            if key in params:
+                job_params[key] = params[key]
+        job = DaiMaoScanJob(job_params)
+        with self.lock:
+            self.jobs[job.job_id] = job
+            self._trim_finished()
+        self.executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def list(self):
+        with self.lock:
+            return [job.to_dict() for job in self.jobs.values()]
+
+    def cancel(self, job_id):
+        """请求取消任务，排队中的任务不会再开始，运行中的任务在处理下一个文件前停止"""
+        job = self.get(job_id)
+        if job is None:
+            return None
+        job.cancel_event.set()
+        if job.status == "pending":
+            job.status = "cancelled"
+            job.finished_at = time.time()
+        return job
+
+    def _trim_finished(self):
+        finished = [job for job in self.jobs.values() if job.finished_at is not None]
+        finished.sort(key=lambda job: job.finished_at)
+        for job in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job.job_id]
+
+    def _run(self, job):
+        from .daimao_file_finder import DaiMaoFileDuplicatesFinder, ScanCancelledError
+
+        if job.cancel_event.is_set():
+            return
+        job.status = "running"
+
+        def on_progress(processed, total):
+            job.processed = processed
+            job.total = total
+
+        finder = DaiMaoFileDuplicatesFinder()
+        finder.progress_callback = on_progress
+        finder.cancel_event = job.cancel_event
+        params = job.params
+        try:
+            job.result_text, job.result_json = finder.find_duplicate_files(
+                params["directory_path"], "", params["dedup_type"], float(params["size_threshold_mb"]), "否",
+                scan_mode=params["scan_mode"], sample_blocks=int(params["sample_blocks"]),
+                use_hash_cache=params["use_hash_cache"], sidecar_mode=params["sidecar_mode"],
+                image_hash=params["image_hash"], hamming_threshold=int(params["hamming_threshold"]),
+                include_patterns=params["include_patterns"], exclude_patterns=params["exclude_patterns"],
+                exclude_dirs=params["exclude_dirs"], min_size_mb=float(params["min_size_mb"]),
+                max_size_mb=float(params["max_size_mb"]), modified_after=params["modified_after"],
+                modified_before=params["modified_before"], shard_index=int(params["shard_index"]),
+                shard_count=int(params["shard_count"]), detect_duplicate_dirs=params["detect_duplicate_dirs"],
+            )
+            job.status = "done"
+        except ScanCancelledError:
+            job.status = "cancelled"
+        except Exception as e:
+            print(f"后台查重任务 {job.job_id} 失败: {e}")
+            job.error = str(e)
+            job.status = "error"
+        finally:
+            job.finished_at = time.time()
+
+
+_JOB_MANAGER = None
+_JOB_MANAGER_LOCK = threading.Lock()
+
+def get_scan_job_manager():
+    """获取进程内共享的后台任务管理器"""
+    global _JOB_MANAGER
+    with _JOB_MANAGER_LOCK:
+        if _JOB_MANAGER is None:
+            _JOB_MANAGER = DaiMaoScanJobManager()
+        return _JOB_MANAGER
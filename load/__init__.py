@@ -4,17 +4,20 @@
 """
 
 from .batch_load_images_node import BatchLoadImagesNode
+from .batch_load_images_list_node import BatchLoadImagesListNode
 from .batch_save_images_node import BatchSaveImagesNode
 
 # 节点类映射
 NODE_CLASS_MAPPINGS = {
     "BatchLoadImagesNode": BatchLoadImagesNode,
+    "BatchLoadImagesListNode": BatchLoadImagesListNode,
     "BatchSaveImagesNode": BatchSaveImagesNode,
 }
 
 # 节点显示名称映射
 NODE_DISPLAY_NAME_MAPPINGS = {
     "BatchLoadImagesNode": "批量加载图片",
+    "BatchLoadImagesListNode": "批量加载图片（列表）",
     "BatchSaveImagesNode": "批量储存图片",
 }
 
@@ -0,0 +1,48 @@
+from .batch_load_images_node import BatchLoadImagesNode, torch, np
+from .padding import fill_batch_background, apply_batch_padding
+
+
+class BatchLoadImagesListNode(BatchLoadImagesNode):
+    """批量加载图片（列表）节点，每张图片保持自己的尺寸，以图片列表输出
+
+    批量加载图片节点会把所有图片填充到目录中的最大尺寸，一张8K图片混在512像素的图片中时，
+    每张图片都要分配8K大小。本节点不做统一尺寸的填充，边缘填充只加在每张图片自己的四周，
+    内存只与实际像素数成正比。下游节点会对列表中的每张图片分别执行一次。
+    """
+    SEARCH_ALIASES = ["BatchLoadImagesList", "LoadImagesAsList", "图片列表加载"]
+
+    OUTPUT_IS_LIST = (True, False, False, False, False)
+    DISPLAY_NAME = "批量加载图片（列表）"
+
+    def build_images(self, headers, paddings, padding_mode, padding_color, workers, failed_files, decoded=None):
+        """
+        逐张解码并在各自四周填充，返回 (图片tensor列表, 成功加载的headers序号列表, None)
+        """
+        padding_top, padding_bottom, padding_left, padding_right = paddings
+        images = [None] * len(headers)
+
+        def decode(index):
+            file_path, img_width, img_height, img_mode, scaled, packed_pixels = headers[index]
+            # 每张图片单独决定通道数，带透明通道的图片或透明填充时为RGBA
+            channels = 4 if padding_mode == "transparent" or self.has_alpha(img_mode) else 3
+            canvas = np.empty((1, img_height + padding_top + padding_bottom, img_width + padding_left + padding_right, channels), dtype=np.uint8)
+            fill_batch_background(canvas, padding_mode, padding_color)
+            placement = (padding_top, padding_left, img_height, img_width)
+            self.paste_image(canvas[0], file_path, placement, scaled, packed_pixels, decoded)
+            apply_batch_padding(canvas, [placement], paddings, padding_mode)
+            images[index] = torch.from_numpy(canvas).to(torch.float32).div_(255.0)
+
+        print("第二遍：逐张解码图片并在各自四周填充...")
+        loaded_indices = self.run_decode(decode, headers, workers, failed_files)
+        if not loaded_indices:
+            return None, loaded_indices, None
+
+        images = [images[index] for index in loaded_indices]
+        total_mb = sum(image.numel() * image.element_size() for image in images) / (1024 * 1024)
+        print(f"成功加载 {len(images)} 张图片，共约 {total_mb:.1f} MB")
+        return images, loaded_indices, None
+
+    def empty_result(self, message, total_count=0, next_index=-1):
+        """没有加载到图片时的返回值，图片输出同样为列表"""
+        result = super().empty_result(message, total_count, next_index)
+        return ([result[0]],) + result[1:]
@@ -1,11 +1,27 @@
 import os
-import torch
-import numpy as np
-from PIL import Image
-import glob
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from ..daimao_lazy import lazy_import
+from .image_cache import get_image_cache
+from .padding import PADDING_MODES, fill_batch_background, apply_batch_padding
+from .image_pack import pack_path, files_fingerprint, load_image_pack, write_image_pack, get_pack_limit, prune_image_packs
+torch = lazy_import("torch")
+np = lazy_import("numpy")
+Image = lazy_import("PIL.Image")
+
+# 文件列表缓存：循环工作流分页读取大目录时，不必每页都重新列出并排序整个目录
+LISTING_CACHE_SIZE = 16
+_listing_cache = OrderedDict()
+_listing_cache_lock = threading.Lock()
+
+# 自然排序时把文件名拆分为数字和文本
+NATURAL_SORT_SPLIT = re.compile(r'(\d+)')
 
 class BatchLoadImagesNode:
     """批量加载图片节点，读取指定目录下的全部图片并按原尺寸输出"""
+    SEARCH_ALIASES = ["BatchLoadImages", "LoadImagesFromDir", "DirectoryImageLoader", "批量加载", "目录图片", "加载目录"]
     
     @classmethod
     def INPUT_TYPES(cls):
@@ -18,20 +34,32 @@ class BatchLoadImagesNode:
                 "padding_bottom": ("INT", {"default": 0, "min": 0, "max": 1000, "step": 1, "description": "底部填充像素"}),
                 "padding_left": ("INT", {"default": 0, "min": 0, "max": 1000, "step": 1, "description": "左侧填充像素"}),
                 "padding_right": ("INT", {"default": 0, "min": 0, "max": 1000, "step": 1, "description": "右侧填充像素"}),
-                "padding_mode": (["solid_color", "transparent", "edge_extend", "mirror"], {"default": "solid_color", "description": "填充模式"}),
+                "padding_mode": (PADDING_MODES, {"default": "solid_color", "description": "填充模式"}),
                 "padding_color": ("STRING", {"default": "#000000", "description": "填充颜色（十六进制，如#FF0000表示红色）"}),
+            },
+            "optional": {
+                "num_workers": ("INT", {"default": 0, "min": 0, "max": 64, "step": 1, "description": "并行解码的线程数，0表示自动，1表示逐张解码"}),
+                "start_index": ("INT", {"default": 0, "min": 0, "max": 10000000, "step": 1, "description": "从排序后的第几个文件开始加载（从0开始）；分块模式下为块序号"}),
+                "max_images": ("INT", {"default": 0, "min": 0, "max": 100000, "step": 1, "description": "本次最多加载的图片数量，0表示全部；分块模式下为每块的数量"}),
+                "chunk_mode": (["否", "是"], {"default": "否", "description": "分块模式：起始序号按块计算，第n块加载第n*max_images个文件起的max_images张图片"}),
+                "target_width": ("INT", {"default": 0, "min": 0, "max": 16384, "step": 1, "description": "目标宽度，0表示不限制"}),
+                "target_height": ("INT", {"default": 0, "min": 0, "max": 16384, "step": 1, "description": "目标高度，0表示不限制"}),
+                "fit_mode": (["等比缩小", "等比缩放", "拉伸"], {"default": "等比缩小", "description": "缩放方式：等比缩小只缩小超出目标尺寸的图片，等比缩放也会放大较小的图片，拉伸直接缩放到目标尺寸"}),
+                "pack_cache": (["否", "是"], {"default": "否", "description": "把解码后的像素打包为一个文件，目录未变化时再次加载直接内存映射，不解码图片"}),
             }
         }
 
-    RETURN_TYPES = ("IMAGE", "STRING", "STRING")
-    RETURN_NAMES = ("图片列表", "文件信息", "文件名称列表")
+    RETURN_TYPES = ("IMAGE", "STRING", "STRING", "INT", "INT")
+    RETURN_NAMES = ("图片列表", "文件信息", "文件名称列表", "文件总数", "下一起始序号")
     FUNCTION = "load_images"
     CATEGORY = "呆毛工具"
     DISPLAY_NAME = "批量加载图片"
 
     def load_images(self, directory_path, file_extensions="jpg,jpeg,png,bmp,tiff", recursive=False, 
                    padding_top=0, padding_bottom=0, padding_left=0, padding_right=0, 
-                   padding_mode="solid_color", padding_color="#000000"):
+                   padding_mode="solid_color", padding_color="#000000", num_workers=0,
+                   start_index=0, max_images=0, chunk_mode="否",
+                   target_width=0, target_height=0, fit_mode="等比缩小", pack_cache="否"):
         """
         读取指定目录下的全部图片
         
@@ -45,9 +73,18 @@ class BatchLoadImagesNode:
             padding_right: 右侧填充像素
             padding_mode: 填充模式
             padding_color: 填充颜色（十六进制格式，如#FF0000）
+            num_workers: 并行解码的线程数，0表示自动
+            start_index: 起始序号（分块模式下为块序号）
+            max_images: 最多加载的图片数量，0表示全部
+            chunk_mode: 是否为分块模式
+            target_width: 目标宽度，0表示不限制
+            target_height: 目标高度，0表示不限制
+            fit_mode: 缩放方式
+            pack_cache: 是否使用打包缓存
             
         Returns:
-            tuple: (images_tensor, file_info, file_names) - 图片tensor列表、文件信息和文件名列表
+            tuple: (images_tensor, file_info, file_names, total_count, next_index)
+                - 图片tensor列表、文件信息、文件名列表、目录中的文件总数、下一次的起始序号（已加载完时为-1）
         """
         try:
             # 解析填充颜色
@@ -57,7 +94,7 @@ class BatchLoadImagesNode:
             # 检查目录路径是否为空
             if not directory_path or not directory_path.strip():
                 print("目录路径为空")
-                return (torch.zeros(0, 100, 100, 3), "目录路径为空", "[]")
+                return self.empty_result("目录路径为空")
             
             # 去除路径前后的空白字符
             directory_path = directory_path.strip()
@@ -65,7 +102,7 @@ class BatchLoadImagesNode:
             # 检查目录是否存在
             if not os.path.isdir(directory_path):
                 print(f"目录不存在: {directory_path}")
-                return (torch.zeros(0, 100, 100, 3), f"目录不存在: {directory_path}", "[]")
+                return self.empty_result(f"目录不存在: {directory_path}")
             
             print(f"正在搜索目录: {directory_path}")
             print(f"目录绝对路径: {os.path.abspath(directory_path)}")
@@ -77,32 +114,8 @@ class BatchLoadImagesNode:
             
             print(f"支持的图片格式: {extensions}")
             
-            # 构建搜索模式
-            search_patterns = []
-            for ext in extensions:
-                if ext.startswith('.'):
-                    search_patterns.append(f"**/*{ext}")
-                else:
-                    search_patterns.append(f"**/*.{ext}")
-            
-            # 搜索图片文件
-            image_files = []
-            for ext in extensions:
-                if recursive:
-                    # 递归搜索
-                    search_path = os.path.join(directory_path, f"**/*.{ext}")
-                    files = glob.glob(search_path, recursive=True)
-                    print(f"递归搜索 {ext}: {search_path} -> 找到 {len(files)} 个文件")
-                else:
-                    # 仅搜索当前目录
-                    search_path = os.path.join(directory_path, f"*.{ext}")
-                    files = glob.glob(search_path)
-                    print(f"当前目录搜索 {ext}: {search_path} -> 找到 {len(files)} 个文件")
-                
-                image_files.extend(files)
-            
-            # 去重并排序
-            image_files = sorted(list(set(image_files)), key=self.natural_sort_key)
+            # 列出并排序文件，目录未变化时直接使用缓存的列表
+            image_files = self.list_image_files(directory_path, extensions, recursive)
             print(f"去重后总文件数: {len(image_files)}")
             
             # 显示排序后的文件列表（前10个）
@@ -122,116 +135,272 @@ class BatchLoadImagesNode:
                         print(f"... 还有 {len(all_files) - 20} 个文件")
                 except Exception as e:
                     print(f"无法列出目录内容: {e}")
-                return (torch.zeros(0, 100, 100, 3), f"未找到支持的图片文件，支持的格式: {', '.join(extensions)}", "[]")
+                return self.empty_result(f"未找到支持的图片文件，支持的格式: {', '.join(extensions)}")
             
             print(f"找到 {len(image_files)} 个图片文件")
             
-            # 加载所有图片
-            images = []
-            loaded_count = 0
-            failed_files = []
-            max_width = 0
-            max_height = 0
-            image_info_list = []  # 存储图片信息和尺寸
+            # 按起始序号和数量截取本次要加载的文件
+            total_count = len(image_files)
+            if chunk_mode == "是" and max_images > 0:
+                start = start_index * max_images
+            else:
+                start = start_index
+            end = min(total_count, start + max_images) if max_images > 0 else total_count
+            if start >= total_count:
+                print(f"起始序号超出范围: 第{start}个，共{total_count}个文件")
+                return self.empty_result(f"起始序号超出范围: 第{start}个，共{total_count}个文件", total_count)
+            if end < total_count:
+                next_index = start_index + 1 if chunk_mode == "是" and max_images > 0 else end
+            else:
+                next_index = -1
+            image_files = image_files[start:end]
+            if start > 0 or end < total_count:
+                print(f"本次加载第 {start + 1}-{end} 个文件，共 {total_count} 个，下一起始序号: {next_index}")
             
-            # 第一遍：加载所有图片并计算最大尺寸
-            print("第一遍：加载图片并计算最大尺寸...")
-            for file_path in image_files:
-                try:
-                    # 检查文件是否为图片
-                    if not self.is_image_file(file_path, extensions):
-                        continue
-                    
-                    # 加载图片
-                    image = self.load_single_image(file_path)
-                    if image is not None:
-                        # 记录图片信息
-                        img_height, img_width = image.shape[1], image.shape[2]
-                        img_channels = image.shape[3] if len(image.shape) == 4 else 1
-                        image_info = {
-                            'tensor': image,
-                            'path': file_path,
-                            'original_size': (img_height, img_width),
-                            'channels': img_channels
-                        }
-                        image_info_list.append(image_info)
-                        
-                        # 更新最大尺寸
-                        max_height = max(max_height, img_height)
-                        max_width = max(max_width, img_width)
-                        
-                        channel_info = f"({img_channels}通道)" if img_channels != 3 else ""
-                        print(f"加载图片: {os.path.basename(file_path)} - 尺寸: {img_width}x{img_height} {channel_info}")
-                    else:
+            workers = self.resolve_num_workers(num_workers, len(image_files))
+            failed_files = []
+            headers = []
+            
+            # 打包缓存：文件列表指纹一致时直接内存映射打包文件，跳过读取文件头和解码
+            packed = None
+            if pack_cache == "是":
+                pack_params = [os.path.abspath(directory_path), sorted(extensions), bool(recursive), start, end, target_width, target_height, fit_mode]
+                image_pack_path = pack_path(pack_params)
+                fingerprint = files_fingerprint(image_files, pack_params)
+                packed = load_image_pack(image_pack_path, fingerprint)
+                if packed is not None:
+                    packed_entries, failed_files = packed
+                    failed_files = list(failed_files)
+                    print(f"目录未变化，从打包缓存加载 {len(packed_entries)} 张图片: {image_pack_path}")
+                    headers = [(file_path, pixels.shape[1], pixels.shape[0], mode, False, pixels)
+                               for file_path, mode, pixels in packed_entries]
+                else:
+                    print("打包缓存不存在或目录已变化，重新解码")
+            
+            # 第一遍：只读取文件头获取尺寸和模式，不解码像素
+            if packed is None:
+                print(f"第一遍：读取图片尺寸（{workers} 个线程）...")
+                for file_path, header, error in self.map_files(self.probe_image, image_files, workers):
+                    if error is not None:
+                        print(f"读取图片信息失败 {file_path}: {error}")
                         failed_files.append(file_path)
-                        
-                except Exception as e:
-                    print(f"加载图片失败 {file_path}: {e}")
-                    failed_files.append(file_path)
-            
-            if not image_info_list:
+                        continue
+                    img_width, img_height, img_mode = header
+                    # 按目标尺寸计算输出尺寸，需要缩放时解码阶段直接按此尺寸解码
+                    fitted_size = self.fit_size(img_width, img_height, target_width, target_height, fit_mode)
+                    scaled = fitted_size != (img_width, img_height)
+                    img_width, img_height = fitted_size
+                    headers.append((file_path, img_width, img_height, img_mode, scaled, None))
+            
+            if not headers:
                 print("没有成功加载任何图片")
-                return (torch.zeros(0, 100, 100, 3), "没有成功加载任何图片", "[]")
+                return self.empty_result("没有成功加载任何图片", total_count, next_index)
             
-            print(f"计算得到最大尺寸: {max_width}x{max_height}")
-            
-            # 应用边缘填充，计算最终目标尺寸
-            final_width = max_width + padding_left + padding_right
-            final_height = max_height + padding_top + padding_bottom
-            print(f"应用边缘填充后的最终尺寸: {final_width}x{final_height}")
+            if target_width or target_height:
+                print(f"目标尺寸: {target_width or '不限'}x{target_height or '不限'}，缩放方式: {fit_mode}")
             print(f"填充设置: 上{padding_top}, 下{padding_bottom}, 左{padding_left}, 右{padding_right}")
             print(f"填充模式: {padding_mode}")
             
-            # 第二遍：创建统一尺寸的背景图片并居中放置
-            print("第二遍：创建统一尺寸的背景图片...")
-            for img_info in image_info_list:
-                try:
-                    # 创建带边缘填充的背景图片
-                    background = self.create_padded_image(
-                        img_info['tensor'], 
-                        final_width, final_height, 
-                        max_width, max_height,
-                        padding_top, padding_bottom, padding_left, padding_right,
-                        padding_mode, padding_color_rgb
-                    )
-                    if background is not None:
-                        images.append(background)
-                        loaded_count += 1
-                        print(f"成功处理: {os.path.basename(img_info['path'])} - 从 {img_info['original_size'][1]}x{img_info['original_size'][0]} 调整到 {final_width}x{final_height}")
-                    else:
-                        failed_files.append(img_info['path'])
-                        
-                except Exception as e:
-                    print(f"处理图片失败 {img_info['path']}: {e}")
-                    failed_files.append(img_info['path'])
+            # 第二遍：解码图片并完成填充
+            paddings = (padding_top, padding_bottom, padding_left, padding_right)
+            # 需要写入打包缓存时记录解码得到的像素，打包直接使用，不再重新解码
+            decoded = {} if pack_cache == "是" and packed is None else None
+            images_output, loaded_indices, output_size = self.build_images(headers, paddings, padding_mode, padding_color_rgb, workers, failed_files, decoded)
             
-            if not images:
+            if not loaded_indices:
                 print("没有成功处理任何图片")
-                return (torch.zeros(0, 100, 100, 3), "没有成功处理任何图片", "[]")
+                return self.empty_result("没有成功处理任何图片", total_count, next_index)
             
-            # 将所有图片合并为一个tensor
-            try:
-                images_tensor = torch.cat(images, dim=0)
-                print(f"成功合并 {len(images)} 张图片，总尺寸: {images_tensor.shape}")
-            except Exception as e:
-                print(f"合并图片tensor失败: {e}")
-                # 如果合并失败，返回第一张图片
-                print("返回第一张图片作为备选方案")
-                images_tensor = images[0]
+            loaded_count = len(loaded_indices)
+            image_info_list = [{'path': headers[index][0]} for index in loaded_indices]
+            print(f"解码缓存: {get_image_cache().describe()}")
+            
+            if pack_cache == "是" and packed is None:
+                self.write_pack(image_pack_path, fingerprint, [headers[index] for index in loaded_indices], decoded, failed_files)
             
             # 生成文件信息
-            file_info = self.generate_file_info(directory_path, loaded_count, len(image_files), failed_files, extensions, (final_height, final_width), (padding_top, padding_bottom, padding_left, padding_right), padding_mode)
+            file_info = self.generate_file_info(directory_path, loaded_count, len(image_files), failed_files, extensions, output_size, paddings, padding_mode,
+                                                (start, end, total_count, next_index))
+            if target_width or target_height:
+                file_info += f"目标尺寸: {target_width or '不限'}x{target_height or '不限'}，缩放方式: {fit_mode}\n"
+            if pack_cache == "是":
+                file_info += f"打包缓存: {'命中' if packed is not None else '已重新生成'}\n"
             
             # 生成文件名称列表（JSON格式，便于后续节点使用）
             file_names = self.generate_file_names_list(image_info_list)
             
-            return (images_tensor, file_info, file_names)
+            return (images_output, file_info, file_names, total_count, next_index)
             
         except Exception as e:
             print(f"批量加载图片时发生错误: {e}")
             import traceback
             traceback.print_exc()
-            return (torch.zeros(0, 100, 100, 3), f"加载失败: {str(e)}", "[]")
+            return self.empty_result(f"加载失败: {str(e)}")
+    
+    def build_images(self, headers, paddings, padding_mode, padding_color, workers, failed_files, decoded=None):
+        """
+        把所有图片填充到统一尺寸后合并为一个批次
+        
+        Args:
+            headers: [(路径, 输出宽, 输出高, 颜色模式, 是否缩放, 打包缓存中的像素或None), ...]
+            paddings: (上, 下, 左, 右) 填充像素
+            padding_mode: 填充模式
+            padding_color: 填充颜色 (r, g, b)
+            workers: 解码线程数
+            failed_files: 解码失败的文件追加到此列表
+            decoded: 不为None时记录每个文件解码得到的像素 {路径: uint8数组}
+            
+        Returns:
+            tuple: (图片tensor, 成功加载的headers序号列表, 输出尺寸 (高, 宽))
+        """
+        padding_top, padding_bottom, padding_left, padding_right = paddings
+        max_width = max(header[1] for header in headers)
+        max_height = max(header[2] for header in headers)
+        print(f"计算得到最大尺寸: {max_width}x{max_height}")
+        
+        # 应用边缘填充，计算最终目标尺寸
+        final_width = max_width + padding_left + padding_right
+        final_height = max_height + padding_top + padding_bottom
+        print(f"应用边缘填充后的最终尺寸: {final_width}x{final_height}")
+        
+        # 有任一图片带透明通道或使用透明填充时，整批输出RGBA，否则输出RGB
+        channels = 4 if padding_mode == "transparent" or any(self.has_alpha(header[3]) for header in headers) else 3
+        
+        # 预分配整批uint8缓冲并一次填充背景，每张图片直接解码到自己的位置，解码和填充都在uint8上完成，最后统一转换为float32
+        batch = np.empty((len(headers), final_height, final_width, channels), dtype=np.uint8)
+        print(f"预分配缓冲: {batch.shape}，约 {batch.nbytes / (1024 * 1024):.1f} MB（输出约 {batch.nbytes * 4 / (1024 * 1024):.1f} MB）")
+        fill_batch_background(batch, padding_mode, padding_color)
+        
+        # 每张图片居中放置在内容区域内的位置 (y, x, 高, 宽)
+        placements = [(padding_top + (max_height - img_height) // 2, padding_left + (max_width - img_width) // 2, img_height, img_width)
+                      for _, img_width, img_height, _, _, _ in headers]
+        
+        print("第二遍：解码图片并放置到统一尺寸...")
+        
+        def fill_slot(index):
+            file_path, _, _, _, scaled, packed_pixels = headers[index]
+            self.paste_image(batch[index], file_path, placements[index], scaled, packed_pixels, decoded)
+        
+        loaded_indices = self.run_decode(fill_slot, headers, workers, failed_files, f"{final_width}x{final_height}")
+        if not loaded_indices:
+            return None, loaded_indices, None
+        
+        # 文件头可读但解码失败的图片留下了空位，把后面的图片前移，不额外复制整批数据
+        loaded_count = len(loaded_indices)
+        if loaded_count < len(headers):
+            for target, source in enumerate(loaded_indices):
+                if target != source:
+                    batch[target] = batch[source]
+        
+        # 整批一次完成边缘扩展或镜像填充
+        apply_batch_padding(batch[:loaded_count], [placements[index] for index in loaded_indices], paddings, padding_mode)
+        
+        # 整批只转换一次：分配float32输出后原地归一化到0-1
+        images_tensor = torch.from_numpy(batch[:loaded_count]).to(torch.float32).div_(255.0)
+        print(f"成功加载 {loaded_count} 张图片，总尺寸: {images_tensor.shape}")
+        return images_tensor, loaded_indices, (final_height, final_width)
+    
+    def run_decode(self, decode, headers, workers, failed_files, size_text=None):
+        """并行执行decode(序号)，返回成功的序号列表，失败的文件追加到failed_files"""
+        loaded_indices = []
+        for index, _, error in self.map_files(decode, range(len(headers)), workers):
+            file_path, img_width, img_height, img_mode, _, _ = headers[index]
+            if error is not None:
+                print(f"加载图片失败 {file_path}: {error}")
+                failed_files.append(file_path)
+                continue
+            loaded_indices.append(index)
+            channel_info = f"({img_mode})" if img_mode != "RGB" else ""
+            target_text = f" - 从 {img_width}x{img_height} 调整到 {size_text}" if size_text else f" - {img_width}x{img_height}"
+            print(f"成功处理: {os.path.basename(file_path)} {channel_info}{target_text}")
+        return loaded_indices
+    
+    def empty_result(self, message, total_count=0, next_index=-1):
+        """没有加载到图片时的返回值"""
+        return (torch.zeros(0, 100, 100, 3), message, "[]", total_count, next_index)
+    
+    def list_image_files(self, directory_path, extensions, recursive):
+        """
+        列出目录中的图片文件并按自然顺序排序
+        
+        结果按 (目录, 扩展名, 是否递归) 缓存，同时记录扫描到的每个目录的修改时间；
+        增删或重命名文件都会改变所在目录的修改时间，再次调用时只需逐个stat这些目录，全部未变化就直接返回缓存，
+        分页读取大目录或网络存储上的目录时不必每次都重新列出和排序。
+        
+        Returns:
+            list: 排序后的文件路径列表
+        """
+        extension_set = frozenset(ext.lstrip('.') for ext in extensions)
+        key = (os.path.abspath(directory_path), extension_set, bool(recursive))
+        with _listing_cache_lock:
+            cached = _listing_cache.get(key)
+        if cached is not None and self.directories_unchanged(cached[0]):
+            with _listing_cache_lock:
+                if key in _listing_cache:
+                    _listing_cache.move_to_end(key)
+            print(f"目录未变化，使用缓存的文件列表（{len(cached[1])} 个文件）")
+            return cached[1]
+        
+        image_files, directory_mtimes = self.scan_image_files(directory_path, extension_set, recursive)
+        print(f"{'递归' if recursive else '当前目录'}扫描 {len(directory_mtimes)} 个目录 -> 找到 {len(image_files)} 个文件")
+        
+        # 排序键每个文件只计算一次，文件名相同时按完整路径排序
+        image_files = [file_path for _, file_path in sorted((self.natural_sort_key(file_path), file_path) for file_path in image_files)]
+        
+        with _listing_cache_lock:
+            _listing_cache[key] = (directory_mtimes, image_files)
+            _listing_cache.move_to_end(key)
+            while len(_listing_cache) > LISTING_CACHE_SIZE:
+                _listing_cache.popitem(last=False)
+        return image_files
+    
+    def scan_image_files(self, directory_path, extension_set, recursive):
+        """
+        用os.scandir一次遍历目录，按小写扩展名匹配图片文件（.JPG、.PNG等大写扩展名同样匹配）
+        
+        与glob一致，跳过以.开头的隐藏文件和目录；递归时跟随指向目录的符号链接，但不会重复进入同一个目录。
+        
+        Returns:
+            tuple: (文件路径列表, {目录路径: 修改时间})
+        """
+        image_files = []
+        directory_mtimes = {}
+        visited = set()
+        stack = [directory_path]
+        while stack:
+            current = stack.pop()
+            try:
+                stat = os.stat(current)
+                if (stat.st_dev, stat.st_ino) in visited:
+                    continue
+                visited.add((stat.st_dev, stat.st_ino))
+                directory_mtimes[current] = stat.st_mtime_ns
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        if entry.name.startswith('.'):
+                            continue
+                        try:
+                            if recursive and entry.is_dir():
+                                stack.append(entry.path)
+                                continue
+                            extension = os.path.splitext(entry.name)[1][1:].lower()
+                            if extension in extension_set and entry.is_file():
+                                image_files.append(entry.path)
+                        except OSError:
+                            continue
+            except OSError as e:
+                print(f"无法读取目录 {current}: {e}")
+        return image_files, directory_mtimes
+    
+    def directories_unchanged(self, directory_mtimes):
+        """缓存记录的每个目录修改时间都没有变化"""
+        for directory, mtime_ns in directory_mtimes.items():
+            try:
+                if os.stat(directory).st_mtime_ns != mtime_ns:
+                    return False
+            except OSError:
+                return False
+        return True
     
     def parse_hex_color(self, hex_color):
         """
@@ -267,66 +436,60 @@ class BatchLoadImagesNode:
             print(f"解析颜色失败 {hex_color}: {e}，使用默认黑色")
             return (0.0, 0.0, 0.0)
     
-    def is_image_file(self, file_path, extensions):
-        """检查文件是否为支持的图片格式"""
-        try:
-            file_ext = os.path.splitext(file_path)[1].lower()
-            if file_ext.startswith('.'):
-                file_ext = file_ext[1:]
-            
-            # 检查扩展名是否在支持列表中
-            is_supported = file_ext in extensions
-            
-            # 调试信息
-            if not is_supported:
-                print(f"文件 {os.path.basename(file_path)} 扩展名 {file_ext} 不在支持列表中: {extensions}")
-            
-            return is_supported
-        except Exception as e:
-            print(f"检查文件扩展名时出错 {file_path}: {e}")
-            return False
+    def resolve_num_workers(self, num_workers, file_count):
+        """0表示自动：按CPU核数决定，但不超过文件数"""
+        if num_workers <= 0:
+            num_workers = min(32, (os.cpu_count() or 1) + 4)
+        return max(1, min(num_workers, file_count))
     
-    def load_single_image(self, image_path):
+    def map_files(self, func, items, num_workers):
         """
-        加载单张图片
+        用线程池对每一项执行func（PIL解码和numpy运算时会释放GIL）
         
-        Args:
-            image_path: 图片文件路径
-            
         Returns:
-            tensor: 图片tensor，格式为 (1, H, W, C)，如果加载失败返回None
+            list: [(项, 返回值或None, 异常或None), ...]，顺序与输入一致
         """
-        try:
-            # 使用PIL加载图片
-            image = Image.open(image_path)
-            
-            # 检查图片模式并处理
-            if image.mode == 'RGBA':
-                # 保持RGBA模式，支持透明通道
-                print(f"检测到RGBA图片: {os.path.basename(image_path)}")
-            elif image.mode == 'LA':
-                # 灰度+透明通道，转换为RGBA
-                image = image.convert('RGBA')
-                print(f"转换LA图片为RGBA: {os.path.basename(image_path)}")
-            elif image.mode == 'P':
-                # 调色板模式，转换为RGBA以保持透明信息
-                image = image.convert('RGBA')
-                print(f"转换P图片为RGBA: {os.path.basename(image_path)}")
-            elif image.mode != 'RGB':
-                # 其他模式转换为RGB
-                image = image.convert('RGB')
-            
-            # 转换为numpy数组
-            np_image = np.array(image).astype(np.float32) / 255.0
-            
-            # 转换为tensor并添加batch维度
-            tensor = torch.from_numpy(np_image).unsqueeze(0)
-            
-            return tensor
-            
-        except Exception as e:
-            print(f"加载单张图片失败 {image_path}: {e}")
-            return None
+        def run(item):
+            try:
+                return item, func(item), None
+            except Exception as e:
+                return item, None, e
+        
+        if num_workers <= 1:
+            return [run(item) for item in items]
+        with ThreadPoolExecutor(max_workers=num_workers, thread_name_prefix="daimao_load") as executor:
+            return list(executor.map(run, items))
+    
+    def probe_image(self, image_path):
+        """
+        只读取文件头获取图片尺寸和模式，Image.open不会解码像素数据
+        
+        Returns:
+            tuple: (宽, 高, 模式)
+        """
+        with Image.open(image_path) as image:
+            return image.size[0], image.size[1], image.mode
+    
+    def fit_size(self, width, height, target_width, target_height, fit_mode):
+        """
+        按目标尺寸和缩放方式计算输出尺寸，目标宽高为0的方向不限制
+        
+        Returns:
+            tuple: (宽, 高)
+        """
+        if not target_width and not target_height:
+            return width, height
+        if fit_mode == "拉伸":
+            return target_width or width, target_height or height
+        scale = min(target_width / width if target_width else float("inf"),
+                    target_height / height if target_height else float("inf"))
+        if fit_mode == "等比缩小":
+            scale = min(scale, 1.0)
+        return max(1, round(width * scale)), max(1, round(height * scale))
+    
+    def has_alpha(self, mode):
+        """RGBA、灰度+透明通道和调色板图片加载为RGBA以保留透明信息"""
+        return mode in ("RGBA", "LA", "P", "PA")
     
     def natural_sort_key(self, file_path):
         """
@@ -338,14 +501,12 @@ class BatchLoadImagesNode:
         Returns:
             tuple: 排序键，支持数字和文本混合排序
         """
-        import re
-        
         # 提取文件名（不含路径）
         filename = os.path.basename(file_path)
         
         # 使用正则表达式分割文件名，将数字和文本分开
         # 例如: "image_10.jpg" -> ["image_", "10", ".jpg"]
-        parts = re.split(r'(\d+)', filename)
+        parts = NATURAL_SORT_SPLIT.split(filename)
         
         # 转换排序键
         sort_key = []
@@ -359,252 +520,79 @@ class BatchLoadImagesNode:
         
         return sort_key
     
-    def create_padded_image(self, image_tensor, final_width, final_height, content_width, content_height,
-                           padding_top, padding_bottom, padding_left, padding_right, padding_mode, padding_color):
+    def paste_image(self, canvas, image_path, placement, scaled, packed_pixels=None, decoded=None):
         """
-        创建一个带边缘填充的图片，将输入图片居中放置在内容区域
+        把图片直接解码到预分配的画布上
         
         Args:
-            image_tensor: 输入图片tensor，格式为 (1, H, W, C)
-            final_width: 最终输出宽度（包含填充）
-            final_height: 最终输出高度（包含填充）
-            content_width: 内容区域宽度（不包含填充）
-            content_height: 内容区域高度（不包含填充）
-            padding_top/bottom/left/right: 各方向填充像素
-            padding_mode: 填充模式
-            padding_color: 填充颜色 (r, g, b)
-            
-        Returns:
-            tensor: 带填充的图片tensor，如果失败返回None
-        """
-        try:
-            # 确保输入tensor是 (1, H, W, C) 格式
-            if len(image_tensor.shape) == 4:
-                image_tensor = image_tensor.squeeze(0)
-            
-            # 获取输入图片的尺寸和通道数
-            input_height, input_width = image_tensor.shape[0], image_tensor.shape[1]
-            channels = image_tensor.shape[2] if len(image_tensor.shape) == 3 else 1
-            
-            # 创建最终输出图片
-            final_image = self.create_background(final_height, final_width, channels, padding_mode, padding_color)
-            
-            # 计算内容区域在最终图片中的位置
-            content_start_x = padding_left
-            content_start_y = padding_top
-            
-            # 计算输入图片在内容区域中的居中位置
-            center_x = content_start_x + (content_width - input_width) // 2
-            center_y = content_start_y + (content_height - input_height) // 2
-            
-            # 将输入图片复制到最终图片的指定位置
-            final_image[center_y:center_y + input_height, center_x:center_x + input_width, :] = image_tensor.cpu().numpy()
-            
-            # 应用特殊的填充效果
-            if padding_mode == "edge_extend":
-                final_image = self.apply_edge_extend_padding(final_image, center_x, center_y, input_width, input_height, 
-                                                           padding_left, padding_right, padding_top, padding_bottom)
-            elif padding_mode == "mirror":
-                final_image = self.apply_mirror_padding(final_image, center_x, center_y, input_width, input_height,
-                                                       padding_left, padding_right, padding_top, padding_bottom)
-            
-            # 转换回 tensor
-            result_tensor = torch.from_numpy(final_image).unsqueeze(0)
-            
-            return result_tensor
-            
-        except Exception as e:
-            print(f"创建填充图片失败: {e}")
-            import traceback
-            traceback.print_exc()
-            return None
-    
-    def create_background(self, height, width, channels, padding_mode, padding_color):
+            canvas: 批次缓冲中该图片的位置，uint8 numpy数组 (H, W, C)，原地写入
+            image_path: 图片文件路径
+            placement: 图片在画布中的位置和输出尺寸 (y, x, 高, 宽)
+            scaled: 是否需要缩放到输出尺寸
+            packed_pixels: 打包缓存中的像素，有时直接复制，不解码
+            decoded: 不为None时把解码得到的像素记录到此字典，键为文件路径
         """
-        创建背景图片
+        y, x, image_height, image_width = placement
+        region = canvas[y:y + image_height, x:x + image_width, :]
         
-        Args:
-            height: 图片高度
-            width: 图片宽度
-            channels: 通道数
-            padding_mode: 填充模式
-            padding_color: 填充颜色 (r, g, b)
-            
-        Returns:
-            numpy array: 背景图片
-        """
-        if padding_mode == "transparent":
-            # 透明背景
-            if channels == 4:
-                background = np.zeros((height, width, 4), dtype=np.float32)
-                background[:, :, 3] = 0.0  # 完全透明
-            elif channels == 3:
-                # RGB转RGBA以支持透明
-                background = np.zeros((height, width, 4), dtype=np.float32)
-                background[:, :, 3] = 0.0
-                channels = 4
-            else:
-                background = np.zeros((height, width, channels), dtype=np.float32)
-        elif padding_mode == "solid_color":
-            # 纯色背景 - 使用指定的填充颜色
-            if channels == 4:
-                background = np.full((height, width, 4), [padding_color[0], padding_color[1], padding_color[2], 1.0], dtype=np.float32)
-            elif channels == 3:
-                background = np.full((height, width, 3), [padding_color[0], padding_color[1], padding_color[2]], dtype=np.float32)
-            elif channels == 1:
-                # 灰度：使用RGB的平均值
-                gray_value = sum(padding_color) / 3.0
-                background = np.full((height, width, 1), gray_value, dtype=np.float32)
-            else:
-                background = np.zeros((height, width, channels), dtype=np.float32)
-        else:
-            # 其他模式（edge_extend、mirror）：使用填充颜色作为初始背景
-            # 这样可以确保填充区域和扩展区域使用相同的颜色
-            if channels == 4:
-                background = np.full((height, width, 4), [padding_color[0], padding_color[1], padding_color[2], 1.0], dtype=np.float32)
-            elif channels == 3:
-                background = np.full((height, width, 3), [padding_color[0], padding_color[1], padding_color[2]], dtype=np.float32)
-            elif channels == 1:
-                # 灰度：使用RGB的平均值
-                gray_value = sum(padding_color) / 3.0
-                background = np.full((height, width, 1), gray_value, dtype=np.float32)
-            else:
-                background = np.zeros((height, width, channels), dtype=np.float32)
+        if packed_pixels is not None:
+            # 打包时RGB图片只保存3个通道，放入RGBA画布时透明通道为不透明
+            region[..., :packed_pixels.shape[2]] = packed_pixels
+            if packed_pixels.shape[2] < canvas.shape[2]:
+                region[..., 3] = 255
+            return
         
-        return background
-    
-    def apply_edge_extend_padding(self, image, center_x, center_y, img_width, img_height, 
-                                 padding_left, padding_right, padding_top, padding_bottom):
-        """
-        应用边缘扩展填充效果
-        """
-        try:
-            # 上边缘扩展
-            if padding_top > 0:
-                top_edge = image[center_y:center_y+1, center_x:center_x+img_width, :]
-                for i in range(padding_top):
-                    image[center_y-1-i:center_y-i, center_x:center_x+img_width, :] = top_edge
-            
-            # 下边缘扩展
-            if padding_bottom > 0:
-                bottom_edge = image[center_y+img_height-1:center_y+img_height, center_x:center_x+img_width, :]
-                for i in range(padding_bottom):
-                    image[center_y+img_height+i:center_y+img_height+i+1, center_x:center_x+img_width, :] = bottom_edge
-            
-            # 左边缘扩展
-            if padding_left > 0:
-                left_edge = image[center_y-padding_top:center_y+img_height+padding_bottom, center_x:center_x+1, :]
-                for i in range(padding_left):
-                    image[center_y-padding_top:center_y+img_height+padding_bottom, center_x-1-i:center_x-i, :] = left_edge
-            
-            # 右边缘扩展
-            if padding_right > 0:
-                right_edge = image[center_y-padding_top:center_y+img_height+padding_bottom, center_x+img_width-1:center_x+img_width, :]
-                for i in range(padding_right):
-                    image[center_y-padding_top:center_y+img_height+padding_bottom, center_x+img_width+i:center_x+img_width+i+1, :] = right_edge
-            
-            return image
-        except Exception as e:
-            print(f"边缘扩展填充失败: {e}")
-            return image
+        # 通过共享的解码缓存读取（需要缩小时在解码阶段直接缩小），同一文件再次加载时只需复制像素
+        pixels = get_image_cache().load(image_path, "RGBA" if canvas.shape[2] == 4 else "RGB",
+                                        (image_width, image_height) if scaled else None)
+        if pixels.shape[:2] != (image_height, image_width):
+            raise ValueError(f"解码后的尺寸 {pixels.shape[1]}x{pixels.shape[0]} 与预期 {image_width}x{image_height} 不一致")
+        
+        region[...] = pixels
+        if decoded is not None:
+            decoded[image_path] = pixels
     
-    def apply_mirror_padding(self, image, center_x, center_y, img_width, img_height,
-                           padding_left, padding_right, padding_top, padding_bottom):
-        """
-        应用镜像填充效果
+    def write_pack(self, image_pack_path, fingerprint, headers, decoded, failed_files):
         """
-        try:
-            # 上镜像
-            if padding_top > 0:
-                mirror_height = min(padding_top, img_height)
-                source = image[center_y:center_y+mirror_height, center_x:center_x+img_width, :]
-                target = image[center_y-mirror_height:center_y, center_x:center_x+img_width, :]
-                target[:] = np.flipud(source)
-            
-            # 下镜像
-            if padding_bottom > 0:
-                mirror_height = min(padding_bottom, img_height)
-                source = image[center_y+img_height-mirror_height:center_y+img_height, center_x:center_x+img_width, :]
-                target = image[center_y+img_height:center_y+img_height+mirror_height, center_x:center_x+img_width, :]
-                target[:] = np.flipud(source)
-            
-            # 左镜像
-            if padding_left > 0:
-                mirror_width = min(padding_left, img_width)
-                source = image[center_y-padding_top:center_y+img_height+padding_bottom, center_x:center_x+mirror_width, :]
-                target = image[center_y-padding_top:center_y+img_height+padding_bottom, center_x-mirror_width:center_x, :]
-                target[:] = np.fliplr(source)
-            
-            # 右镜像
-            if padding_right > 0:
-                mirror_width = min(padding_right, img_width)
-                source = image[center_y-padding_top:center_y+img_height+padding_bottom, center_x+img_width-mirror_width:center_x+img_width, :]
-                target = image[center_y-padding_top:center_y+img_height+padding_bottom, center_x+img_width:center_x+img_width+mirror_width, :]
-                target[:] = np.fliplr(source)
-            
-            return image
-        except Exception as e:
-            print(f"镜像填充失败: {e}")
-            return image
-
-    def create_centered_image(self, image_tensor, target_width, target_height):
-        """
-        创建一个统一尺寸的背景图片，并将输入图片居中放置
+        把本次解码得到的像素写入打包缓存，带透明通道的图片保存为RGBA，其他保存为RGB
         
-        Args:
-            image_tensor: 输入图片tensor，格式为 (1, H, W, C)
-            target_width: 目标宽度
-            target_height: 目标高度
-            
-        Returns:
-            tensor: 居中后的图片tensor，如果失败返回None
+        不带透明通道的图片放在RGBA批次中时按RGBA解码，透明通道恒为不透明，打包时只保存前3个通道。
+        打包目录超过 DAIMAO_IMAGE_PACK_MB 时删除最久未使用的打包；写入失败只打印提示，不影响本次输出。
         """
+        entries = []
+        for file_path, _, _, img_mode, _, _ in headers:
+            pixels = decoded.get(file_path)
+            if pixels is None:
+                continue
+            mode = "RGBA" if self.has_alpha(img_mode) else "RGB"
+            entries.append((file_path, mode, pixels if mode == "RGBA" else pixels[..., :3]))
+        
+        max_bytes = get_pack_limit()
+        data_size = sum(pixels.nbytes for _, _, pixels in entries)
+        if max_bytes and data_size > max_bytes:
+            print(f"打包数据 {data_size / (1024 * 1024):.1f} MB 超过打包目录上限 {max_bytes / (1024 * 1024):.0f} MB，不写入打包缓存")
+            return
+        
         try:
-            # 确保输入tensor是 (1, H, W, C) 格式
-            if len(image_tensor.shape) == 4:
-                image_tensor = image_tensor.squeeze(0)
-            
-            # 获取输入图片的尺寸和通道数
-            input_height, input_width = image_tensor.shape[0], image_tensor.shape[1]
-            channels = image_tensor.shape[2] if len(image_tensor.shape) == 3 else 1
-            
-            # 根据通道数创建背景
-            if channels == 4:
-                # RGBA图片，创建透明背景
-                background = np.zeros((target_height, target_width, 4), dtype=np.float32)
-                # 设置透明通道为0（完全透明）
-                background[:, :, 3] = 0.0
-            elif channels == 3:
-                # RGB图片，创建黑色背景
-                background = np.zeros((target_height, target_width, 3), dtype=np.float32)
-            elif channels == 1:
-                # 灰度图片，创建黑色背景
-                background = np.zeros((target_height, target_width, 1), dtype=np.float32)
-            else:
-                # 其他情况，创建默认背景
-                background = np.zeros((target_height, target_width, channels), dtype=np.float32)
-            
-            # 计算居中位置
-            x_offset = (target_width - input_width) // 2
-            y_offset = (target_height - input_height) // 2
-            
-            # 将输入图片复制到背景图片的居中位置
-            background[y_offset:y_offset + input_height, x_offset:x_offset + input_width, :] = image_tensor.cpu().numpy()
-            
-            # 转换回tensor
-            centered_tensor = torch.from_numpy(background).unsqueeze(0)
-            
-            return centered_tensor
-            
+            data_size = write_image_pack(image_pack_path, fingerprint, entries, failed_files)
+            print(f"已写入打包缓存: {image_pack_path}（{data_size / (1024 * 1024):.1f} MB）")
         except Exception as e:
-            print(f"创建居中图片失败: {e}")
-            return None
+            print(f"写入打包缓存失败 {image_pack_path}: {e}")
+            return
+        removed = prune_image_packs(max_bytes, keep_path=image_pack_path)
+        if removed:
+            print(f"打包目录超过上限，已删除 {removed} 个最久未使用的打包文件")
     
-    def generate_file_info(self, directory_path, loaded_count, total_found, failed_files, extensions, target_size, padding_info=None, padding_mode=None):
+    def generate_file_info(self, directory_path, loaded_count, total_found, failed_files, extensions, target_size, padding_info=None, padding_mode=None, page_info=None):
         """生成文件信息字符串"""
         info = f"目录: {directory_path}\n"
         info += f"支持的格式: {', '.join(extensions)}\n"
         info += f"找到文件数: {total_found}\n"
+        
+        if page_info and (page_info[0] > 0 or page_info[1] < page_info[2]):
+            start, end, total_count, next_index = page_info
+            info += f"加载范围: 第{start + 1}-{end}个，共{total_count}个\n"
+            info += f"下一起始序号: {next_index}\n" if next_index >= 0 else "已加载到最后一个文件\n"
         info += f"成功加载: {loaded_count}\n"
         
         if failed_files:
@@ -618,6 +606,8 @@ class BatchLoadImagesNode:
         if target_size:
             info += f"最终尺寸: {target_size[1]}x{target_size[0]}\n"
         
+        info += f"解码缓存: {get_image_cache().describe()}\n"
+        
         if padding_info and any(padding_info):
             info += f"边缘填充: 上{padding_info[0]}, 下{padding_info[1]}, 左{padding_info[2]}, 右{padding_info[3]}\n"
             if padding_mode:
@@ -1,12 +1,14 @@
 import os
-import torch
-import numpy as np
-from PIL import Image
 import json
 import re
+from ..daimao_lazy import lazy_import
+torch = lazy_import("torch")
+np = lazy_import("numpy")
+Image = lazy_import("PIL.Image")
 
 class BatchSaveImagesNode:
     """批量储存图片节点，支持重命名功能"""
+    SEARCH_ALIASES = ["BatchSaveImages", "SaveImagesToDir", "ImageSaver", "批量保存", "保存图片", "图片保存"]
     
     @classmethod
     def INPUT_TYPES(cls):
@@ -0,0 +1,144 @@
+import os
+import threading
+from collections import OrderedDict
+from ..daimao_lazy import lazy_import
+np = lazy_import("numpy")
+Image = lazy_import("PIL.Image")
+
+# 解码缓存的内存上限（MB），可用环境变量 DAIMAO_IMAGE_CACHE_MB 设置，0表示不缓存
+# 默认值较小，只够缓存一个常用的参考目录；需要反复加载大目录时再调大
+DEFAULT_IMAGE_CACHE_MB = 256
+
+
+class DecodedImageCache:
+    """进程内共享的已解码图片LRU缓存
+
+    以 (路径, 修改时间, 文件大小, 颜色模式, 输出尺寸) 为键缓存解码后的uint8像素，文件被修改或替换后键随之变化，
+    旧条目不再命中并按LRU顺序淘汰。缓存的数组是只读的，使用方需要复制后再修改。
+    批量加载图片和文件存在检查节点共用同一个缓存，每次执行都重新加载同一目录时只需复制内存，不必重新解码。
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def load(self, image_path, mode, size=None):
+        """
+        读取图片并转换为指定模式，命中缓存时直接返回缓存的数组
+
+        Args:
+            image_path: 图片文件路径
+            mode: 颜色模式，如"RGB"、"RGBA"
+            size: 输出尺寸 (宽, 高)，None表示原尺寸
+
+        Returns:
+            numpy数组: uint8 (H, W, C)，只读
+        """
+        stat = os.stat(image_path)
+        key = (os.path.abspath(image_path), stat.st_mtime_ns, stat.st_size, mode, size)
+        with self.lock:
+            pixels = self.entries.get(key)
+            if pixels is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return pixels
+            self.misses += 1
+
+        # 解码在锁外进行，多个线程可以同时解码不同的图片
+        with Image.open(image_path) as image:
+            pixels = np.asarray(decode_image(image, mode, size))
+        pixels.setflags(write=False)
+        self.put(key, pixels)
+        return pixels
+
+    def put(self, key, pixels):
+        """加入缓存并淘汰最久未使用的条目，超过整个缓存上限的图片不缓存"""
+        if pixels.nbytes > self.max_bytes:
+            return
+        with self.lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.total_bytes -= previous.nbytes
+            self.entries[key] = pixels
+            self.total_bytes += pixels.nbytes
+            while self.total_bytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.total_bytes -= evicted.nbytes
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+
+    def stats(self):
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def describe(self):
+        """缓存状态说明，用于节点的文件信息输出"""
+        stats = self.stats()
+        if stats['max_bytes'] == 0:
+            return "未启用（可用环境变量 DAIMAO_IMAGE_CACHE_MB 设置上限）"
+        return (f"{stats['entries']} 张图片，{stats['bytes'] / (1024 * 1024):.1f}/{stats['max_bytes'] / (1024 * 1024):.0f} MB，"
+                f"命中 {stats['hits']} 次，未命中 {stats['misses']} 次，淘汰 {stats['evictions']} 次（上限可用环境变量 DAIMAO_IMAGE_CACHE_MB 调整）")
+
+
+def decode_image(image, mode, size=None):
+    """
+    解码图片并转换为指定模式和尺寸
+
+    缩小时先在解码阶段降低分辨率：JPEG用draft在DCT域按1/2、1/4、1/8解码，其他格式先用reduce按整数倍做区域平均，
+    剩下不到2倍的差距再用LANCZOS缩放到精确尺寸，比完整解码后再缩放快得多，内存也只需要缩小后的大小。
+
+    Args:
+        image: 已打开、尚未解码的PIL图片
+        mode: 颜色模式
+        size: 输出尺寸 (宽, 高)，None表示原尺寸
+
+    Returns:
+        PIL图片
+    """
+    if size is not None and size != image.size and image.format == "JPEG":
+        image.draft(None, size)
+    if image.mode != mode:
+        image = image.convert(mode)
+    if size is None or size == image.size:
+        image.load()
+        return image
+    factor_x = max(1, image.size[0] // (size[0] * 2))
+    factor_y = max(1, image.size[1] // (size[1] * 2))
+    if factor_x > 1 or factor_y > 1:
+        image = image.reduce((factor_x, factor_y))
+    return image.resize(size, Image.Resampling.LANCZOS)
+
+
+_image_cache = None
+_image_cache_lock = threading.Lock()
+
+
+def get_image_cache():
+    """返回进程内共享的解码缓存，第一次调用时按环境变量 DAIMAO_IMAGE_CACHE_MB 确定内存上限"""
+    global _image_cache
+    if _image_cache is None:
+        with _image_cache_lock:
+            if _image_cache is None:
+                try:
+                    max_mb = float(os.environ.get("DAIMAO_IMAGE_CACHE_MB", DEFAULT_IMAGE_CACHE_MB))
+                except ValueError:
+                    print(f"DAIMAO_IMAGE_CACHE_MB 不是有效的数字，使用默认值 {DEFAULT_IMAGE_CACHE_MB} MB")
+                    max_mb = DEFAULT_IMAGE_CACHE_MB
+                _image_cache = DecodedImageCache(int(max(0.0, max_mb) * 1024 * 1024))
+    return _image_cache
@@ -0,0 +1,169 @@
+import os
+import json
+import struct
+import hashlib
+from ..daimao_lazy import lazy_import
+np = lazy_import("numpy")
+
+# 打包文件保存在插件目录下，不写入图片目录（写入会改变图片目录的修改时间，也可能没有写权限）
+DEFAULT_PACKS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "image_packs")
+
+# 打包目录的总大小上限（MB），可用环境变量 DAIMAO_IMAGE_PACK_MB 设置，0表示不限制
+DEFAULT_IMAGE_PACK_MB = 8192
+
+# 文件末尾的定位信息：魔数、索引偏移、索引长度
+PACK_MAGIC = b"DMPACK01"
+PACK_TRAILER = struct.Struct("<8sQQ")
+
+
+def pack_path(key_parts, packs_dir=DEFAULT_PACKS_DIR):
+    """按目录和加载参数生成打包文件路径"""
+    digest = hashlib.sha256(json.dumps(key_parts, ensure_ascii=False).encode("utf-8")).hexdigest()[:32]
+    return os.path.join(packs_dir, f"{digest}.pack")
+
+
+def files_fingerprint(file_paths, params):
+    """
+    文件列表的指纹：每个文件的路径、大小和修改时间，以及影响解码结果的参数
+
+    增删、重命名或修改任何一个文件都会改变指纹。无法stat的文件也记入指纹，文件恢复后同样会改变。
+    """
+    digest = hashlib.sha256(json.dumps(params, ensure_ascii=False).encode("utf-8"))
+    for file_path in file_paths:
+        try:
+            stat = os.stat(file_path)
+            digest.update(f"{file_path}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode("utf-8", "surrogateescape"))
+        except OSError:
+            digest.update(f"{file_path}\0missing\n".encode("utf-8", "surrogateescape"))
+    return digest.hexdigest()
+
+
+def read_pack_index(path):
+    """读取打包文件末尾的索引，文件不存在或格式不对时返回None"""
+    try:
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            file_size = f.tell()
+            if file_size < PACK_TRAILER.size:
+                return None
+            f.seek(file_size - PACK_TRAILER.size)
+            magic, index_offset, index_length = PACK_TRAILER.unpack(f.read(PACK_TRAILER.size))
+            if magic != PACK_MAGIC or index_offset + index_length + PACK_TRAILER.size != file_size:
+                return None
+            f.seek(index_offset)
+            index = json.loads(f.read(index_length).decode("utf-8"))
+            index["data_size"] = index_offset
+            return index
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"读取图片打包索引失败 {path}: {e}")
+        return None
+
+
+def load_image_pack(path, fingerprint):
+    """
+    指纹一致时以内存映射方式打开打包文件，不解码任何图片
+
+    Returns:
+        tuple: ([(路径, 颜色模式, 只读uint8数组 (H, W, C)), ...], 失败文件列表)；打包不存在或已失效时返回None
+    """
+    index = read_pack_index(path)
+    if index is None or index.get("fingerprint") != fingerprint:
+        return None
+    # 更新修改时间，清理打包目录时按最近使用的顺序保留
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    if index["data_size"] == 0:
+        return [], index.get("failed", [])
+    data = np.memmap(path, dtype=np.uint8, mode="r", shape=(index["data_size"],))
+    entries = []
+    for entry in index["entries"]:
+        height, width, channels = entry["shape"]
+        pixels = data[entry["offset"]:entry["offset"] + height * width * channels].reshape(height, width, channels)
+        entries.append((entry["path"], entry["mode"], pixels))
+    return entries, index.get("failed", [])
+
+
+def write_image_pack(path, fingerprint, entries, failed_files):
+    """
+    把解码后的uint8像素依次写入打包文件，最后写入索引（偏移、形状、文件路径）和定位信息
+
+    先写入临时文件再替换，写入过程中出错不会留下损坏的打包文件。
+
+    Args:
+        path: 打包文件路径
+        fingerprint: 文件列表指纹
+        entries: 可迭代的 (路径, 颜色模式, uint8数组 (H, W, C))
+        failed_files: 加载失败的文件，下次直接报告
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.temp"
+    index_entries = []
+    offset = 0
+    try:
+        with open(temp_path, "wb") as f:
+            for file_path, mode, pixels in entries:
+                pixels = np.ascontiguousarray(pixels, dtype=np.uint8)
+                f.write(memoryview(pixels).cast("B"))
+                index_entries.append({"path": file_path, "mode": mode, "offset": offset, "shape": list(pixels.shape)})
+                offset += pixels.nbytes
+            index = json.dumps({"fingerprint": fingerprint, "entries": index_entries, "failed": list(failed_files)},
+                               ensure_ascii=False).encode("utf-8")
+            f.write(index)
+            f.write(PACK_TRAILER.pack(PACK_MAGIC, offset, len(index)))
+        os.replace(temp_path, path)
+    except Exception:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    return offset
+
+
+def get_pack_limit():
+    """打包目录的总大小上限（字节），0表示不限制"""
+    try:
+        max_mb = float(os.environ.get("DAIMAO_IMAGE_PACK_MB", DEFAULT_IMAGE_PACK_MB))
+    except ValueError:
+        print(f"DAIMAO_IMAGE_PACK_MB 不是有效的数字，使用默认值 {DEFAULT_IMAGE_PACK_MB} MB")
+        max_mb = DEFAULT_IMAGE_PACK_MB
+    return int(max(0.0, max_mb) * 1024 * 1024)
+
+
+def prune_image_packs(max_bytes, keep_path=None, packs_dir=DEFAULT_PACKS_DIR):
+    """
+    打包目录超过上限时按最近使用时间从旧到新删除打包文件，keep_path（刚写入的打包）不删除
+
+    Returns:
+        int: 删除的打包文件数量
+    """
+    if max_bytes <= 0:
+        return 0
+    packs = []
+    try:
+        with os.scandir(packs_dir) as it:
+            for entry in it:
+                if entry.name.endswith(".pack") and entry.is_file():
+                    stat = entry.stat()
+                    packs.append((stat.st_mtime_ns, stat.st_size, entry.path))
+    except OSError:
+        return 0
+    total_bytes = sum(size for _, size, _ in packs)
+    removed = 0
+    for _, size, path in sorted(packs):
+        if total_bytes <= max_bytes:
+            break
+        if keep_path is not None and os.path.abspath(path) == os.path.abspath(keep_path):
+            continue
+        try:
+            os.remove(path)
+        except OSError as e:
+            print(f"删除旧打包文件失败 {path}: {e}")
+            continue
+        total_bytes -= size
+        removed += 1
+    return removed
@@ -0,0 +1,81 @@
+from collections import defaultdict
+from ..daimao_lazy import lazy_import
+np = lazy_import("numpy")
+
+PADDING_MODES = ["solid_color", "transparent", "edge_extend", "mirror"]
+
+
+def fill_batch_background(batch, padding_mode, padding_color):
+    """
+    一次填充整批图片的背景
+
+    Args:
+        batch: uint8 numpy数组 (N, H, W, C)，原地写入
+        padding_mode: 填充模式
+        padding_color: 填充颜色 (r, g, b)，0.0-1.0
+    """
+    if padding_mode == "transparent":
+        # 透明背景
+        batch[...] = 0
+        return
+    # 纯色背景，edge_extend、mirror模式也先用填充颜色打底，居中留下的空隙与纯色模式一致
+    color = [int(round(c * 255)) for c in padding_color]
+    if batch.shape[3] == 4:
+        color.append(255)
+    batch[...] = color
+
+
+def padding_source_indices(length, before, after, padding_mode):
+    """
+    填充后每个位置对应的原图位置，与np.pad的edge、symmetric模式相同
+
+    edge_extend重复边缘像素；mirror以边缘为轴镜像（包含边缘像素），填充超过图片尺寸时继续来回镜像。
+
+    Returns:
+        numpy数组: 长度为 before + length + after 的索引
+    """
+    positions = np.arange(-before, length + after)
+    if padding_mode == "edge_extend":
+        return np.clip(positions, 0, length - 1)
+    period = 2 * length
+    positions = np.mod(positions, period)
+    return np.where(positions < length, positions, period - 1 - positions)
+
+
+def apply_batch_padding(batch, placements, paddings, padding_mode):
+    """
+    对整批图片应用edge_extend或mirror填充，其他模式只需要背景色，不做处理
+
+    放置位置和尺寸相同的图片（例如尺寸一致的整个目录）归为一组，每组的上下左右四条填充带各用一次
+    高级索引复制完成，不再逐行逐列赋值，填充再宽也只是一次数组操作。
+
+    Args:
+        batch: uint8 numpy数组 (N, H, W, C)，图片已放置好，原地写入
+        placements: 每张图片的 (y, x, 高, 宽)
+        paddings: (上, 下, 左, 右) 填充像素，每张图片在自身四周扩展这么多像素
+        padding_mode: 填充模式
+    """
+    padding_top, padding_bottom, padding_left, padding_right = paddings
+    if padding_mode not in ("edge_extend", "mirror") or not any(paddings):
+        return
+
+    groups = defaultdict(list)
+    for index, placement in enumerate(placements):
+        groups[placement].append(index)
+
+    for (y, x, height, width), indices in groups.items():
+        indices = np.asarray(indices)
+        rows = padding_source_indices(height, padding_top, padding_bottom, padding_mode) + y
+        cols = padding_source_indices(width, padding_left, padding_right, padding_mode) + x
+        top, left = y - padding_top, x - padding_left
+        bottom, right = y + height + padding_bottom, x + width + padding_right
+        # 源像素都在图片区域内，目标都在图片区域外，四条带互不影响
+        bands = (
+            (slice(top, y), rows[:padding_top], slice(left, right), cols),
+            (slice(y + height, bottom), rows[padding_top + height:], slice(left, right), cols),
+            (slice(y, y + height), rows[padding_top:padding_top + height], slice(left, x), cols[:padding_left]),
+            (slice(y, y + height), rows[padding_top:padding_top + height], slice(x + width, right), cols[padding_left + width:]),
+        )
+        for target_rows, source_rows, target_cols, source_cols in bands:
+            if len(source_rows) and len(source_cols):
+                batch[indices, target_rows, target_cols] = batch[np.ix_(indices, source_rows, source_cols)]
@@ -1,9 +1,11 @@
-import torch
-import numpy as np
-import cv2
+from ..daimao_lazy import lazy_import
+torch = lazy_import("torch")
+np = lazy_import("numpy")
+cv2 = lazy_import("cv2")
 
 class BoundingBoxMask:
     """最小矩形包裹遮罩节点"""
+    SEARCH_ALIASES = ["BoundingBox", "MinRectMask", "最小矩形"]
     
     @classmethod
     def INPUT_TYPES(cls):
@@ -1,7 +1,10 @@
-import torch
-import numpy as np
+from ..daimao_lazy import lazy_import
+torch = lazy_import("torch")
+np = lazy_import("numpy")
 
 class GridMask:
+    SEARCH_ALIASES = ["Grid", "网格遮罩"]
+    
     @classmethod
     def INPUT_TYPES(cls):
         return {
@@ -1,8 +1,11 @@
-import torch
-import numpy as np
-from scipy.ndimage import binary_dilation, binary_erosion, generate_binary_structure
+from ..daimao_lazy import lazy_import
+torch = lazy_import("torch")
+np = lazy_import("numpy")
+ndimage = lazy_import("scipy.ndimage")
 
 class SeamMask:
+    SEARCH_ALIASES = ["Seam", "接缝遮罩"]
+    
     @classmethod
     def INPUT_TYPES(cls):
         return {
@@ -39,7 +42,7 @@ class SeamMask:
             mask = mask.squeeze(0)  # 假设mask是在第一个维度上多余的
 
         # 生成结构元素
-        structure = generate_binary_structure(2, 1)
+        structure = ndimage.generate_binary_structure(2, 1)
         
         # 计算基本的扩展和收缩次数（宽度的一半）
         half_width = width // 2
@@ -64,9 +67,9 @@ class SeamMask:
             inner_iterations = half_width
 
         # 扩展遮罩
-        outer_dilated_mask = binary_dilation(mask.numpy(), structure=structure, iterations=outer_iterations)
+        outer_dilated_mask = ndimage.binary_dilation(mask.numpy(), structure=structure, iterations=outer_iterations)
         # 收缩遮罩
-        inner_eroded_mask = binary_erosion(mask.numpy(), structure=structure, iterations=inner_iterations)
+        inner_eroded_mask = ndimage.binary_erosion(mask.numpy(), structure=structure, iterations=inner_iterations)
 
         # 计算扩展区域（外部扩展减去内部收缩）
         expanded_region = torch.from_numpy(outer_dilated_mask).float().to(mask.device) - torch.from_numpy(inner_eroded_mask).float().to(mask.device)
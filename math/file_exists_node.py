@@ -1,10 +1,12 @@
 import os
-import torch
-import numpy as np
-from PIL import Image
+from ..daimao_lazy import lazy_import
+from ..load.image_cache import get_image_cache
+torch = lazy_import("torch")
+np = lazy_import("numpy")
 
 class FileExistsNode:
     """文件存在检查节点，判断指定路径的文件是否存在，并输出对应的图片"""
+    SEARCH_ALIASES = ["FileExists", "CheckFileExists", "IsFileExists", "文件存在", "检查文件"]
     
     @classmethod
     def INPUT_TYPES(cls):
@@ -68,15 +70,11 @@ class FileExistsNode:
         Returns:
             tensor: 图片tensor，格式为 (1, H, W, 3)
         """
-        # 使用PIL加载图片
-        image = Image.open(image_path)
+        # 通过与批量加载图片共享的解码缓存读取RGB像素，文件未修改时不必重新解码
+        pixels = get_image_cache().load(image_path, 'RGB')
         
-        # 确保是RGB模式
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
-        
-        # 转换为numpy数组
-        np_image = np.array(image).astype(np.float32) / 255.0
+        # 转换为0-1的float32数组（缓存中的数组是只读的，这里生成新数组）
+        np_image = pixels / np.float32(255.0)
         
         # 转换为tensor并添加batch维度
         tensor = torch.from_numpy(np_image).unsqueeze(0)
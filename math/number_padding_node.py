@@ -2,6 +2,7 @@ import os
 
 class NumberPaddingNode:
     """数字补零节点，将整数补零到指定位数"""
+    SEARCH_ALIASES = ["NumberPadding", "PadNumber", "ZeroPadding", "补零"]
     
     @classmethod
     def INPUT_TYPES(cls):
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""
+呆毛工具测试的公共设置
+
+不执行插件的__init__，只把插件目录作为一个包导入需要测试的模块，不需要ComfyUI环境。
+插件内的math子包会遮蔽标准库math，请在插件目录下运行 `pytest tests`（不要用 `python -m pytest`，它会把当前目录加入搜索路径）。
+"""
+
+import os
+import sys
+import types
+import importlib
+import tempfile
+
+import pytest
+
+PLUGIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path = [path for path in sys.path if os.path.abspath(path or os.curdir) != PLUGIN_DIR]
+
+PACKAGE_NAME = "daimao_tools_test"
+
+if PACKAGE_NAME not in sys.modules:
+    package = types.ModuleType(PACKAGE_NAME)
+    package.__path__ = [PLUGIN_DIR]
+    sys.modules[PACKAGE_NAME] = package
+
+# 查重模块在导入时引用ComfyUI的folder_paths，测试中只需要几个目录
+if "folder_paths" not in sys.modules:
+    _comfy_dir = tempfile.mkdtemp(prefix="daimao_test_comfy_")
+    folder_paths = types.ModuleType("folder_paths")
+    folder_paths.get_input_directory = lambda: _comfy_dir
+    folder_paths.get_output_directory = lambda: _comfy_dir
+    folder_paths.get_temp_directory = lambda: _comfy_dir
+    folder_paths.get_folder_paths = lambda name: [_comfy_dir]
+    sys.modules["folder_paths"] = folder_paths
+
+
+def import_plugin_module(name):
+    """导入插件内的模块，例如 import_plugin_module("daimao_file_finder")"""
+    return importlib.import_module(f"{PACKAGE_NAME}.{name}")
+
+
+@pytest.fixture
+def hash_index(tmp_path, monkeypatch):
+    """使用临时文件的哈希索引，并替换进程内共享的索引，测试不会写入插件目录下的hash_index.json"""
+    hash_index_module = import_plugin_module("daimao_hash_index")
+    index = hash_index_module.DaiMaoHashIndex(str(tmp_path / "hash_index.json"))
+    monkeypatch.setattr(hash_index_module, "_HASH_INDEX", index)
+    return index
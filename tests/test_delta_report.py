@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""查重变化报告的比较和失败扫描处理测试"""
+
+import json
+
+from conftest import import_plugin_module
+
+delta_module = import_plugin_module("daimao_file_delta_report")
+finder_module = import_plugin_module("daimao_file_finder")
+
+
+def scan(*groups):
+    return {"groups": [{"hash": hash_val, "hash_type": "sha256", "wasted_space_bytes": 10 * (len(files) - 1),
+                        "files": [{"path": path} for path in files]} for hash_val, files in groups],
+            "summary": {"total_groups": len(groups)}}
+
+
+def test_compare_new_resolved_and_grown_groups(tmp_path):
+    node = delta_module.DaiMaoDuplicatesDeltaReport(str(tmp_path))
+    previous = node.build_snapshot(scan(("a", ["/x/1", "/x/2"]), ("b", ["/y/1", "/y/2"])))["groups"]
+    current = node.build_snapshot(scan(("a", ["/x/1", "/x/2", "/x/3"]), ("c", ["/z/1", "/z/2"])))["groups"]
+
+    new_groups, resolved_groups, grown_groups = node.compare(previous, current)
+
+    assert [g["key"] for g in new_groups] == ["sha256:c"]
+    assert [g["key"] for g in resolved_groups] == ["sha256:b"]
+    assert [(g["key"], g["added_files"]) for g in grown_groups] == [("sha256:a", ["/x/3"])]
+
+
+def test_compare_ignores_unchanged_and_shrunk_groups(tmp_path):
+    node = delta_module.DaiMaoDuplicatesDeltaReport(str(tmp_path))
+    previous = node.build_snapshot(scan(("a", ["/x/1", "/x/2", "/x/3"]), ("b", ["/y/1", "/y/2"])))["groups"]
+    current = node.build_snapshot(scan(("a", ["/x/1", "/x/2"]), ("b", ["/y/1", "/y/2"])))["groups"]
+
+    assert node.compare(previous, current) == ([], [], [])
+
+
+def test_clean_scan_resolves_everything_and_replaces_snapshot(tmp_path, hash_index):
+    node = delta_module.DaiMaoDuplicatesDeltaReport(str(tmp_path / "reports"))
+    node.build_delta_report(json.dumps(scan(("a", ["/x/1", "/x/2"]), ("b", ["/y/1", "/y/2"]))), "nightly", "是")
+    (tmp_path / "files").mkdir()
+    (tmp_path / "files" / "only.bin").write_bytes(b"unique")
+    _, clean_scan = finder_module.DaiMaoFileDuplicatesFinder().find_duplicate_files(
+        str(tmp_path / "files"), "", "全部文件", 0.0, "否", exclude_dirs="")
+
+    text, data = node.build_delta_report(clean_scan, "nightly", "是")
+
+    assert "全部已解决" in text
+    assert sorted(g["key"] for g in json.loads(data)["resolved_groups"]) == ["sha256:a", "sha256:b"]
+    assert node.load_snapshot(node.snapshot_path("nightly"))["groups"] == {}
+
+
+def test_failed_scan_keeps_previous_snapshot(tmp_path):
+    node = delta_module.DaiMaoDuplicatesDeltaReport(str(tmp_path))
+    node.build_delta_report(json.dumps(scan(("a", ["/x/1", "/x/2"]))), "nightly", "是")
+    snapshot_path = node.snapshot_path("nightly")
+    with open(snapshot_path, encoding="utf-8") as f:
+        saved = f.read()
+
+    text, data = node.build_delta_report("{}", "nightly", "是")
+
+    assert data == "{}"
+    assert "未进行比较" in text
+    with open(snapshot_path, encoding="utf-8") as f:
+        assert f.read() == saved
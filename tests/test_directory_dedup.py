@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""重复目录查找和整目录替换为链接的测试"""
+
+import os
+import json
+
+from conftest import import_plugin_module
+
+finder_module = import_plugin_module("daimao_file_finder")
+symlink_module = import_plugin_module("daimao_file_deduplicator_with_symlink")
+
+
+def write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(content)
+
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def make_nested_tree(root):
+    """A/{x/m1.bin, top.bin}，B是A的副本，C/m1.bin与A/x相同"""
+    for name in ("A", "B"):
+        write(os.path.join(root, name, "x", "m1.bin"), b"model one")
+        write(os.path.join(root, name, "top.bin"), b"top level")
+    write(os.path.join(root, "C", "m1.bin"), b"model one")
+
+
+def snapshot_tree(root):
+    tree = {}
+    for dir_path, dir_names, file_names in os.walk(root):
+        for name in dir_names + file_names:
+            path = os.path.join(dir_path, name)
+            tree[os.path.relpath(path, root)] = (os.path.islink(path), None if os.path.isdir(path) else read(path))
+    return tree
+
+
+def directory_group(group_id, *dirs):
+    return {"group_id": group_id, "hash": "m" * 64, "hash_type": "merkle_sha256", "verified": True,
+            "file_count": 1, "total_size_bytes": 1, "directories": [{"path": d} for d in dirs]}
+
+
+def assert_contents_survive(root):
+    for path in ("A/x/m1.bin", "B/x/m1.bin", "C/m1.bin"):
+        assert read(os.path.join(root, path)) == b"model one"
+    for path in ("A/top.bin", "B/top.bin"):
+        assert read(os.path.join(root, path)) == b"top level"
+
+
+def test_finder_drops_nested_directories_of_replaced_copies(tmp_path, hash_index):
+    root = str(tmp_path)
+    make_nested_tree(root)
+
+    _, json_data = finder_module.DaiMaoFileDuplicatesFinder().find_duplicate_files(
+        root, "", "全部文件", 0.0, "否", exclude_dirs="", detect_duplicate_dirs="是")
+
+    groups = [[d["path"] for d in g["directories"]] for g in json.loads(json_data)["directory_groups"]]
+    join = lambda *parts: os.path.join(root, *parts)
+    assert sorted(groups) == sorted([[join("A"), join("B")], [join("A", "x"), join("C")]])
+
+
+def test_nested_groups_keep_every_file(tmp_path, hash_index):
+    root = str(tmp_path)
+    make_nested_tree(root)
+    _, json_data = finder_module.DaiMaoFileDuplicatesFinder().find_duplicate_files(
+        root, "", "全部文件", 0.0, "否", exclude_dirs="", detect_duplicate_dirs="是")
+
+    symlink_module.DaiMaoFileDeduplicatorWithSymlink().deduplicate_files_with_symlink(json_data, "保留第一个文件", "软链接", "否")
+
+    assert_contents_survive(root)
+    assert os.path.islink(os.path.join(root, "B")) and os.path.islink(os.path.join(root, "C"))
+    assert not os.path.islink(os.path.join(root, "A", "x"))
+
+
+def test_child_group_under_replaced_parent_is_skipped(tmp_path):
+    """旧版报告中包含上层组之下的目录时，执行时也不会经由链接操作保留的目录"""
+    root = str(tmp_path)
+    make_nested_tree(root)
+    join = lambda *parts: os.path.join(root, *parts)
+    groups = [directory_group(1, join("A"), join("B")), directory_group(2, join("A", "x"), join("B", "x"), join("C"))]
+
+    result, _, _, _ = symlink_module.DaiMaoFileDeduplicatorWithSymlink().process_directory_groups(groups, "软链接", False)
+
+    assert "上级目录是链接" in result
+    assert_contents_survive(root)
+    assert not os.path.islink(join("A", "x"))
+
+
+def test_dry_run_leaves_tree_untouched(tmp_path):
+    root = str(tmp_path)
+    make_nested_tree(root)
+    before = snapshot_tree(root)
+    groups = [directory_group(1, os.path.join(root, "A"), os.path.join(root, "B"))]
+
+    symlink_module.DaiMaoFileDeduplicatorWithSymlink().process_directory_groups(groups, "软链接", True)
+
+    assert snapshot_tree(root) == before
+
+
+def test_failed_symlink_restores_directory(tmp_path, monkeypatch):
+    root = str(tmp_path)
+    make_nested_tree(root)
+    before = snapshot_tree(root)
+
+    def fail_symlink(*args, **kwargs):
+        raise OSError("模拟创建软链接失败")
+
+    monkeypatch.setattr(symlink_module.os, "symlink", fail_symlink)
+    groups = [directory_group(1, os.path.join(root, "A"), os.path.join(root, "B"))]
+
+    result, total_dirs, _, _ = symlink_module.DaiMaoFileDeduplicatorWithSymlink().process_directory_groups(groups, "软链接", False)
+
+    assert "模拟创建软链接失败" in result and total_dirs == 0
+    assert not os.path.lexists(os.path.join(root, "B.temp"))
+    assert snapshot_tree(root) == before
+
+
+def test_hardlink_replaces_each_file(tmp_path):
+    root = str(tmp_path)
+    make_nested_tree(root)
+    groups = [directory_group(1, os.path.join(root, "A"), os.path.join(root, "B"))]
+
+    _, total_dirs, total_links, _ = symlink_module.DaiMaoFileDeduplicatorWithSymlink().process_directory_groups(groups, "硬链接", False)
+
+    assert (total_dirs, total_links) == (1, 2)
+    assert not os.path.islink(os.path.join(root, "B"))
+    for path in ("x/m1.bin", "top.bin"):
+        assert os.path.samefile(os.path.join(root, "A", path), os.path.join(root, "B", path))
+    assert_contents_survive(root)
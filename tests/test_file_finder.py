@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""校验文件（<文件>.sha256）信任规则测试"""
+
+import os
+import hashlib
+
+from conftest import import_plugin_module
+
+finder_module = import_plugin_module("daimao_file_finder")
+
+CONTENT = b"daimao sidecar test\n"
+DIGEST = hashlib.sha256(CONTENT).hexdigest()
+
+
+def make_file(tmp_path):
+    path = tmp_path / "model.safetensors"
+    path.write_bytes(CONTENT)
+    return str(path)
+
+
+def test_own_sidecar_is_trusted_when_size_and_mtime_match(tmp_path):
+    path = make_file(tmp_path)
+    finder = finder_module.DaiMaoFileDuplicatesFinder()
+    stat = os.stat(path)
+    finder.write_sidecar(path, stat, "a" * 64)
+
+    assert finder.read_sidecar(path, stat) == "a" * 64
+
+
+def test_own_sidecar_is_ignored_after_file_changes(tmp_path):
+    path = make_file(tmp_path)
+    finder = finder_module.DaiMaoFileDuplicatesFinder()
+    finder.write_sidecar(path, os.stat(path), DIGEST)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert finder.read_sidecar(path, os.stat(path)) is None
+
+
+def test_foreign_sidecar_is_not_trusted_even_if_newer(tmp_path):
+    path = make_file(tmp_path)
+    with open(path + ".sha256", "w", encoding="utf-8") as f:
+        f.write(f"{'b' * 64} *model.safetensors\n")
+    stat = os.stat(path)
+    os.utime(path + ".sha256", ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert finder_module.DaiMaoFileDuplicatesFinder().read_sidecar(path, stat) is None
+
+
+def test_foreign_sidecar_falls_back_to_hashing(tmp_path):
+    path = make_file(tmp_path)
+    with open(path + ".sha256", "w", encoding="utf-8") as f:
+        f.write(f"{'b' * 64} *model.safetensors\n")
+
+    assert finder_module.DaiMaoFileDuplicatesFinder().get_file_sha256(path, sidecar_mode="读取") == DIGEST
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""去重前校验（stat比对和重新计算哈希）测试"""
+
+import os
+import hashlib
+
+from conftest import import_plugin_module
+
+preverify_module = import_plugin_module("daimao_file_preverify")
+scan_index_module = import_plugin_module("daimao_scan_index")
+
+CONTENT = b"daimao preverify test\n"
+DIGEST = hashlib.sha256(CONTENT).hexdigest()
+
+
+def file_record(path):
+    stat = os.stat(path)
+    return {"path": path, "size_bytes": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+            "inode": stat.st_ino, "device": stat.st_dev}
+
+
+def make_files(tmp_path, count=2):
+    paths = []
+    for i in range(count):
+        path = tmp_path / f"file_{i}.bin"
+        path.write_bytes(CONTENT)
+        paths.append(str(path))
+    return paths
+
+
+def test_stat_unchanged(tmp_path):
+    path = make_files(tmp_path, 1)[0]
+    record = file_record(path)
+    stat = os.stat(path)
+
+    assert preverify_module.stat_unchanged(record, stat)
+    assert not preverify_module.stat_unchanged(dict(record, mtime_ns=record["mtime_ns"] + 1), stat)
+    assert not preverify_module.stat_unchanged(dict(record, size_bytes=record["size_bytes"] + 1), stat)
+    assert not preverify_module.stat_unchanged(dict(record, inode=record["inode"] + 1), stat)
+    # 旧版报告没有记录修改时间，视为已变化
+    assert not preverify_module.stat_unchanged({"path": path, "size_bytes": stat.st_size}, stat)
+
+
+def test_verify_group_keeps_unchanged_files_without_rehashing(tmp_path, hash_index):
+    paths = make_files(tmp_path)
+    group = {"hash": DIGEST, "files": [file_record(path) for path in paths]}
+
+    kept_files, messages, rehashed = preverify_module.verify_file_group(group, hash_index)
+
+    assert [f["path"] for f in kept_files] == paths
+    assert messages == [] and rehashed == 0
+
+
+def test_verify_group_drops_changed_and_missing_files(tmp_path, hash_index):
+    paths = make_files(tmp_path, 4)
+    group = {"hash": DIGEST, "files": [file_record(path) for path in paths]}
+    # 修改时间变化但内容未变：重新计算后保留；内容变化：移除；文件删除：移除
+    stat = os.stat(paths[1])
+    os.utime(paths[1], ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    with open(paths[2], "ab") as f:
+        f.write(b"changed")
+    os.remove(paths[3])
+
+    kept_files, messages, rehashed = preverify_module.verify_file_group(group, hash_index)
+
+    assert [f["path"] for f in kept_files] == paths[:2]
+    assert kept_files[1]["mtime_ns"] == os.stat(paths[1]).st_mtime_ns
+    assert rehashed == 2
+    assert len(messages) == 2
+
+
+def test_verify_group_keeps_files_from_other_hosts(tmp_path, hash_index):
+    paths = make_files(tmp_path, 1)
+    remote = {"host": scan_index_module.get_host_name() + "-other", "path": "/remote/file.bin", "size_bytes": 1}
+    group = {"hash": DIGEST, "files": [file_record(paths[0]), remote]}
+
+    kept_files, messages, rehashed = preverify_module.verify_file_group(group, hash_index)
+
+    assert kept_files[1] == remote
+    assert messages == [] and rehashed == 0
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""内容寻址存储入库的回滚和垃圾回收测试"""
+
+import os
+import json
+import hashlib
+
+from conftest import import_plugin_module
+
+store_module = import_plugin_module("daimao_file_store")
+
+CONTENT = b"daimao store test\n"
+DIGEST = hashlib.sha256(CONTENT).hexdigest()
+
+
+def make_group(tmp_path, digest=DIGEST):
+    paths = []
+    for name in ("a.bin", "b.bin"):
+        path = tmp_path / "files" / name
+        path.parent.mkdir(exist_ok=True)
+        path.write_bytes(CONTENT)
+        paths.append(str(path))
+    return paths, json.dumps({"groups": [{"group_id": 1, "hash": digest, "files": paths}]})
+
+
+def load_manifest(store_directory):
+    with open(os.path.join(store_directory, store_module.DaiMaoContentStore.MANIFEST_NAME), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_link_failure_moves_blob_back(tmp_path, hash_index, monkeypatch):
+    paths, data = make_group(tmp_path)
+    store_directory = str(tmp_path / "store")
+    node = store_module.DaiMaoContentStore()
+    monkeypatch.setattr(node.linker, "create_link", lambda target, link, link_type, relative=False: (False, "模拟创建链接失败"))
+
+    result = node.run_store(data, store_directory, "入库", "硬链接", "否", "否")[0]
+
+    assert "模拟创建链接失败" in result
+    for path in paths:
+        assert os.path.isfile(path) and not os.path.islink(path)
+        with open(path, "rb") as f:
+            assert f.read() == CONTENT
+    assert load_manifest(store_directory)["blobs"] == {}
+
+
+def test_hash_mismatch_aborts_group(tmp_path, hash_index):
+    paths, data = make_group(tmp_path, digest="0" * 64)
+    store_directory = str(tmp_path / "store")
+
+    result = store_module.DaiMaoContentStore().run_store(data, store_directory, "入库", "软链接", "否", "否")[0]
+
+    assert "哈希不一致" in result
+    assert all(os.path.isfile(path) and not os.path.islink(path) for path in paths)
+    assert load_manifest(store_directory)["blobs"] == {}
+
+
+def test_ingest_links_every_file(tmp_path, hash_index):
+    paths, data = make_group(tmp_path)
+    store_directory = str(tmp_path / "store")
+
+    store_module.DaiMaoContentStore().run_store(data, store_directory, "入库", "硬链接", "否")
+
+    entry = load_manifest(store_directory)["blobs"][DIGEST]
+    assert sorted(entry["refs"]) == sorted(paths)
+    blob_path = os.path.join(store_directory, entry["blob"])
+    assert all(os.path.samefile(path, blob_path) for path in paths)
+
+
+def test_garbage_collection_keeps_hard_linked_blob(tmp_path, hash_index):
+    paths, data = make_group(tmp_path)
+    store_directory = str(tmp_path / "store")
+    node = store_module.DaiMaoContentStore()
+    node.run_store(data, store_directory, "入库", "硬链接", "否")
+
+    # 清单中丢失引用记录，但文件仍是指向存储文件的硬链接
+    manifest = load_manifest(store_directory)
+    manifest["blobs"][DIGEST]["refs"] = []
+    node.save_manifest(store_directory, manifest)
+
+    result = node.run_store("", store_directory, "垃圾回收", "硬链接", "否")[0]
+
+    assert "保留" in result
+    assert os.path.isfile(os.path.join(store_directory, manifest["blobs"][DIGEST]["blob"]))
+
+
+def test_member_with_different_content_is_not_replaced(tmp_path, hash_index):
+    paths, data = make_group(tmp_path)
+    with open(paths[1], "wb") as f:
+        f.write(b"different content, same report\n")
+    store_directory = str(tmp_path / "store")
+
+    result = store_module.DaiMaoContentStore().run_store(data, store_directory, "入库", "软链接", "否", "否")[0]
+
+    assert "不一致" in result
+    assert not os.path.islink(paths[1])
+    with open(paths[1], "rb") as f:
+        assert f.read() == b"different content, same report\n"
+    assert load_manifest(store_directory)["blobs"][DIGEST]["refs"] == [paths[0]]
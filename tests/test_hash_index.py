@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""哈希索引按SHA256和AutoV2短哈希查询的测试"""
+
+import os
+import hashlib
+
+from conftest import import_plugin_module
+
+hash_index_module = import_plugin_module("daimao_hash_index")
+
+
+def add_file(index, tmp_path, name, content):
+    path = tmp_path / name
+    path.write_bytes(content)
+    stat = os.stat(path)
+    sha256 = hashlib.sha256(content).hexdigest()
+    index.put(str(path), stat.st_size, stat.st_mtime_ns, sha256)
+    return str(path), sha256
+
+
+def test_lookup_by_sha256_and_autov2(tmp_path, hash_index):
+    path, sha256 = add_file(hash_index, tmp_path, "a.safetensors", b"model a")
+
+    assert [f["path"] for f in hash_index.lookup(sha256)] == [path]
+    assert [f["path"] for f in hash_index.lookup(sha256[:10].upper())] == [path]
+    assert hash_index.lookup(sha256[:10])[0]["sha256"] == sha256
+
+
+def test_lookup_rejects_other_lengths(tmp_path, hash_index):
+    _, sha256 = add_file(hash_index, tmp_path, "a.safetensors", b"model a")
+
+    # 不足或超过10位的查询不会被截断成AutoV2
+    assert hash_index.lookup(sha256[:8]) == []
+    assert hash_index.lookup(sha256[:12]) == []
+    assert hash_index.find_by_autov2(sha256[:12]) == []
+    assert not hash_index_module.is_lookup_hash(sha256[:12])
+    assert not hash_index_module.is_lookup_hash("g" * 10)
+    assert hash_index_module.is_lookup_hash(sha256[:10])
+    assert hash_index_module.is_lookup_hash(sha256)
+
+
+def test_lookup_skips_modified_files(tmp_path, hash_index):
+    path, sha256 = add_file(hash_index, tmp_path, "a.safetensors", b"model a")
+    with open(path, "ab") as f:
+        f.write(b" changed")
+
+    assert hash_index.lookup(sha256[:10]) == []
+
+
+def test_lookup_prunes_deleted_files(tmp_path, hash_index):
+    path, sha256 = add_file(hash_index, tmp_path, "a.safetensors", b"model a")
+    kept, _ = add_file(hash_index, tmp_path, "b.safetensors", b"model a")
+    os.remove(path)
+
+    assert [f["path"] for f in hash_index.lookup(sha256)] == [kept]
+    hash_index.save()
+
+    reloaded = hash_index_module.DaiMaoHashIndex(hash_index.index_path)
+    assert list(reloaded.entries) == [kept]
+    os.remove(kept)
+    assert reloaded.lookup(sha256[:10]) == []
+    assert reloaded.entries == {} and reloaded.by_autov2 == {}
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""相似图片哈希的进度回调和取消测试"""
+
+import time
+import threading
+
+import pytest
+from PIL import Image
+
+from conftest import import_plugin_module
+
+finder_module = import_plugin_module("daimao_file_finder")
+image_hash_module = import_plugin_module("daimao_image_hash")
+
+
+def make_images(tmp_path, count):
+    paths = []
+    for i in range(count):
+        path = tmp_path / f"img_{i}.png"
+        Image.new("L", (16, 16), color=i * 10).save(path)
+        paths.append(str(path))
+    return paths
+
+
+def test_progress_is_reported_for_every_image(tmp_path):
+    paths = make_images(tmp_path, 5)
+    calls = []
+
+    hashes = image_hash_module.compute_image_hashes(paths, "pHash", lambda processed, total: calls.append((processed, total)), num_workers=3)
+
+    assert sorted(hashes) == sorted(paths)
+    assert calls == [(i, 5) for i in range(1, 6)]
+
+
+def test_cancel_stops_before_the_batch_ends(tmp_path, monkeypatch):
+    paths = make_images(tmp_path, 20)
+    finder = finder_module.DaiMaoFileDuplicatesFinder()
+    finder.cancel_event = threading.Event()
+    finder.progress_callback = lambda processed, total: processed == 3 and finder.cancel_event.set()
+    decoded = []
+    load_gray = image_hash_module.load_gray
+
+    def gated_load_gray(path, algorithm):
+        # 第5张起等到取消后再解码，保证取消时批内还有未开始的图片
+        if paths.index(path) >= 4:
+            finder.cancel_event.wait(5)
+            time.sleep(0.05)
+        decoded.append(path)
+        return load_gray(path, algorithm)
+
+    monkeypatch.setattr(image_hash_module, "load_gray", gated_load_gray)
+    monkeypatch.setattr(image_hash_module, "resolve_num_workers", lambda num_workers, file_count: 1)
+
+    with pytest.raises(finder_module.ScanCancelledError):
+        finder.find_near_duplicates(paths, "pHash", 6)
+
+    assert len(decoded) < 8
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""图片打包缓存的失效、读写和目录清理测试"""
+
+import os
+import io
+import contextlib
+
+import numpy as np
+from PIL import Image
+
+from conftest import import_plugin_module
+
+image_pack_module = import_plugin_module("load.image_pack")
+loader_module = import_plugin_module("load.batch_load_images_node")
+
+
+def make_images(directory, count=3):
+    rng = np.random.default_rng(0)
+    paths = []
+    for i in range(count):
+        path = os.path.join(directory, f"image_{i}.png")
+        Image.fromarray(rng.integers(0, 256, (6 + i, 8, 3), dtype=np.uint8)).save(path)
+        paths.append(path)
+    return paths
+
+
+def bump_mtime(path):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_pack_round_trip_and_invalidation_on_mtime_change(tmp_path):
+    paths = make_images(str(tmp_path))
+    params = [str(tmp_path), "png"]
+    pack_file = image_pack_module.pack_path(params, str(tmp_path / "packs"))
+    fingerprint = image_pack_module.files_fingerprint(paths, params)
+    entries = [(path, "RGB", np.asarray(Image.open(path).convert("RGB"))) for path in paths]
+    image_pack_module.write_image_pack(pack_file, fingerprint, entries, ["broken.png"])
+
+    loaded_entries, failed_files = image_pack_module.load_image_pack(pack_file, fingerprint)
+    assert failed_files == ["broken.png"]
+    for (path, mode, pixels), (loaded_path, loaded_mode, loaded_pixels) in zip(entries, loaded_entries):
+        assert (loaded_path, loaded_mode) == (path, mode)
+        assert np.array_equal(loaded_pixels, pixels)
+    del loaded_entries
+
+    bump_mtime(paths[1])
+    new_fingerprint = image_pack_module.files_fingerprint(paths, params)
+    assert new_fingerprint != fingerprint
+    assert image_pack_module.load_image_pack(pack_file, new_fingerprint) is None
+
+
+def test_loader_rebuilds_pack_after_mtime_change(tmp_path, monkeypatch):
+    image_dir = tmp_path / "images"
+    image_dir.mkdir()
+    paths = make_images(str(image_dir))
+    packs_dir = str(tmp_path / "packs")
+    monkeypatch.setattr(loader_module, "pack_path", lambda key_parts: image_pack_module.pack_path(key_parts, packs_dir))
+    monkeypatch.setattr(loader_module, "prune_image_packs",
+                        lambda max_bytes, keep_path=None: image_pack_module.prune_image_packs(max_bytes, keep_path, packs_dir))
+    node = loader_module.BatchLoadImagesNode()
+
+    def load():
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            result = node.load_images(str(image_dir), "png", padding_top=1, padding_mode="mirror", pack_cache="是")
+        return result, output.getvalue()
+
+    first, first_log = load()
+    second, second_log = load()
+    bump_mtime(paths[0])
+    third, third_log = load()
+    fourth, fourth_log = load()
+
+    assert "已写入打包缓存" in first_log
+    assert "从打包缓存加载" in second_log
+    assert "从打包缓存加载" not in third_log and "已写入打包缓存" in third_log
+    assert "从打包缓存加载" in fourth_log
+    for result in (second, third, fourth):
+        assert np.array_equal(result[0].numpy(), first[0].numpy())
+
+
+def test_prune_removes_least_recently_used_packs(tmp_path):
+    packs_dir = str(tmp_path)
+    pack_files = []
+    for i in range(4):
+        pack_file = os.path.join(packs_dir, f"{i}.pack")
+        image_pack_module.write_image_pack(pack_file, "f", [("x", "RGB", np.zeros((10, 10, 3), np.uint8))], [])
+        os.utime(pack_file, ns=(i * 10 ** 9, i * 10 ** 9))
+        pack_files.append(pack_file)
+    # 命中的打包会更新修改时间，成为最近使用
+    assert image_pack_module.load_image_pack(pack_files[0], "f") is not None
+    pack_size = os.path.getsize(pack_files[0])
+
+    removed = image_pack_module.prune_image_packs(pack_size * 2, keep_path=pack_files[3], packs_dir=packs_dir)
+
+    assert removed == 2
+    assert sorted(os.listdir(packs_dir)) == ["0.pack", "3.pack"]
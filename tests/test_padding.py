@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""整批边缘填充与np.pad结果一致性测试"""
+
+import numpy as np
+import pytest
+
+from conftest import import_plugin_module
+
+padding_module = import_plugin_module("load.padding")
+
+NP_PAD_MODES = {"edge_extend": "edge", "mirror": "symmetric"}
+
+
+@pytest.mark.parametrize("padding_mode", ["edge_extend", "mirror"])
+@pytest.mark.parametrize("length,before,after", [(5, 2, 3), (4, 0, 6), (3, 7, 9), (1, 4, 2), (6, 0, 0)])
+def test_source_indices_match_np_pad(padding_mode, length, before, after):
+    values = np.arange(length)
+    expected = np.pad(values, (before, after), mode=NP_PAD_MODES[padding_mode])
+
+    assert np.array_equal(values[padding_module.padding_source_indices(length, before, after, padding_mode)], expected)
+
+
+@pytest.mark.parametrize("padding_mode", ["edge_extend", "mirror"])
+@pytest.mark.parametrize("paddings", [(2, 3, 1, 4), (0, 5, 9, 0), (12, 1, 0, 11)])
+def test_batch_padding_matches_np_pad(padding_mode, paddings):
+    padding_top, padding_bottom, padding_left, padding_right = paddings
+    rng = np.random.default_rng(0)
+    sizes = [(6, 8), (6, 8), (3, 5), (8, 2)]
+    max_height = max(h for h, _ in sizes)
+    max_width = max(w for _, w in sizes)
+    batch = np.zeros((len(sizes), max_height + padding_top + padding_bottom, max_width + padding_left + padding_right, 3), dtype=np.uint8)
+    padding_module.fill_batch_background(batch, padding_mode, (1.0, 0.0, 0.0))
+
+    images, placements = [], []
+    for index, (height, width) in enumerate(sizes):
+        image = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+        y = padding_top + (max_height - height) // 2
+        x = padding_left + (max_width - width) // 2
+        batch[index, y:y + height, x:x + width] = image
+        images.append(image)
+        placements.append((y, x, height, width))
+
+    padding_module.apply_batch_padding(batch, placements, paddings, padding_mode)
+
+    for image, (y, x, height, width), padded_image in zip(images, placements, batch):
+        expected = np.pad(image, ((padding_top, padding_bottom), (padding_left, padding_right), (0, 0)),
+                          mode=NP_PAD_MODES[padding_mode])
+        region = padded_image[y - padding_top:y + height + padding_bottom, x - padding_left:x + width + padding_right]
+        assert np.array_equal(region, expected)
+
+
+def test_solid_color_background_is_left_untouched():
+    batch = np.zeros((1, 6, 6, 4), dtype=np.uint8)
+    padding_module.fill_batch_background(batch, "solid_color", (0.0, 1.0, 0.0))
+    before = batch.copy()
+
+    padding_module.apply_batch_padding(batch, [(1, 1, 4, 4)], (1, 1, 1, 1), "solid_color")
+
+    assert np.array_equal(batch, before)
+    assert batch[0, 0, 0].tolist() == [0, 255, 0, 255]
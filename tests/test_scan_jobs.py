@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""后台查重接口的扫描目录限制测试"""
+
+import os
+
+import folder_paths
+from conftest import import_plugin_module
+
+scan_jobs_module = import_plugin_module("daimao_scan_jobs")
+
+
+def test_directory_inside_comfyui_is_allowed(monkeypatch):
+    monkeypatch.delenv(scan_jobs_module.SCAN_JOB_ROOTS_ENV, raising=False)
+    models_dir = os.path.join(folder_paths.get_input_directory(), "models")
+    os.makedirs(models_dir, exist_ok=True)
+
+    real_path, error = scan_jobs_module.check_scan_job_directory(models_dir)
+
+    assert error is None and real_path == os.path.realpath(models_dir)
+
+
+def test_directory_outside_roots_is_rejected(tmp_path, monkeypatch):
+    monkeypatch.delenv(scan_jobs_module.SCAN_JOB_ROOTS_ENV, raising=False)
+    monkeypatch.setattr(scan_jobs_module, "get_scan_job_roots", lambda: [os.path.realpath(str(tmp_path / "comfy"))])
+    (tmp_path / "comfy").mkdir()
+    (tmp_path / "secret").mkdir()
+    os.symlink(str(tmp_path / "secret"), str(tmp_path / "comfy" / "link"))
+
+    for path in (tmp_path / "secret", tmp_path / "comfy" / ".." / "secret", tmp_path / "comfy" / "link"):
+        assert scan_jobs_module.check_scan_job_directory(str(path))[1] is not None
+    assert scan_jobs_module.check_scan_job_directory(str(tmp_path / "comfy"))[1] is None
+
+
+def test_extra_roots_from_environment(tmp_path, monkeypatch):
+    extra = tmp_path / "extra"
+    extra.mkdir()
+    monkeypatch.setenv(scan_jobs_module.SCAN_JOB_ROOTS_ENV, str(extra))
+
+    assert str(extra.resolve()) in scan_jobs_module.get_scan_job_roots()
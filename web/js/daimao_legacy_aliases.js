@@ -0,0 +1,40 @@
+import { app } from "../../../../scripts/app.js";
+import { api } from "../../../../scripts/api.js";
+
+// 旧版节点键到当前节点键的映射，在init中读取（早于恢复上次的工作流）
+let legacyAliases = {};
+
+// 把工作流（包括子图定义）中使用旧版别名键的节点改写为当前节点键
+function remapLegacyNodes(graphData) {
+    const graphs = [graphData, ...(graphData?.definitions?.subgraphs ?? [])];
+    let remapped = 0;
+    for (const graph of graphs) {
+        for (const node of graph?.nodes ?? []) {
+            const key = legacyAliases[node.type];
+            if (key) {
+                node.type = key;
+                remapped++;
+            }
+        }
+    }
+    if (remapped) {
+        console.log(`[呆毛工具] 已把 ${remapped} 个旧版别名节点改写为当前节点`);
+    }
+}
+
+app.registerExtension({
+    name: "DaiMao.LegacyAliases",
+    async init() {
+        try {
+            const resp = await api.fetchApi("/daimao_tools/legacy_aliases");
+            if (resp.status === 200) {
+                legacyAliases = await resp.json();
+            }
+        } catch (e) {
+            console.warn("[呆毛工具] 读取旧版别名映射失败", e);
+        }
+    },
+    beforeConfigureGraph(graphData) {
+        remapLegacyNodes(graphData);
+    },
+});